@@ -1,9 +1,9 @@
 import pandas as pd
 from fastapi import FastAPI, HTTPException, Request, Body, Query, Form, UploadFile, File, status
-from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
-from typing import Dict, List, Optional, Tuple, Set, Any
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, Response
+from typing import Dict, List, Optional, Tuple, Set, Any, Iterator, AsyncIterator
 from pathlib import Path
-from pydantic import BaseModel, Json, Field, HttpUrl
+from pydantic import BaseModel, Json, Field, HttpUrl, ValidationError
 import json
 import logging
 import shutil
@@ -11,6 +11,7 @@ import uuid
 import math
 import numpy as np
 import openpyxl
+from openpyxl.utils import get_column_letter
 from io import BytesIO
 import re
 from datetime import datetime, timedelta # Ensure datetime is imported
@@ -21,6 +22,7 @@ import base64 # Import base64 for file decoding
 from fastapi.staticfiles import StaticFiles # Import StaticFiles
 import zipfile
 import dateutil.parser
+from pandas.tseries.api import guess_datetime_format
 from dotenv import load_dotenv, find_dotenv
 from collections import defaultdict 
 import io
@@ -33,6 +35,17 @@ import shutil
 from pathlib import Path
 import sys
 import importlib.util
+import threading
+import multiprocessing
+import hashlib
+import copy
+import pickle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import deque
+import asyncio
+from array import array
+import random
+from urllib.parse import urlparse
 
 
 load_dotenv()
@@ -78,6 +91,258 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+#------------- Reference Data Cache ------------------#
+class ReferenceDataCache:
+    """
+    In-process cache for the workbooks under Required_files.
+
+    Each entry is keyed on (resolved path, loader name) and stamped with the
+    file's mtime and size. A lookup re-runs the loader only when that stamp
+    changes, so endpoints can ask for the normalized data on every request
+    without re-parsing the .xlsx with openpyxl.
+
+    The loader runs outside the cache lock, behind a lock of its own key: concurrent
+    misses on one file load it once, while hits on other files are not held up.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], Tuple[Tuple[int, int], Any]] = {}
+        self._lock = threading.RLock()
+        self._load_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        # Bumped by invalidate(), so a load that was running at the time is not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _signature(file_path: Path) -> Tuple[int, int]:
+        stat = file_path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, file_path: Path, loader):
+        """
+        Returns loader(file_path), reusing the cached value while the file is unchanged.
+        Raises FileNotFoundError if the file does not exist.
+        """
+        file_path = Path(file_path)
+        key = (str(file_path.resolve()), loader.__name__)
+        signature = self._signature(file_path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                return entry[1]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                # Another thread may have loaded it while this one waited
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == signature:
+                    self.hits += 1
+                    return entry[1]
+                self.misses += 1
+                generation = self._generation
+
+            logger.info(f"Reference cache miss for {file_path.name} ({loader.__name__}). Loading workbook.")
+            value = loader(file_path)
+            with self._lock:
+                if generation == self._generation:
+                    self._entries[key] = (signature, value)
+            return value
+
+    def invalidate(self, file_path: Optional[Path] = None):
+        """Drops the entries for one file, or every entry when no path is given."""
+        with self._lock:
+            self._generation += 1
+            if file_path is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+            else:
+                resolved = str(Path(file_path).resolve())
+                stale = [key for key in self._entries if key[0] == resolved]
+                for key in stale:
+                    del self._entries[key]
+                dropped = len(stale)
+            self.invalidations += dropped
+        logger.info(f"Reference cache invalidated {dropped} entr{'y' if dropped == 1 else 'ies'} for {file_path or 'all files'}.")
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "files": sorted({Path(path).name for path, _ in self._entries}),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+REFERENCE_DATA_CACHE = ReferenceDataCache()
+
+
+#------------- Blocking work pool ------------------#
+BLOCKING_POOL_WORKERS = max(1, int(os.getenv("BLOCKING_POOL_WORKERS", str(min(8, (os.cpu_count() or 1) + 2)))))
+BLOCKING_POOL_QUEUE_DEPTH = max(0, int(os.getenv("BLOCKING_POOL_QUEUE_DEPTH", "16")))
+BLOCKING_POOL_RETRY_AFTER_SECONDS = int(os.getenv("BLOCKING_POOL_RETRY_AFTER_SECONDS", "5"))
+# Per-endpoint caps on work admitted to the pool (running + queued). Override with
+# BLOCKING_POOL_ENDPOINT_LIMITS='{"validate-data": 4}'; endpoints not listed may use the whole pool.
+BLOCKING_POOL_ENDPOINT_LIMITS = {
+    "validate-data": 2,
+    "bulk-excel-upload": 2,
+    "transform-customer-excel": 2,
+    "convert-excel": 2,
+    "cross-file-person-validation": 2,
+    "download-bundle": 4,
+}
+BLOCKING_POOL_ENDPOINT_LIMITS.update(json.loads(os.getenv("BLOCKING_POOL_ENDPOINT_LIMITS", "{}")))
+
+
+class BlockingWorkPool:
+    """
+    Bounded thread pool for the synchronous pandas/openpyxl/requests sections of
+    the async endpoints, so a large upload no longer blocks the event loop.
+
+    Admission is checked without waiting: once the pool holds workers + queue_depth
+    jobs, or an endpoint reaches its own cap, the request is rejected with a 429
+    and a Retry-After header instead of piling up behind the running work.
+    """
+
+    def __init__(self, workers: int, queue_depth: int, endpoint_limits: Dict[str, int]):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.endpoint_limits = dict(endpoint_limits)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="blocking-work")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._active = 0
+        self._endpoints: Dict[str, Dict[str, Any]] = {}
+        self._queue_waits = deque(maxlen=1000)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _endpoint(self, endpoint: str) -> Dict[str, Any]:
+        entry = self._endpoints.get(endpoint)
+        if entry is None:
+            entry = self._endpoints[endpoint] = {
+                "in_flight": 0, "submitted": 0, "completed": 0, "failed": 0, "rejected": 0,
+                "queue_wait_total": 0.0, "queue_wait_max": 0.0, "run_total": 0.0,
+            }
+        return entry
+
+    def _admit(self, endpoint: str):
+        with self._lock:
+            entry = self._endpoint(endpoint)
+            limit = self.endpoint_limits.get(endpoint, self.workers + self.queue_depth)
+            if self._in_flight >= self.workers + self.queue_depth:
+                reason = f"Server is busy ({self._in_flight} jobs running or queued)"
+            elif entry["in_flight"] >= limit:
+                reason = f"Too many concurrent '{endpoint}' requests (limit {limit})"
+            else:
+                self._in_flight += 1
+                entry["in_flight"] += 1
+                entry["submitted"] += 1
+                self.submitted += 1
+                return
+            entry["rejected"] += 1
+            self.rejected += 1
+        logger.warning(f"Blocking pool rejected '{endpoint}': {reason}.")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"{reason}. Please retry shortly.",
+            headers={"Retry-After": str(BLOCKING_POOL_RETRY_AFTER_SECONDS)},
+        )
+
+    async def run(self, endpoint: str, func, *args, **kwargs):
+        """
+        Runs func(*args, **kwargs) on the pool and awaits its result.
+        Exceptions raised by func (including HTTPException) propagate unchanged.
+        """
+        self._admit(endpoint)
+        submitted_at = time.perf_counter()
+        outcome = {"started": None, "failed": False}
+
+        def call():
+            started = outcome["started"] = time.perf_counter()
+            with self._lock:
+                self._active += 1
+                wait = started - submitted_at
+                self._queue_waits.append(wait)
+                entry = self._endpoints[endpoint]
+                entry["queue_wait_total"] += wait
+                entry["queue_wait_max"] = max(entry["queue_wait_max"], wait)
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                outcome["failed"] = True
+                raise
+
+        def release(_future):
+            # Runs when the job finishes or is cancelled before starting, so the slot is
+            # freed even if the client disconnected while the request was awaiting it.
+            finished = time.perf_counter()
+            with self._lock:
+                entry = self._endpoints[endpoint]
+                self._in_flight -= 1
+                entry["in_flight"] -= 1
+                if outcome["started"] is None:
+                    return
+                self._active -= 1
+                entry["run_total"] += finished - outcome["started"]
+                key = "failed" if outcome["failed"] else "completed"
+                entry[key] += 1
+                setattr(self, key, getattr(self, key) + 1)
+
+        future = self._executor.submit(call)
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            waits = sorted(self._queue_waits)
+            endpoints = {}
+            for name, entry in sorted(self._endpoints.items()):
+                started = entry["completed"] + entry["failed"]
+                endpoints[name] = {
+                    "in_flight": entry["in_flight"],
+                    "limit": self.endpoint_limits.get(name, self.workers + self.queue_depth),
+                    "submitted": entry["submitted"],
+                    "completed": entry["completed"],
+                    "failed": entry["failed"],
+                    "rejected": entry["rejected"],
+                    "avg_queue_wait_seconds": round(entry["queue_wait_total"] / started, 4) if started else 0.0,
+                    "max_queue_wait_seconds": round(entry["queue_wait_max"], 4),
+                    "avg_run_seconds": round(entry["run_total"] / started, 4) if started else 0.0,
+                }
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "active": self._active,
+                "queued": self._in_flight - self._active,
+                "utilization": round(self._active / self.workers, 4),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "queue_wait_seconds": {
+                    "samples": len(waits),
+                    "avg": round(sum(waits) / len(waits), 4) if waits else 0.0,
+                    "p95": round(waits[int(0.95 * (len(waits) - 1))], 4) if waits else 0.0,
+                    "max": round(waits[-1], 4) if waits else 0.0,
+                },
+                "endpoints": endpoints,
+            }
+
+
+BLOCKING_WORK_POOL = BlockingWorkPool(BLOCKING_POOL_WORKERS, BLOCKING_POOL_QUEUE_DEPTH, BLOCKING_POOL_ENDPOINT_LIMITS)
+
+
 os.makedirs("static", exist_ok=True)
 # "/home" for the static folder index.html and all those
 app.mount("/home", StaticFiles(directory="static"), name="home")
@@ -115,17 +380,18 @@ def extract_customer_instance_names_from_env(env_path: Path):
 def read_and_normalize_excel(excel_path: Path):
     if not excel_path.exists():
         raise FileNotFoundError(f"Excel not found: {excel_path}")
-    xls = pd.ExcelFile(excel_path)
-    df = None
-    for sheet in xls.sheet_names:
-        tmp = pd.read_excel(excel_path, sheet_name=sheet, dtype=str)
-        tmp.columns = [str(c).strip() for c in tmp.columns]
-        if tmp.shape[0] > 0 and tmp.dropna(how='all').shape[0] > 0:
-            df = tmp
-            break
-    if df is None:
-        df = pd.read_excel(excel_path, dtype=str)
-        df.columns = [str(c).strip() for c in df.columns]
+    # Parse sheets from the already-open workbook instead of re-opening the file per sheet
+    with pd.ExcelFile(excel_path) as xls:
+        df = None
+        for sheet in xls.sheet_names:
+            tmp = xls.parse(sheet_name=sheet, dtype=str)
+            tmp.columns = [str(c).strip() for c in tmp.columns]
+            if tmp.shape[0] > 0 and tmp.dropna(how='all').shape[0] > 0:
+                df = tmp
+                break
+        if df is None:
+            df = xls.parse(sheet_name=0, dtype=str)
+            df.columns = [str(c).strip() for c in df.columns]
     df = df.fillna("")
     col_key_map = {}
     for col in df.columns:
@@ -133,15 +399,13 @@ def read_and_normalize_excel(excel_path: Path):
         col_key_map[key] = col
     return df, col_key_map
 
-def build_hierarchy_from_df(df: pd.DataFrame, col_map: dict, combos: list):
+def collect_hierarchy_variants(df: pd.DataFrame, col_map: dict) -> List[dict]:
     """
-    Build hierarchical tree from the cleaned dataframe + normalized col_map.
+    Collects one variant per hierarchy row that has at least one of Level-3..Level-10 set.
 
     - col_map is expected to be the normalized-key -> original-column-name map
       created by `read_and_normalize_excel`.
-    - combos is list of (customer, instance) pairs (from .env).
     """
-    import re
     # ---------- helpers ----------
     def normalize_key(s: str) -> str:
         if not s:
@@ -196,171 +460,198 @@ def build_hierarchy_from_df(df: pd.DataFrame, col_map: dict, combos: list):
                                       "Supported Action",
                                       "SupportedAction")
 
-    logging.debug("Resolved column mapping in build_hierarchy_from_df: "
+    logging.debug("Resolved column mapping in collect_hierarchy_variants: "
                   f"file={file_col}, template={template_col}, mandatory={mandatory_col}, "
                   f"required_helper={required_helper_col}, supported_helper={supported_helper_col}, "
                   f"level_cols={level_cols}")
 
+    def clean(raw) -> str:
+        return "" if pd.isna(raw) else str(raw).strip()
+
+    def column_values(colname) -> list:
+        # Missing columns behave like an all-empty column
+        return df[colname].tolist() if colname else [""] * len(df)
+
     # ---------- collect variants ----------
+    level_values = [column_values(level_cols.get(i)) for i in range(3, 11)]
+    file_values = column_values(file_col)
+    template_values = column_values(template_col)
+    mandatory_values = column_values(mandatory_col)
+    required_helper_values = column_values(required_helper_col)
+    supported_helper_values = column_values(supported_helper_col)
+
     variants = []
-    for _, row in df.iterrows():
+    for row_idx in range(len(df)):
         # Collect levels 3..10 values (use original column names if resolved)
         levels = []
-        for i in range(3, 11):
-            colname = level_cols.get(i)
-            val = ""
-            if colname:
-                # row.get works on Series; fallback to empty string
-                raw = row.get(colname, "")
-                val = "" if pd.isna(raw) else str(raw).strip()
-                if val.lower() == "nan":
-                    val = ""
+        for values in level_values:
+            val = clean(values[row_idx])
+            if val.lower() == "nan":
+                val = ""
             levels.append(val)
 
         if not any(levels):
             continue
 
-        file_val = ""
-        if file_col:
-            raw = row.get(file_col, "")
-            file_val = "" if pd.isna(raw) else str(raw).strip()
-
-        template_val = ""
-        if template_col:
-            raw = row.get(template_col, "")
-            template_val = "" if pd.isna(raw) else str(raw).strip()
-
-        mandatory_val = False
-        if mandatory_col:
-            mandatory_val = parse_mandatory(row.get(mandatory_col, ""))
-
-        required_helper_val = ""
-        if required_helper_col:
-            raw = row.get(required_helper_col, "")
-            required_helper_val = "" if pd.isna(raw) else str(raw).strip()
-
-        supported_helper_val = ""
-        if supported_helper_col:
-            raw = row.get(supported_helper_col, "")
-            supported_helper_val = "" if pd.isna(raw) else str(raw).strip()
-
         variants.append({
             "levels": levels,
-            "file": file_val,
-            "dat_template": template_val,
-            "Mandatory_Objects": mandatory_val,
-            "Required - Helper Text": required_helper_val,
-            "Supported Action - Helper Text": supported_helper_val,
+            "file": clean(file_values[row_idx]),
+            "dat_template": clean(template_values[row_idx]),
+            "Mandatory_Objects": parse_mandatory(mandatory_values[row_idx]) if mandatory_col else False,
+            "Required - Helper Text": clean(required_helper_values[row_idx]),
+            "Supported Action - Helper Text": clean(supported_helper_values[row_idx]),
         })
-
-    # ---------- tree builder with safe stamping ----------
-    folder_roots = {}
-
-    def ensure_all_fields(node: dict, extra_fields: dict, set_file_fields: bool = False):
-        """Ensure the node has the expected structural and helper keys without clobbering good data."""
-        keys = [
-            "file", "dat_template",
-            "level_1", "level_2", "level_3", "level_4",
-            "level_5", "level_6", "level_7", "level_8", "level_9", "level_10",
-            "Required - Helper Text", "Supported Action - Helper Text",
-        ]
-        for k in keys:
-            # prefer explicit values from extra_fields (only set when non-empty),
-            # but ensure the key exists on the node (default to empty string or False for Mandatory_Objects).
-            incoming = extra_fields.get(k) if extra_fields is not None else None
-
-            if k in ("file", "dat_template"):
-                if set_file_fields and incoming:
-                    node[k] = incoming
-                elif k not in node:
-                    node[k] = ""
+    return variants
+
+# ---------- tree builder with safe stamping ----------
+HIERARCHY_NODE_FIELDS = [
+    "file", "dat_template",
+    "level_1", "level_2", "level_3", "level_4",
+    "level_5", "level_6", "level_7", "level_8", "level_9", "level_10",
+    "Required - Helper Text", "Supported Action - Helper Text",
+]
+
+def _ensure_hierarchy_fields(node: dict, extra_fields: dict, set_file_fields: bool = False):
+    """Ensure the node has the expected structural and helper keys without clobbering good data."""
+    for k in HIERARCHY_NODE_FIELDS:
+        # prefer explicit values from extra_fields (only set when non-empty),
+        # but ensure the key exists on the node (default to empty string or False for Mandatory_Objects).
+        incoming = extra_fields.get(k) if extra_fields is not None else None
+
+        if k in ("file", "dat_template"):
+            if set_file_fields and incoming:
+                node[k] = incoming
+            elif k not in node:
+                node[k] = ""
+        else:
+            # text fields / levels / helper texts
+            if incoming is not None and incoming != "":
+                node[k] = incoming
             else:
-                # text fields / levels / helper texts
-                if incoming is not None and incoming != "":
-                    node[k] = incoming
-                else:
-                    # if missing, ensure key exists but do not overwrite existing non-empty values
-                    if k not in node:
-                        node[k] = ""
-        # Handle Mandatory_Objects separately
-        if "Mandatory_Objects" not in node:
-            node["Mandatory_Objects"] = False
-        return node
+                # if missing, ensure key exists but do not overwrite existing non-empty values
+                if k not in node:
+                    node[k] = ""
+    # Handle Mandatory_Objects separately
+    if "Mandatory_Objects" not in node:
+        node["Mandatory_Objects"] = False
+    return node
+
+def _get_or_create_hierarchy_node(parent_collection, node_name, is_root=False, extra_fields=None, set_file_fields=False):
+    # parent_collection is either a dict (for roots) or list (for children)
+    if is_root:
+        if node_name not in parent_collection:
+            parent_collection[node_name] = {"name": node_name, "children": []}
+        if extra_fields:
+            _ensure_hierarchy_fields(parent_collection[node_name], extra_fields, set_file_fields)
+        return parent_collection[node_name]
+    else:
+        for child in parent_collection:
+            if child.get("name") == node_name:
+                if extra_fields:
+                    _ensure_hierarchy_fields(child, extra_fields, set_file_fields)
+                return child
+        new_node = {"name": node_name, "children": []}
+        if extra_fields:
+            _ensure_hierarchy_fields(new_node, extra_fields, set_file_fields)
+        parent_collection.append(new_node)
+        return new_node
+
+def _hierarchy_extra_fields(cust: str, inst: str, v: dict) -> dict:
+    return {
+        "file": v["file"],
+        "dat_template": v["dat_template"],
+        "level_1": cust,
+        "level_2": inst,
+        "level_3": v["levels"][0],
+        "level_4": v["levels"][1],
+        "level_5": v["levels"][2],
+        "level_6": v["levels"][3],
+        "level_7": v["levels"][4],
+        "level_8": v["levels"][5],
+        "level_9": v["levels"][6],
+        "level_10": v["levels"][7],
+        "Required - Helper Text": v["Required - Helper Text"],
+        "Supported Action - Helper Text": v["Supported Action - Helper Text"],
+        # We will handle Mandatory_Objects separately at the leaf
+    }
 
-    def get_or_create_node(parent_collection, node_name, is_root=False, extra_fields=None, set_file_fields=False):
-        # parent_collection is either a dict (for roots) or list (for children)
-        if is_root:
-            if node_name not in parent_collection:
-                parent_collection[node_name] = {"name": node_name, "children": []}
-            if extra_fields:
-                ensure_all_fields(parent_collection[node_name], extra_fields, set_file_fields)
-            return parent_collection[node_name]
-        else:
-            for child in parent_collection:
-                if child.get("name") == node_name:
-                    if extra_fields:
-                        ensure_all_fields(child, extra_fields, set_file_fields)
-                    return child
-            new_node = {"name": node_name, "children": []}
-            if extra_fields:
-                ensure_all_fields(new_node, extra_fields, set_file_fields)
-            parent_collection.append(new_node)
-            return new_node
-
-    # ---------- assemble tree ----------
-    for cust, inst in combos:
-        for v in variants:
-            try:
-                last_nonempty_idx = max(idx for idx, nm in enumerate(v["levels"]) if nm)
-            except ValueError:
-                continue
+def apply_hierarchy_variants(inst_node: Optional[dict], cust: str, inst: str, variants: List[dict], parent_children: Optional[list] = None) -> Optional[dict]:
+    """
+    Stamps variants onto the subtree of one customer/instance pair, creating the instance
+    node on the first variant. Returns the instance node (None if there were no variants).
+    """
+    for v in variants:
+        try:
+            last_nonempty_idx = max(idx for idx, nm in enumerate(v["levels"]) if nm)
+        except ValueError:
+            continue
 
-            extra = {
-                "file": v["file"],
-                "dat_template": v["dat_template"],
-                "level_1": cust,
-                "level_2": inst,
-                "level_3": v["levels"][0],
-                "level_4": v["levels"][1],
-                "level_5": v["levels"][2],
-                "level_6": v["levels"][3],
-                "level_7": v["levels"][4],
-                "level_8": v["levels"][5],
-                "level_9": v["levels"][6],
-                "level_10": v["levels"][7],
-                "Required - Helper Text": v["Required - Helper Text"],
-                "Supported Action - Helper Text": v["Supported Action - Helper Text"],
-                # We will handle Mandatory_Objects separately at the leaf
-            }
+        extra = _hierarchy_extra_fields(cust, inst, v)
+        if inst_node is None:
+            inst_node = _get_or_create_hierarchy_node(parent_children if parent_children is not None else [], inst, extra_fields=extra)
+        else:
+            _ensure_hierarchy_fields(inst_node, extra)
+        current = inst_node
 
-            root = get_or_create_node(folder_roots, cust, is_root=True, extra_fields=extra)
-            inst_node = get_or_create_node(root["children"], inst, extra_fields=extra)
-            current = inst_node
+        for i, name in enumerate(v["levels"]):
+            if not name:
+                continue
+            is_leaf = (i == last_nonempty_idx)
+            current = _get_or_create_hierarchy_node(
+                current["children"], name,
+                extra_fields=extra,
+                set_file_fields=is_leaf
+            )
+            if is_leaf:
+                # Explicitly set Mandatory_Objects only on the leaf node
+                if "Mandatory_Objects" in v:
+                    current["Mandatory_Objects"] = bool(v["Mandatory_Objects"])
+                # Helper texts: only set if non-empty (do not overwrite existing helper text with empty)
+                req_ht = v.get("Required - Helper Text", "")
+                if req_ht:
+                    current["Required - Helper Text"] = req_ht
+                sup_ht = v.get("Supported Action - Helper Text", "")
+                if sup_ht:
+                    current["Supported Action - Helper Text"] = sup_ht
+    return inst_node
+
+def assemble_hierarchy(variants: List[dict], combos: list, instance_subtree=None) -> list:
+    """
+    Assembles the customer -> instance -> Level-3..Level-10 tree for every combo.
 
-            for i, name in enumerate(v["levels"]):
-                if not name:
-                    continue
-                is_leaf = (i == last_nonempty_idx)
-                current = get_or_create_node(
-                    current["children"], name,
-                    extra_fields=extra,
-                    set_file_fields=is_leaf
-                )
-                if is_leaf:
-                    # Explicitly set Mandatory_Objects only on the leaf node
-                    if "Mandatory_Objects" in v:
-                        current["Mandatory_Objects"] = bool(v["Mandatory_Objects"])
-                    # Helper texts: only set if non-empty (do not overwrite existing helper text with empty)
-                    req_ht = v.get("Required - Helper Text", "")
-                    if req_ht:
-                        current["Required - Helper Text"] = req_ht
-                    sup_ht = v.get("Supported Action - Helper Text", "")
-                    if sup_ht:
-                        current["Supported Action - Helper Text"] = sup_ht
+    Instance subtrees only depend on their own customer/instance pair, so callers may pass
+    instance_subtree(cust, inst) to supply a prebuilt instance node; the customer root is
+    always stamped here exactly as the row-by-row build would.
+    """
+    folder_roots = {}
+    if not variants:
+        return []
+
+    # A repeated pair maps onto the same instance node, so it is expanded once
+    for cust, inst in dict.fromkeys(combos):
+        extras = [_hierarchy_extra_fields(cust, inst, v) for v in variants]
+        root = _get_or_create_hierarchy_node(folder_roots, cust, is_root=True, extra_fields=extras[0])
+        for extra in extras[1:]:
+            _ensure_hierarchy_fields(root, extra)
+
+        if instance_subtree is not None:
+            root["children"].append(instance_subtree(cust, inst))
+        else:
+            apply_hierarchy_variants(None, cust, inst, variants, parent_children=root["children"])
 
     # Return list of root nodes (preserves the structure expected by frontend)
     return list(folder_roots.values())
 
+def build_hierarchy_from_df(df: pd.DataFrame, col_map: dict, combos: list):
+    """
+    Build hierarchical tree from the cleaned dataframe + normalized col_map.
+
+    - col_map is expected to be the normalized-key -> original-column-name map
+      created by `read_and_normalize_excel`.
+    - combos is list of (customer, instance) pairs (from .env).
+    """
+    return assemble_hierarchy(collect_hierarchy_variants(df, col_map), combos)
+
 @app.get("/")
 def root():
     """
@@ -427,30 +718,127 @@ async def login_access(user_login: UserLogin):
         )
 
 ENV_PATH = Path(".env")
-@app.get("/api/utils/menu-items")
-def get_hierarchy_api():
+
+
+def load_hierarchy_variants(file_path: Path) -> List[dict]:
+    """Reads the hierarchy workbook and returns its variants (see collect_hierarchy_variants)."""
+    df_cleaned, col_map = read_and_normalize_excel(file_path)
+    return collect_hierarchy_variants(df_cleaned, col_map)
+
+
+class MenuItemsCache:
+    """
+    Memoized /api/utils/menu-items response.
+
+    The rendered body and its ETag are kept for the current (variants, combos) pair.
+    Instance subtrees are kept per customer/instance together with the variants they
+    were built from; when the workbook only gained rows at the end (as POST /api/customers
+    does) an existing subtree is extended with the new rows, and only pairs that were
+    never built get a full build.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._variants: Optional[List[dict]] = None
+        self._combos: Optional[List[Tuple[str, str]]] = None
+        self._etag: Optional[str] = None
+        self._body: Optional[bytes] = None
+        self._subtrees: Dict[Tuple[str, str], Tuple[List[dict], dict]] = {}
+        self.builds = 0
+        self.subtree_builds = 0
+        self.subtree_extends = 0
+
+    def _instance_subtree(self, variants: List[dict], cust: str, inst: str) -> dict:
+        cached = self._subtrees.get((cust, inst))
+        if cached is not None:
+            built_from, node = cached
+            if built_from is variants:
+                return node
+            if len(built_from) <= len(variants) and variants[:len(built_from)] == built_from:
+                node = copy.deepcopy(node)
+                apply_hierarchy_variants(node, cust, inst, variants[len(built_from):])
+                self._subtrees[(cust, inst)] = (variants, node)
+                self.subtree_extends += 1
+                return node
+
+        node = apply_hierarchy_variants(None, cust, inst, variants)
+        self._subtrees[(cust, inst)] = (variants, node)
+        self.subtree_builds += 1
+        return node
+
+    def get(self, variants: List[dict], combos: List[Tuple[str, str]]) -> Tuple[str, bytes]:
+        """Returns (etag, rendered JSON body) for the hierarchy, rebuilding only what changed."""
+        with self._lock:
+            if self._body is not None and self._variants is variants and self._combos == combos:
+                return self._etag, self._body
+
+            started = time.perf_counter()
+            hierarchy_data = assemble_hierarchy(
+                variants, combos,
+                instance_subtree=lambda cust, inst: self._instance_subtree(variants, cust, inst)
+            )
+            # Drop subtrees of pairs that are no longer configured
+            for pair in [pair for pair in self._subtrees if pair not in set(combos)]:
+                del self._subtrees[pair]
+
+            self._body = JSONResponse(content={"hierarchy": hierarchy_data}).body
+            self._etag = f'"{hashlib.sha256(self._body).hexdigest()}"'
+            self._variants = variants
+            self._combos = list(combos)
+            self.builds += 1
+            logger.info(f"Built menu-items hierarchy for {len(combos)} customer/instance pairs in {time.perf_counter() - started:.3f}s")
+            return self._etag, self._body
+
+    def invalidate(self):
+        with self._lock:
+            self._variants = None
+            self._combos = None
+            self._etag = None
+            self._body = None
+            self._subtrees.clear()
+
+
+MENU_ITEMS_CACHE = MenuItemsCache()
+
+
+def get_menu_items_response() -> Tuple[str, bytes]:
+    """Loads the cached variants and .env combos and returns the hierarchy's (etag, body)."""
     # Validate Excel path
     if not EXCEL_FILE_PATH.exists():
         raise HTTPException(status_code=500, detail=f"Excel file not found at {EXCEL_FILE_PATH}")
 
     try:
-        # Read Excel and get cleaned DataFrame + column key map
-        df_cleaned, col_map = read_and_normalize_excel(EXCEL_FILE_PATH)
+        # Variants are re-read only when the workbook changes
+        variants = REFERENCE_DATA_CACHE.get(EXCEL_FILE_PATH, load_hierarchy_variants)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read Excel file: {str(e)}")
 
     # Extract customer-instance combos from .env
-    combos = extract_customer_instance_names_from_env(ENV_PATH)
+    combos = REFERENCE_DATA_CACHE.get(ENV_PATH, extract_customer_instance_names_from_env) if ENV_PATH.exists() else []
     if not combos:
         raise HTTPException(status_code=500, detail="No customer-instance combos found in .env")
 
     # Build hierarchy
     try:
-        hierarchy_data = build_hierarchy_from_df(df_cleaned, col_map, combos)
+        return MENU_ITEMS_CACHE.get(variants, combos)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to build hierarchy: {str(e)}")
 
-    return {"hierarchy": hierarchy_data}
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+@app.get("/api/utils/menu-items")
+def get_hierarchy_api(request: Request):
+    etag, body = get_menu_items_response()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 def get_columns_from_dat(file_bytes: bytes) -> Tuple[List[str], List[str], List[str]]:
     try:
         content = file_bytes.decode("utf-8-sig").splitlines()
@@ -598,6 +986,31 @@ async def save_hdl_component(component: str, request: Request):
         raise HTTPException(status_code=500, detail=f"Error saving component: {str(e)}")
 
 
+def load_key_values_frame(file_path: Path) -> pd.DataFrame:
+    """
+    Reads Key Values Mapping.xlsx into a normalized DataFrame (renamed headers,
+    stripped values and a lowercased PARENT_BO_KEY column for component matching).
+    """
+    df = pd.read_excel(file_path)
+
+    # Normalize headers
+    df.columns = df.columns.str.strip()
+    column_map = {
+        "BO HDL File Name": "GLOBAL_BO",
+        "Component Name": "PARENT_BO",
+        "HDL Attribute Name": "HDL_ATTRIBUTE_NAME",
+        "Key_Values": "KEY_VALUES"
+    }
+    df = df.rename(columns={k: v for k, v in column_map.items() if k in df.columns})
+
+    # Normalize columns
+    for col in ["GLOBAL_BO", "PARENT_BO", "HDL_ATTRIBUTE_NAME", "KEY_VALUES"]:
+        if col in df.columns:
+            df[col] = df[col].fillna("").astype(str).str.strip()
+    df["PARENT_BO_KEY"] = df["PARENT_BO"].str.lower()
+    return df
+
+
 def fetch_key_values(bo: str, attributes: list):
     """
     Fetches key values (Yes/No as boolean) for given component (bo) and attributes
@@ -610,26 +1023,11 @@ def fetch_key_values(bo: str, attributes: list):
             logger.error(f"{file_path.name} not found in Required_files directory.")
             return {}
 
-        df = pd.read_excel(file_path)
-
-        # Normalize headers
-        df.columns = df.columns.str.strip()
-        column_map = {
-            "BO HDL File Name": "GLOBAL_BO",
-            "Component Name": "PARENT_BO",
-            "HDL Attribute Name": "HDL_ATTRIBUTE_NAME",
-            "Key_Values": "KEY_VALUES"
-        }
-        df = df.rename(columns={k: v for k, v in column_map.items() if k in df.columns})
-
-        # Normalize columns
-        for col in ["GLOBAL_BO", "PARENT_BO", "HDL_ATTRIBUTE_NAME", "KEY_VALUES"]:
-            if col in df.columns:
-                df[col] = df[col].fillna("").astype(str).str.strip()
+        df = REFERENCE_DATA_CACHE.get(file_path, load_key_values_frame)
 
         # Filter for this BO + attributes
         filtered = df[
-            (df["PARENT_BO"].str.lower() == bo.lower()) &
+            (df["PARENT_BO_KEY"] == bo.lower()) &
             (df["HDL_ATTRIBUTE_NAME"].isin(attributes))
         ]
 
@@ -649,6 +1047,42 @@ def fetch_key_values(bo: str, attributes: list):
         return {}
 
 
+def load_mandatory_fields_frame(file_path: Path) -> pd.DataFrame:
+    """
+    Reads a {customer}_{instance}_MandatoryFields.xlsx workbook into a normalized
+    DataFrame with the columns used by /api/hdl/mandatory/batch.
+    """
+    mandate = pd.read_excel(file_path)
+    mandate.columns = mandate.columns.str.strip()
+    column_map = {
+        "BO HDL File Name": "GLOBAL_BO",
+        "Component Name": "PARENT_BO",
+        "HDL Attribute Name": "HDL_ATTRIBUTE_NAME",
+        "Required": "REQUIRED",
+        "Helper_Text": "HELPER_TEXT",
+        "Data Type": "DATA_TYPE"
+    }
+    mandate = mandate.rename(columns={k: v for k, v in column_map.items() if k in mandate.columns})
+    for col in ["GLOBAL_BO", "PARENT_BO", "HDL_ATTRIBUTE_NAME"]:
+        if col in mandate.columns:
+            mandate[col] = mandate[col].fillna("").astype(str).str.strip()
+    if "HELPER_TEXT" in mandate.columns:
+        mandate["HELPER_TEXT"] = mandate["HELPER_TEXT"].fillna("").astype(str).str.strip()
+    else:
+        mandate["HELPER_TEXT"] = ""
+
+    if "DATA_TYPE" in mandate.columns:
+        mandate["DATA_TYPE"] = mandate["DATA_TYPE"].fillna("").astype(str).str.strip()
+    else:
+        mandate["DATA_TYPE"] = ""
+    if "REQUIRED" in mandate.columns:
+        mandate["REQUIRED"] = mandate["REQUIRED"].fillna("").astype(str).str.strip()
+    else:
+        mandate["REQUIRED"] = "No"
+    mandate["PARENT_BO_KEY"] = mandate["PARENT_BO"].str.lower()
+    return mandate
+
+
 @app.post("/api/hdl/mandatory/batch")
 def get_required_batch(
     bo: str = Body(..., alias="componentName"),
@@ -675,36 +1109,10 @@ def get_required_batch(
                 content={"error": f"{file_path.name} not found."}
             )
 
-        mandate = pd.read_excel(file_path)
-        mandate.columns = mandate.columns.str.strip()
-        column_map = {
-            "BO HDL File Name": "GLOBAL_BO",
-            "Component Name": "PARENT_BO",
-            "HDL Attribute Name": "HDL_ATTRIBUTE_NAME",
-            "Required": "REQUIRED",
-            "Helper_Text": "HELPER_TEXT",
-            "Data Type": "DATA_TYPE"
-        }
-        mandate = mandate.rename(columns={k: v for k, v in column_map.items() if k in mandate.columns})
-        for col in ["GLOBAL_BO", "PARENT_BO", "HDL_ATTRIBUTE_NAME"]:
-            if col in mandate.columns:
-                mandate[col] = mandate[col].fillna("").astype(str).str.strip()
-        if "HELPER_TEXT" in mandate.columns:
-            mandate["HELPER_TEXT"] = mandate["HELPER_TEXT"].fillna("").astype(str).str.strip()
-        else:
-            mandate["HELPER_TEXT"] = ""
-
-        if "DATA_TYPE" in mandate.columns:
-            mandate["DATA_TYPE"] = mandate["DATA_TYPE"].fillna("").astype(str).str.strip()
-        else:
-            mandate["DATA_TYPE"] = ""
-        if "REQUIRED" in mandate.columns:
-            mandate["REQUIRED"] = mandate["REQUIRED"].fillna("").astype(str).str.strip()
-        else:
-            mandate["REQUIRED"] = "No"
+        mandate = REFERENCE_DATA_CACHE.get(file_path, load_mandatory_fields_frame)
         # Filter rows
         filtered = mandate[
-            (mandate["PARENT_BO"].str.lower() == bo.lower()) &
+            (mandate["PARENT_BO_KEY"] == bo.lower()) &
             (mandate["HDL_ATTRIBUTE_NAME"].isin(attributes))
         ]
 
@@ -731,6 +1139,234 @@ def get_required_batch(
             content={"error": f"Mandatory fetch failed: {str(e)}"}
         )
 
+def load_lookup_frame(file_path: Path) -> pd.DataFrame:
+    """
+    Reads a {customer}_{instance}_LookupData.xlsx workbook with the BO_NAME, COMP_NAME,
+    HDL_Attribute_Name and CODE_Name columns stripped and lowercased for comparison.
+    """
+    lookup_df = pd.read_excel(file_path)
+
+    # Normalize relevant columns for comparison
+    for col in ["BO_NAME", "COMP_NAME", "HDL_Attribute_Name", "CODE_Name"]:
+        if col in lookup_df.columns:
+            # Explicitly fill NaN with empty string before other string operations
+            lookup_df[col] = lookup_df[col].fillna('').astype(str).str.strip().str.lower()
+        else:
+            # Ensure the column exists, even if empty, to prevent KeyError
+            lookup_df[col] = "" # Initialize with empty string for consistent comparison
+    return lookup_df
+
+
+LOOKUP_RECORD_COLUMNS = ["CODE_Name", "Value", "Meaning", "Enabled_Flag", "Effective_Date"]
+
+
+class LookupIndex:
+    """
+    Hash index over a normalized LookupData frame for /api/hdl/lookup/batch.
+
+    Row positions are grouped under every key shape the tiered filter uses
+    ((bo, comp, attr), (comp, attr), (bo, attr) and attr alone), plus the
+    transaction-only partition where BO_NAME and COMP_NAME are empty. Response
+    records are serialized once at build time. Each row also carries a key of
+    its full contents so the transaction merge can drop duplicates exactly as
+    pd.concat(...).drop_duplicates() did.
+    """
+
+    def __init__(self, lookup_df: pd.DataFrame):
+        self.row_count = len(lookup_df)
+        self.records = lookup_df[LOOKUP_RECORD_COLUMNS].fillna("").to_dict(orient="records")
+
+        # drop_duplicates compares whole rows with NaN == NaN; factorize per column gives the same equality
+        column_codes = [pd.factorize(lookup_df[col])[0] for col in lookup_df.columns]
+        self.row_keys = list(zip(*column_codes)) if column_codes else [()] * self.row_count
+
+        self.by_bo_comp_attr: Dict[Tuple[str, str, str], List[int]] = defaultdict(list)
+        self.by_comp_attr: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        self.by_bo_attr: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        self.by_attr: Dict[str, List[int]] = defaultdict(list)
+        self.transaction_by_attr: Dict[str, List[int]] = defaultdict(list)
+
+        columns = zip(lookup_df["BO_NAME"], lookup_df["COMP_NAME"], lookup_df["HDL_Attribute_Name"])
+        for position, (bo_name, comp_name, attr) in enumerate(columns):
+            self.by_bo_comp_attr[(bo_name, comp_name, attr)].append(position)
+            self.by_comp_attr[(comp_name, attr)].append(position)
+            self.by_bo_attr[(bo_name, attr)].append(position)
+            self.by_attr[attr].append(position)
+            if bo_name == "" and comp_name == "":
+                self.transaction_by_attr[attr].append(position)
+
+    def _tier_positions(self, bo_name: str, comp_name: str, attr: str) -> List[int]:
+        if bo_name and comp_name:
+            return self.by_bo_comp_attr.get((bo_name, comp_name, attr), [])
+        if comp_name:
+            return self.by_comp_attr.get((comp_name, attr), [])
+        if bo_name:
+            return self.by_bo_attr.get((bo_name, attr), [])
+        return self.by_attr.get(attr, [])
+
+    def lookup(self, bo_name: str, comp_name: str, normalized_attrs: List[str], transaction: bool) -> Dict[str, List[dict]]:
+        """
+        Returns {normalized attribute: [records]} for the attributes that have rows,
+        matching the tiered filter and transaction merge of the DataFrame implementation.
+        """
+        unique_attrs = list(dict.fromkeys(normalized_attrs))
+        positions_by_attr = {attr: self._tier_positions(bo_name, comp_name, attr) for attr in unique_attrs}
+
+        if transaction:
+            transaction_positions = {attr: self.transaction_by_attr.get(attr, []) for attr in unique_attrs}
+            # The merge (and its de-duplication) only happened when the transaction partition had rows
+            if any(transaction_positions.values()):
+                for attr in unique_attrs:
+                    seen = set()
+                    merged = []
+                    for position in positions_by_attr[attr] + transaction_positions[attr]:
+                        row_key = self.row_keys[position]
+                        if row_key not in seen:
+                            seen.add(row_key)
+                            merged.append(position)
+                    positions_by_attr[attr] = merged
+
+        return {
+            attr: [self.records[position] for position in positions]
+            for attr, positions in positions_by_attr.items()
+            if positions
+        }
+
+
+def load_lookup_index(file_path: Path) -> LookupIndex:
+    """Builds the LookupIndex for a LookupData workbook from its cached normalized frame."""
+    lookup_df = REFERENCE_DATA_CACHE.get(file_path, load_lookup_frame)
+    started = time.perf_counter()
+    lookup_index = LookupIndex(lookup_df)
+    logger.info(f"Built lookup index for {Path(file_path).name}: {lookup_index.row_count} rows in {time.perf_counter() - started:.2f}s")
+    return lookup_index
+
+
+def lookup_data_path(customer_name: Optional[str], instance_name: Optional[str]) -> Path:
+    return Path(__file__).parent / "Required_files" / f"{customer_name}_{instance_name}_LookupData.xlsx"
+
+
+class LookupValueSets:
+    """
+    Lookup sets for validate-data's lookupRefs, resolved with the tiered filter of
+    /api/hdl/lookup/batch (LookupIndex): a set holds the normalized values (stripped,
+    lowercased, empties dropped) of the rows batch would return for the attribute under
+    the same component, global BO and transaction flag, optionally narrowed to one
+    CODE_Name. Each resolved set is built once and kept with the workbook's version hash,
+    so clients can tell when their references are stale.
+    """
+
+    def __init__(self, lookup_index: LookupIndex, version: str):
+        self.version = version
+        self.index = lookup_index
+        self.values = [str(record["Value"]).strip().lower() for record in lookup_index.records]
+        self.code_names = [record["CODE_Name"] for record in lookup_index.records]
+        self._sets: Dict[Tuple[str, str, str, Optional[str], bool], Optional[frozenset]] = {}
+
+    def _positions(self, bo_name: str, comp_name: str, attr: str, transaction: bool) -> List[int]:
+        positions = self.index._tier_positions(bo_name, comp_name, attr)
+        if transaction:
+            positions = positions + self.index.transaction_by_attr.get(attr, [])
+        return positions
+
+    def get(self, attribute: str, code_name: Optional[str] = None, component_name: Optional[str] = None,
+            global_bo_name: Optional[str] = None, transaction: bool = False) -> Optional[frozenset]:
+        """The set for attribute (and code_name when given), or None when batch would return no rows for it."""
+        attr = attribute.strip().lower()
+        code_name = code_name.strip().lower() if code_name else None
+        bo_name = global_bo_name.strip().lower() if global_bo_name else ""
+        comp_name = component_name.strip().lower() if component_name else ""
+        key = (bo_name, comp_name, attr, code_name, transaction)
+        if key not in self._sets:
+            positions = [
+                position for position in self._positions(bo_name, comp_name, attr, transaction)
+                if code_name is None or self.code_names[position] == code_name
+            ]
+            self._sets[key] = frozenset(self.values[position] for position in positions if self.values[position]) if positions else None
+        return self._sets[key]
+
+    def sizes(self, component_name: Optional[str] = None, global_bo_name: Optional[str] = None, transaction: bool = False) -> Dict[Tuple[str, str], int]:
+        """Number of values per (attribute, CODE_Name) set within one component / global BO scope."""
+        bo_name = global_bo_name.strip().lower() if global_bo_name else ""
+        comp_name = component_name.strip().lower() if component_name else ""
+        grouped: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+        for attr in self.index.by_attr:
+            for position in self._positions(bo_name, comp_name, attr, transaction):
+                entry = grouped[(attr, self.code_names[position])]
+                if self.values[position]:
+                    entry.add(self.values[position])
+        return {key: len(values) for key, values in grouped.items()}
+
+
+def load_lookup_value_sets(file_path: Path) -> LookupValueSets:
+    """Builds the LookupValueSets for a LookupData workbook on top of its cached LookupIndex."""
+    lookup_index = REFERENCE_DATA_CACHE.get(file_path, load_lookup_index)
+    version = hashlib.sha256(Path(file_path).read_bytes()).hexdigest()[:16]
+    return LookupValueSets(lookup_index, version)
+
+
+def resolve_lookup_refs(lookup_refs: Dict[str, "LookupSetRef"], customer_name: Optional[str], instance_name: Optional[str],
+                        component_name: Optional[str] = None, global_bo_name: Optional[str] = None) -> Dict[str, frozenset]:
+    """
+    Maps each column of a validate-data lookupRefs payload to its server-side value set,
+    scoped like the /api/hdl/lookup/batch list it replaces (the payload's componentName and
+    globalBoName unless the reference names its own).
+    Raises 404 for a missing LookupData workbook, 409 when a reference carries a version
+    that no longer matches the workbook, and 400 for sets that do not exist.
+    """
+    resolved = {}
+    unknown = []
+    for column, ref in lookup_refs.items():
+        file_path = lookup_data_path(ref.customerName or customer_name, ref.instanceName or instance_name)
+        try:
+            value_sets = REFERENCE_DATA_CACHE.get(file_path, load_lookup_value_sets)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail=f"{file_path.name} not found.")
+        if ref.version and ref.version != value_sets.version:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Lookup data in {file_path.name} has changed (version {value_sets.version}, payload references {ref.version}). Please refetch the lookups."
+            )
+        scope_component = ref.componentName or component_name
+        scope_global_bo = ref.globalBoName or global_bo_name
+        values = value_sets.get(ref.attribute, ref.codeName, scope_component, scope_global_bo, ref.transaction)
+        if values is None:
+            unknown.append(f"{column} -> {ref.attribute}/{ref.codeName or '*'} in {scope_global_bo or '*'}/{scope_component or '*'}")
+        else:
+            resolved[column] = values
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown lookup set(s): {', '.join(unknown)}")
+    return resolved
+
+
+@app.get("/api/hdl/lookup/sets")
+def list_lookup_sets(
+    customerName: str = Query(...),
+    instanceName: str = Query(...),
+    componentName: Optional[str] = Query(None),
+    globalBoName: Optional[str] = Query(None),
+    transaction: bool = Query(False),
+):
+    """
+    Lists the lookup sets validate-data can reference through lookupRefs for one customer/instance,
+    with the current version hash and the number of values in each set. componentName,
+    globalBoName and transaction scope the sets the way /api/hdl/lookup/batch does; without
+    them every row of an attribute counts.
+    """
+    file_path = lookup_data_path(customerName, instanceName)
+    try:
+        value_sets = REFERENCE_DATA_CACHE.get(file_path, load_lookup_value_sets)
+    except FileNotFoundError:
+        return JSONResponse(status_code=404, content={"error": f"{file_path.name} not found."})
+    return {
+        "version": value_sets.version,
+        "sets": [
+            {"attribute": attr, "codeName": code_name, "size": size}
+            for (attr, code_name), size in sorted(value_sets.sizes(componentName, globalBoName, transaction).items())
+        ],
+    }
+
+
 @app.post("/api/hdl/lookup/batch")
 def robust_lookup(
     bo: str = Body(..., alias="componentName"),
@@ -747,74 +1383,26 @@ def robust_lookup(
     """
     try:
         
-        # Changed to read Excel since the provided file is an Excel sheet
-        lookup_df = pd.read_excel(Path(__file__).parent/ "Required_files"/f"{customerName}_{instanceName}_LookupData.xlsx")
+        # Index is built once per workbook and rebuilt only when the file changes
+        lookup_file = lookup_data_path(customerName, instanceName)
+        lookup_index = REFERENCE_DATA_CACHE.get(lookup_file, load_lookup_index)
 
         logger.info(f"Lookup fetching started with global_bo='{global_bo}', bo='{bo}', attributes={attributes}, transaction={transaction}")
 
-        # Normalize relevant columns for comparison
-        for col in ["BO_NAME", "COMP_NAME", "HDL_Attribute_Name", "CODE_Name"]:
-            if col in lookup_df.columns:
-                # Explicitly fill NaN with empty string before other string operations
-                lookup_df[col] = lookup_df[col].fillna('').astype(str).str.strip().str.lower()
-            else:
-                # Ensure the column exists, even if empty, to prevent KeyError
-                lookup_df[col] = "" # Initialize with empty string for consistent comparison
-
         bo_name = global_bo.strip().lower() if global_bo else ""
         comp_name = bo.strip().lower() if bo else ""
         normalized_attrs = [attr.strip().lower() for attr in attributes]
 
-        # --- Initial Filtering Logic ---
-        # Strictest: all three columns
-        if bo_name and comp_name:
-            filtered_df = lookup_df[
-                (lookup_df["BO_NAME"] == bo_name) &
-                (lookup_df["COMP_NAME"] == comp_name) &
-                (lookup_df["HDL_Attribute_Name"].isin(normalized_attrs))
-            ]
-        # Fallback: COMP_NAME + HDL_Attribute_Name
-        elif comp_name:
-            filtered_df = lookup_df[
-                (lookup_df["COMP_NAME"] == comp_name) &
-                (lookup_df["HDL_Attribute_Name"].isin(normalized_attrs))
-            ]
-        # Fallback: BO_NAME + HDL_Attribute_Name
-        elif bo_name:
-            filtered_df = lookup_df[
-                (lookup_df["BO_NAME"] == bo_name) &
-                (lookup_df["HDL_Attribute_Name"].isin(normalized_attrs))
-            ]
-        # Fallback: only HDL_Attribute_Name (when no BO or COMP name is provided)
-        else:
-            filtered_df = lookup_df[
-                lookup_df["HDL_Attribute_Name"].isin(normalized_attrs)
-            ]
-        
         # --- Transaction Logic ---
         # Ensure transaction is a boolean
         if not isinstance(transaction, bool):
             raise ValueError("Transaction parameter must be a boolean value.")
 
-        # If transaction is True, always append results where BO_NAME and COMP_NAME are empty
-        if transaction:
-            # Filter for transaction-specific lookups (where BO_NAME and COMP_NAME are empty)
-            transaction_df = lookup_df[
-                (lookup_df["HDL_Attribute_Name"].isin(normalized_attrs)) &
-                (lookup_df["BO_NAME"] == "") &
-                (lookup_df["COMP_NAME"] == "")
-            ]
-            logger.debug(f"Transaction DF before concat for attributes {normalized_attrs}: \n{transaction_df}") # Debug log
-            
-            # Concatenate only if transaction_df is not empty to avoid unnecessary operations
-            if not transaction_df.empty:
-                # Use pd.concat to combine the dataframes and drop duplicates
-                # This ensures that if a row from transaction_df is already in filtered_df, it's not duplicated.
-                filtered_df = pd.concat([filtered_df, transaction_df]).drop_duplicates().reset_index(drop=True)
-        
-        logger.debug(f"Final filtered DF before processing: \n{filtered_df}") # Debug log
+        # Per-attribute records from the strictest tier the parameters allow,
+        # plus the transaction-only (empty BO_NAME/COMP_NAME) rows when requested
+        records_by_attr = lookup_index.lookup(bo_name, comp_name, normalized_attrs, transaction)
 
-        if filtered_df.empty:
+        if not records_by_attr:
             logger.info("No lookups found for the given criteria.")
             return {"lookups": {}, "default_code_names": {}}
 
@@ -824,12 +1412,7 @@ def robust_lookup(
         norm_to_orig = {attr.strip().lower(): attr for attr in attributes}
 
         for norm_attr in normalized_attrs:
-            # Filter for rows corresponding to the current normalized attribute
-            attr_rows = filtered_df[filtered_df["HDL_Attribute_Name"] == norm_attr]
-            
-            # Convert relevant columns to a list of dictionaries, filling NaN with empty string
-            lookup_list = attr_rows[["CODE_Name", "Value", "Meaning", "Enabled_Flag", "Effective_Date"]].fillna("").to_dict(orient="records")
-            
+            lookup_list = records_by_attr.get(norm_attr)
             if lookup_list:
                 # Use the original attribute name for the key in the response
                 lookups[norm_to_orig[norm_attr]] = lookup_list
@@ -837,7 +1420,9 @@ def robust_lookup(
                 default_code_names[norm_to_orig[norm_attr]] = lookup_list[0]["CODE_Name"]
 
         logger.info("Lookup fetching completed successfully.")
-        return {"lookups": lookups, "default_code_names": default_code_names}
+        # Clients can send (attribute, version) and the same scope as validate-data lookupRefs instead of the lists
+        version = REFERENCE_DATA_CACHE.get(lookup_file, load_lookup_value_sets).version
+        return {"lookups": lookups, "default_code_names": default_code_names, "version": version}
 
     except FileNotFoundError:
         logger.error(f"{customerName}_{instanceName}_LookupData.xlsx not found. Please ensure it's in the 'Required_files' directory.", exc_info=True)
@@ -968,6 +1553,18 @@ async def apply_transformation_and_download(
         raise HTTPException(status_code=500, detail=f"An unexpected server error occurred: {e}. Please try again or contact support.")
 
 
+def load_transformation_rules_frame(file_path: Path) -> pd.DataFrame:
+    """
+    Reads the 'Transformation - Common Attributes' workbook with clean column names
+    and a stripped, lowercased ATTRIBUTE_KEY column for attribute matching.
+    """
+    df = pd.read_excel(file_path, engine="openpyxl")
+    df.columns = [col.strip() for col in df.columns] # Clean column names
+    if 'Attributes for Transformation' in df.columns:
+        df["ATTRIBUTE_KEY"] = df['Attributes for Transformation'].astype(str).str.strip().str.lower()
+    return df
+
+
 @app.get("/api/transform/get-mapping")
 async def get_attribute_mapping(attribute: str = Query(..., description="The attribute for which to retrieve the mapping.")):
     """
@@ -982,8 +1579,7 @@ async def get_attribute_mapping(attribute: str = Query(..., description="The att
             logging.error(f"Transformation mapping file not found at {TRANSFORMATION_ATTRIBUTES_FILE_PATH}")
             raise HTTPException(status_code=500, detail=f"Transformation mapping file not found at {TRANSFORMATION_ATTRIBUTES_FILE_PATH}")
 
-        df = pd.read_excel(TRANSFORMATION_ATTRIBUTES_FILE_PATH, engine="openpyxl")
-        df.columns = [col.strip() for col in df.columns] # Clean column names
+        df = REFERENCE_DATA_CACHE.get(TRANSFORMATION_ATTRIBUTES_FILE_PATH, load_transformation_rules_frame)
 
         # Expected columns for filtering and output
         filter_col = 'Attributes for Transformation'
@@ -1000,7 +1596,7 @@ async def get_attribute_mapping(attribute: str = Query(..., description="The att
             )
 
         # Filter for the specific attribute (case-insensitive and trimmed)
-        filtered_df = df[df[filter_col].astype(str).str.strip().str.lower() == attribute.strip().lower()]
+        filtered_df = df[df["ATTRIBUTE_KEY"] == attribute.strip().lower()]
 
         # Prepare the list of mappings for the frontend
         mappings = []
@@ -1071,84 +1667,89 @@ async def transform_customer_excel(
     modified Excel file for download.
     """
     try:
-        # 1. Load the transformation rules from the master Excel file on the server
-        # It's good practice to ensure this file exists before trying to read it
-        if not TRANSFORMATION_ATTRIBUTES_FILE_PATH.exists():
-            logging.error(f"Transformation rules file not found at {TRANSFORMATION_ATTRIBUTES_FILE_PATH}")
-            raise HTTPException(
-                status_code=500, 
-                detail=f"Transformation rules file not found at {TRANSFORMATION_ATTRIBUTES_FILE_PATH}. Please ensure it's in the 'Required_files' directory."
-            )
+        contents = await raw_excel_file.read()
+
+        def transform_workbook():
+            # 1. Load the transformation rules from the master Excel file on the server
+            # It's good practice to ensure this file exists before trying to read it
+            if not TRANSFORMATION_ATTRIBUTES_FILE_PATH.exists():
+                logging.error(f"Transformation rules file not found at {TRANSFORMATION_ATTRIBUTES_FILE_PATH}")
+                raise HTTPException(
+                    status_code=500, 
+                    detail=f"Transformation rules file not found at {TRANSFORMATION_ATTRIBUTES_FILE_PATH}. Please ensure it's in the 'Required_files' directory."
+                )
         
-        rules_df = pd.read_excel(TRANSFORMATION_ATTRIBUTES_FILE_PATH, engine='openpyxl')
-        rules_df.columns = [col.strip() for col in rules_df.columns]
+            rules_df = REFERENCE_DATA_CACHE.get(TRANSFORMATION_ATTRIBUTES_FILE_PATH, load_transformation_rules_frame)
         
-        # Ensure required columns exist in the rules file
-        required_rule_cols = ['Attributes for Transformation', 'Customer Value', 'Oracle Value']
-        if not all(col in rules_df.columns for col in required_rule_cols):
-            raise HTTPException(status_code=500, detail="Transformation rules file is missing required columns. Expected: 'Attributes for Transformation', 'Customer Value', 'Oracle Value'.")
+            # Ensure required columns exist in the rules file
+            required_rule_cols = ['Attributes for Transformation', 'Customer Value', 'Oracle Value']
+            if not all(col in rules_df.columns for col in required_rule_cols):
+                raise HTTPException(status_code=500, detail="Transformation rules file is missing required columns. Expected: 'Attributes for Transformation', 'Customer Value', 'Oracle Value'.")
 
-        # 2. Load the uploaded customer Excel file into a pandas DataFrame
-        # FIX: Read the content into BytesIO first
-        contents = await raw_excel_file.read()
-        excel_in_memory = BytesIO(contents)
+            # 2. Load the uploaded customer Excel file into a pandas DataFrame
+            excel_in_memory = BytesIO(contents)
         
-        # First read without header to check number of rows
-        temp_df = pd.read_excel(excel_in_memory, engine='openpyxl', header=None)
-        if len(temp_df) < 2:  # Check if file has at least 2 rows (header + data)
-            raise HTTPException(
-                status_code=400,
-                detail="Excel file must contain at least 2 rows: one header row and at least one data row."
-            )
+            # First read without header to check number of rows
+            temp_df = pd.read_excel(excel_in_memory, engine='openpyxl', header=None)
+            if len(temp_df) < 2:  # Check if file has at least 2 rows (header + data)
+                raise HTTPException(
+                    status_code=400,
+                    detail="Excel file must contain at least 2 rows: one header row and at least one data row."
+                )
         
-        # Reset file pointer and read with proper header
-        excel_in_memory.seek(0)
-        customer_df = pd.read_excel(excel_in_memory, engine='openpyxl', header=1)
-        # Ensure column names are strings before stripping
-        customer_df.columns = [str(col).strip() for col in customer_df.columns]
-        logging.info(f"Successfully read customer Excel file. Shape: {customer_df.shape}")
-
-        # 3. Apply transformations column by column
-        for column_to_transform in customer_df.columns:
-            # Find the transformation rules for the current column
-            specific_rules = rules_df[rules_df['Attributes for Transformation'] == column_to_transform]
+            # Reset file pointer and read with proper header
+            excel_in_memory.seek(0)
+            customer_df = pd.read_excel(excel_in_memory, engine='openpyxl', header=1)
+            # Ensure column names are strings before stripping
+            customer_df.columns = [str(col).strip() for col in customer_df.columns]
+            logging.info(f"Successfully read customer Excel file. Shape: {customer_df.shape}")
+
+            # 3. Apply transformations column by column
+            for column_to_transform in customer_df.columns:
+                # Find the transformation rules for the current column
+                specific_rules = rules_df[rules_df['Attributes for Transformation'] == column_to_transform]
             
-            if not specific_rules.empty:
-                # Create a mapping dictionary: { 'Customer Value': 'Oracle Value' }
-                # Drop rows where 'Customer Value' is empty to avoid incorrect mapping
-                specific_rules = specific_rules.dropna(subset=['Customer Value'])
+                if not specific_rules.empty:
+                    # Create a mapping dictionary: { 'Customer Value': 'Oracle Value' }
+                    # Drop rows where 'Customer Value' is empty to avoid incorrect mapping
+                    specific_rules = specific_rules.dropna(subset=['Customer Value'])
                 
-                # Convert both keys and values to string before creating Series/dict
-                # This handles cases where Excel might interpret values as numbers
-                value_map = pd.Series(
-                    specific_rules['Oracle Value'].astype(str).values,
-                    index=specific_rules['Customer Value'].astype(str)
-                ).to_dict()
-
-                if value_map:
-                    # Apply the mapping to the column in the customer's DataFrame
-                    # Ensure values in customer_df column are also strings for consistent replacement
-                    customer_df[column_to_transform] = customer_df[column_to_transform].astype(str).replace(value_map)
-                    logging.info(f"Applied transformation to column: '{column_to_transform}' using map: {value_map}")
+                    # Convert both keys and values to string before creating Series/dict
+                    # This handles cases where Excel might interpret values as numbers
+                    value_map = pd.Series(
+                        specific_rules['Oracle Value'].astype(str).values,
+                        index=specific_rules['Customer Value'].astype(str)
+                    ).to_dict()
+
+                    if value_map:
+                        # Apply the mapping to the column in the customer's DataFrame
+                        # Ensure values in customer_df column are also strings for consistent replacement
+                        customer_df[column_to_transform] = customer_df[column_to_transform].astype(str).replace(value_map)
+                        logging.info(f"Applied transformation to column: '{column_to_transform}' using map: {value_map}")
+                    else:
+                        logging.info(f"No valid value mappings found for column '{column_to_transform}' in the transformation rules.")
                 else:
-                    logging.info(f"No valid value mappings found for column '{column_to_transform}' in the transformation rules.")
-            else:
-                logging.debug(f"No specific transformation rules found for column: '{column_to_transform}'. Skipping.")
+                    logging.debug(f"No specific transformation rules found for column: '{column_to_transform}'. Skipping.")
 
 
-        # 4. Save the transformed DataFrame to an in-memory Excel file
-        output_excel_file = BytesIO()
-        try:
-            customer_df.to_excel(output_excel_file, index=False, engine='openpyxl')
-            output_excel_file.seek(0) # Rewind the buffer to the beginning
-            file_size = output_excel_file.getbuffer().nbytes
-            logging.info(f"Successfully created transformed Excel file in memory. Size: {file_size} bytes.")
-            if file_size == 0:
-                logging.warning("Generated transformed Excel file is empty (0 bytes).")
-                raise HTTPException(status_code=500, detail="Transformed Excel file is empty. Transformation might have resulted in no data.")
-        except Exception as save_error:
-            logging.error(f"Error saving transformed DataFrame to in-memory Excel: {save_error}", exc_info=True)
-            raise HTTPException(status_code=500, detail=f"Failed to generate transformed Excel file: {save_error}")
+            # 4. Save the transformed DataFrame to an in-memory Excel file
+            output_excel_file = BytesIO()
+            try:
+                customer_df.to_excel(output_excel_file, index=False, engine='openpyxl')
+                output_excel_file.seek(0) # Rewind the buffer to the beginning
+                file_size = output_excel_file.getbuffer().nbytes
+                logging.info(f"Successfully created transformed Excel file in memory. Size: {file_size} bytes.")
+                if file_size == 0:
+                    logging.warning("Generated transformed Excel file is empty (0 bytes).")
+                    raise HTTPException(status_code=500, detail="Transformed Excel file is empty. Transformation might have resulted in no data.")
+            except Exception as save_error:
+                logging.error(f"Error saving transformed DataFrame to in-memory Excel: {save_error}", exc_info=True)
+                raise HTTPException(status_code=500, detail=f"Failed to generate transformed Excel file: {save_error}")
+
+            return output_excel_file, file_size
+
+        # Steps 1-4 are pandas/openpyxl work, so they run on the blocking pool.
+        output_excel_file, file_size = await BLOCKING_WORK_POOL.run("transform-customer-excel", transform_workbook)
 
 
         # 5. Return the in-memory file as a downloadable response
@@ -1252,12 +1853,41 @@ async def save_code(request: Request):
                 new_row.append(filename)
                 ws.append(new_row)
             wb.save(excel_path)
+            REFERENCE_DATA_CACHE.invalidate(excel_path)
         return {"success": True, "message": "Python code and Excel updated successfully.", "file": str(file_path)}
     except Exception as e:
         logger.error(f"Error saving code from chatbot: {e}")
         return {"success": False, "error": str(e)}
 
 
+NLR_RULES_FILE_PATH = Path("Required_files/Available_NLP.xlsx")
+
+def load_nlr_rules(file_path: Path) -> dict:
+    """
+    Parses Available_NLP.xlsx once into the rows (attribute, rules, conditions) in sheet order
+    and a dict keyed by attribute name (later rows win, as in the original batch lookup).
+    """
+    wb = openpyxl.load_workbook(file_path, read_only=True)
+    ws = wb.active
+
+    rows = []
+    rules_dict = {}
+    for row in ws.iter_rows(min_row=2, values_only=True):
+        attribute = str(row[0]).strip() if row[0] else ""
+        if attribute:
+            rules = str(row[1]).strip() if len(row) > 1 and row[1] else ""
+            conditions = str(row[2]).strip() if len(row) > 2 and row[2] else ""
+            rules_list = rules.split(", ") if rules else []
+            conditions_list = conditions.split(", ") if conditions else []
+            rows.append((attribute, rules_list, conditions_list))
+            rules_dict[attribute] = {
+                "rules": rules_list,
+                "conditions": conditions_list
+            }
+    wb.close()
+    return {"rows": rows, "rules": rules_dict}
+
+
 @app.post("/api/hdl/nlr/batch")
 def get_nlr_rules_batch(
     attributes: List[str] = Body(..., embed=True, alias="attributes")
@@ -1267,27 +1897,12 @@ def get_nlr_rules_batch(
     Returns a dictionary mapping each attribute to its rules and conditions, and a 'has_rules' boolean for each attribute.
     """
     try:
-        import openpyxl
-        excel_path = Path("Required_files/Available_NLP.xlsx")
+        excel_path = NLR_RULES_FILE_PATH
         if not excel_path.exists():
             return JSONResponse(status_code=404, content={"error": "NLR rules file not found."})
 
-        wb = openpyxl.load_workbook(excel_path)
-        ws = wb.active
-
-        # Build a dict of all available rules
-        rules_dict = {}
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            attribute = str(row[0]).strip() if row[0] else ""
-            if attribute:
-                rules = str(row[1]).strip() if row[1] else ""
-                conditions = str(row[2]).strip() if row[2] else ""
-                rules_list = rules.split(", ") if rules else []
-                conditions_list = conditions.split(", ") if conditions else []
-                rules_dict[attribute] = {
-                    "rules": rules_list,
-                    "conditions": conditions_list
-                }
+        # Dict of all available rules, cached until the workbook changes
+        rules_dict = REFERENCE_DATA_CACHE.get(excel_path, load_nlr_rules)["rules"]
 
         # Filter for requested attributes only and add has_rules
         filtered = {}
@@ -1312,25 +1927,16 @@ def get_nlr_rules_for_attribute(attribute: str = Query(..., description="The att
     Returns NLR rules and conditions for a single attribute from 'Required_files/Available_NLP.xlsx'.
     """
     try:
-        import openpyxl
-        excel_path = Path("Required_files/Available_NLP.xlsx")
+        excel_path = NLR_RULES_FILE_PATH
         if not excel_path.exists():
             return JSONResponse(status_code=404, content={"error": "NLR rules file not found."})
 
-        wb = openpyxl.load_workbook(excel_path)
-        ws = wb.active
-
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            attr = str(row[0]).strip() if row[0] else ""
+        for attr, rules_list, conditions_list in REFERENCE_DATA_CACHE.get(excel_path, load_nlr_rules)["rows"]:
             if attr.lower() == attribute.strip().lower():
-                rules = str(row[1]).strip() if row[1] else ""
-                conditions = str(row[2]).strip() if row[2] else ""
-                rules_list = rules.split(", ") if rules else []
-                conditions_list = conditions.split(", ") if conditions else []
                 return {
                     "attribute": attr,
-                    "rules": rules_list,
-                    "conditions": conditions_list
+                    "rules": list(rules_list),
+                    "conditions": list(conditions_list)
                 }
         # If not found
         return {
@@ -1346,6 +1952,33 @@ def get_nlr_rules_for_attribute(attribute: str = Query(..., description="The att
 DIR = Path("uploads/Excel_Files")
 DIR.mkdir(parents=True, exist_ok=True) # Ensure this directory exists at startup
 
+def compact_sheet_rows(ws, keep_rows: Set[int], start_row: int) -> int:
+    """
+    Drops every row from start_row to ws.max_row that is not in keep_rows, moving the kept rows
+    up in their original order. Same cells and styles as calling ws.delete_rows on each dropped
+    row, but each kept block is moved once instead of shifting the whole sheet per deleted row.
+    Returns the number of rows dropped.
+    """
+    max_row = ws.max_row
+    last_col = get_column_letter(max(ws.max_column, 1))
+    target = row = start_row
+    while row <= max_row:
+        if row not in keep_rows:
+            row += 1
+            continue
+        block_end = row
+        while block_end < max_row and block_end + 1 in keep_rows:
+            block_end += 1
+        if row != target:
+            ws.move_range(f"A{row}:{last_col}{block_end}", rows=target - row)
+        target += block_end - row + 1
+        row = block_end + 1
+
+    dropped = max_row - target + 1
+    if dropped > 0:
+        ws.delete_rows(target, dropped)
+    return dropped
+
 def populate_actual_termination_date_from_resignation(file_path: Path, header_row_num: int = 2, save_as_new_file=False, hireActions: List = [], globalTransfers: List = [], termAction: List = []):
     try:
         wb = openpyxl.load_workbook(file_path)
@@ -1490,11 +2123,8 @@ def validate_termination_date(file_path: Path, header_row_num: int = 2, save_as_
         else:
             logger.info("[CLEANUP] ✅ No invalid termination records found.")
 
-        deleted_count = 0
-        for row_num in sorted(rows_to_delete, reverse=True):
-            if row_num > header_row_num:
-                ws.delete_rows(row_num)
-                deleted_count += 1
+        keep_rows = {row_num for row_num in range(start_row, ws.max_row + 1) if row_num not in rows_to_delete}
+        deleted_count = compact_sheet_rows(ws, keep_rows, start_row)
 
         logger.info(f"[DELETED] 🗑️ Total Rows Deleted: {deleted_count}")
 
@@ -1581,10 +2211,8 @@ def validate_workrelationship_sheet(file_path: Path, header_row_num: int = 2, sa
 
         logger.info(f"[INFO] Keeping strictly HIRE/REHIRE/GT only rows: {sorted(keep_rows)}")
 
-        # Delete non-matching rows bottom-up for all that person numbers
-        for row_num in range(ws.max_row, header_row_num, -1):
-            if row_num not in keep_rows:
-                ws.delete_rows(row_num)
+        # Drop non-matching rows for all that person numbers in a single pass
+        compact_sheet_rows(ws, keep_rows, start_row)
 
         # Save
         if save_as_new_file:
@@ -1626,6 +2254,13 @@ def Assignment_type_Code(file_path: Path, assignment_status_rules: list, header_
         start_row = header_row_num + 1
         valid_rows = []
         first_words_logged = set()
+        # Parse the rules once: (is_else, actions the rule applies to, expected first word)
+        compiled_rules = []
+        for rule in assignment_status_rules:
+            rule_key = rule.get("key", "").strip().lower()
+            rule_value = rule.get("value", "").upper()
+            rule_result = rule.get("result", "").upper()
+            compiled_rules.append((rule_key == "else", {val.strip().upper() for val in rule_value.split(",")}, rule_result))
 
         for i, row in enumerate(ws.iter_rows(min_row=start_row), start=start_row):
             person = str(row[person_idx].value).strip() if row[person_idx].value else None
@@ -1642,12 +2277,8 @@ def Assignment_type_Code(file_path: Path, assignment_status_rules: list, header_
             first_words_logged.add(assignment_status_first_word)
 
             matched = False
-            for rule in assignment_status_rules:
-                rule_key = rule.get("key", "").strip().lower()
-                rule_value = rule.get("value", "").upper()
-                rule_result = rule.get("result", "").upper()
-
-                if rule_key == "else":
+            for is_else, rule_actions, rule_result in compiled_rules:
+                if is_else:
                     # ELSE rule when nothing matched before
                     expected_status = rule_result
                     if assignment_status_first_word == expected_status:
@@ -1657,8 +2288,7 @@ def Assignment_type_Code(file_path: Path, assignment_status_rules: list, header_
                     matched = True
                     break
                 else:
-                    action_list = [val.strip().upper() for val in rule_value.split(",")]
-                    if action in action_list:
+                    if action in rule_actions:
                         expected_status = rule_result
                         if assignment_status_first_word == expected_status:
                             valid_rows.append([cell.value for cell in row])
@@ -1688,6 +2318,99 @@ def Assignment_type_Code(file_path: Path, assignment_status_rules: list, header_
         logger.error(f"[ERROR] ❌ Exception during Assignment_type_Code: {e}")
         return None
 
+#------------- Legal Employer timeline ------------------#
+class LegalEmployerTimeline:
+    """
+    Person / date / action / Legal Employer rows sorted once by (person, date), with the
+    per-person shifts the Legal Employer rules are built from. Rows without a person are left out
+    (as groupby does). All arrays are in timeline order; `positions` maps them back to frame rows.
+    """
+
+    def __init__(self, df: pd.DataFrame, person_col: str, date_col: str, action_col: str, le_col: str):
+        people = df[person_col]
+        keys = pd.DataFrame({"person": people.to_numpy(), "date": df[date_col].to_numpy()})
+        keys = keys[people.notna().to_numpy()]
+        self.positions = keys.sort_values(by=["person", "date"]).index.to_numpy()
+        self.person = people.to_numpy(dtype=object)[self.positions]
+        self.action = df[action_col].to_numpy(dtype=object)[self.positions]
+        self.le = df[le_col].to_numpy(dtype=object)[self.positions]
+        self.dates = df[date_col].iloc[self.positions].reset_index(drop=True)
+        self.first_of_person = np.ones(len(self.positions), dtype=bool)
+        self.first_of_person[1:] = self.person[1:] != self.person[:-1]
+        self.group = np.cumsum(self.first_of_person) - 1
+
+    def __len__(self):
+        return len(self.positions)
+
+    def action_in(self, actions) -> np.ndarray:
+        return pd.Series(self.action, dtype=object).isin(list(actions)).to_numpy()
+
+    def previous(self, values: np.ndarray, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        For each row, values at the previous row of the same person, counting only rows where
+        `rows` is True. Returns (previous values or None, has_previous mask).
+        """
+        selected = np.arange(len(self)) if rows is None else np.flatnonzero(rows)
+        same_person = self.group[selected[1:]] == self.group[selected[:-1]]
+        previous = np.full(len(self), None, dtype=object)
+        has_previous = np.zeros(len(self), dtype=bool)
+        previous[selected[1:][same_person]] = np.asarray(values, dtype=object)[selected[:-1][same_person]]
+        has_previous[selected[1:][same_person]] = True
+        return previous, has_previous
+
+    def carried(self, values: np.ndarray, anchors: np.ndarray, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        For each row, values at the most recent earlier anchor row of the same person (only rows
+        where `rows` is True take part). Returns (carried values or None, has_anchor mask).
+        """
+        selected = np.arange(len(self)) if rows is None else np.flatnonzero(rows)
+        steps = np.arange(len(selected))
+        starts = np.ones(len(selected), dtype=bool)
+        starts[1:] = self.group[selected[1:]] != self.group[selected[:-1]]
+        person_start = np.maximum.accumulate(np.where(starts, steps, 0))
+        last_anchor = np.maximum.accumulate(np.where(anchors[selected], steps, -1))
+        # Anchor strictly before each row: the running anchor of the previous row of the same person
+        before = np.full(len(selected), -1)
+        before[1:] = last_anchor[:-1]
+        before[(before < person_start) | starts] = -1
+        carried = np.full(len(self), None, dtype=object)
+        has_anchor = np.zeros(len(self), dtype=bool)
+        found = before >= 0
+        carried[selected[found]] = np.asarray(values, dtype=object)[selected[before[found]]]
+        has_anchor[selected[found]] = True
+        return carried, has_anchor
+
+    def first_per_person(self, mask: np.ndarray) -> Dict[Any, int]:
+        """Person -> timeline index of that person's first row where mask is True."""
+        hits = np.flatnonzero(mask)
+        firsts = hits[np.r_[True, self.group[hits[1:]] != self.group[hits[:-1]]]] if len(hits) else hits
+        return {self.person[i]: int(i) for i in firsts}
+
+    def employment_transitions(self, hire_actions, term_actions, allowed_le_change_actions, rows: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Replays the hire / termination / Legal Employer state machine in bulk. A hire opens an
+        employment period with its LE, a termination closes it, and any other action keeps it
+        (moving to the row's LE when it differs). Returns per-row masks for the scenarios
+        (only for rows where `rows` is True) plus `previous_le`, the LE of the open period.
+        """
+        rows = np.ones(len(self), dtype=bool) if rows is None else rows
+        is_hire = self.action_in(hire_actions)
+        is_term = self.action_in(term_actions) & ~is_hire
+        is_other = ~is_hire & ~is_term
+        last_event, has_event = self.carried(is_hire, is_hire | is_term, rows)
+        active = has_event & (last_event == True)
+        previous_le, _ = self.previous(self.le, rows)
+        le_changed = active & (previous_le != self.le).astype(bool)
+        return {
+            "hire_le_change_without_termination": rows & is_hire & le_changed,
+            "termination_without_hire": rows & is_term & ~active,
+            "termination_le_mismatch": rows & is_term & le_changed,
+            "action_without_employment": rows & is_other & ~active,
+            "le_change_without_allowed_action": rows & is_other & le_changed & ~self.action_in(allowed_le_change_actions),
+            "previous_le": previous_le,
+        }
+
+
 def validate_LegalEmployer_change(
     file_content: BytesIO,
     original_filename: str,
@@ -1777,97 +2500,62 @@ def validate_LegalEmployer_change(
         term_actions = [code.strip().upper() for code in termination_action_codes.split(',')] if termination_action_codes else []
         allowed_le_change_actions = [code.strip().upper() for code in allowed_le_change_action_codes.split(',')] if allowed_le_change_action_codes else []
 
-        for pn, group in df.groupby('PERSONNUMBER'):
-            group = group.sort_values(by='EFFECTIVESTARTDATE').reset_index(drop=True)
-            current_le = None
-            last_was_termination = False
-
-            for _, row in group.iterrows():
-                action = row['ACTIONCODE']
-                le = row['LEGALEMPLOYERNAME']
-                eff_date = row['EFFECTIVESTARTDATE']
-
-                if action in hire_actions:
-                    if current_le and not last_was_termination and current_le != le:
-                        add_inconsistency({
-                            'PersonNumber': pn,
-                            'EffectiveStartDate': eff_date.strftime('%Y-%m-%d'),
-                            'ActionCode': action,
-                            'LegalEmployerName': le,
-                            'PreviousLegalEmployer': current_le,
-                            'Scenario': 'Hire without prior Termination with LE change',
-                            'Status': f"LE changed to '{le}' without termination from '{current_le}'"
-                        })
-                    current_le = le
-                    last_was_termination = False
-
-                elif action in term_actions:
-                    if not current_le:
-                        add_inconsistency({
-                            'PersonNumber': pn,
-                            'EffectiveStartDate': eff_date.strftime('%Y-%m-%d'),
-                            'ActionCode': action,
-                            'LegalEmployerName': le,
-                            'Scenario': 'Termination without prior Hire',
-                            'Status': 'Termination found without Hire'
-                        })
-                    if current_le and current_le != le:
-                        add_inconsistency({
-                            'PersonNumber': pn,
-                            'EffectiveStartDate': eff_date.strftime('%Y-%m-%d'),
-                            'ActionCode': action,
-                            'LegalEmployerName': le,
-                            'PreviousLegalEmployer': current_le,
-                            'Scenario': 'Termination with mismatched LE',
-                            'Status': f"Termination LE '{le}' does not match '{current_le}'"
-                        })
-                    current_le = None
-                    last_was_termination = True
-
-                else:
-                    if not current_le:
-                        add_inconsistency({
-                            'PersonNumber': pn,
-                            'EffectiveStartDate': eff_date.strftime('%Y-%m-%d'),
-                            'ActionCode': action,
-                            'LegalEmployerName': le,
-                            'Scenario': 'Action without Hire',
-                            'Status': f"Action '{action}' outside of employment period"
-                        })
-                    elif current_le != le:
-                        if action in allowed_le_change_actions:
-                            current_le = le
-                        else:
-                            add_inconsistency({
-                                'PersonNumber': pn,
-                                'EffectiveStartDate': eff_date.strftime('%Y-%m-%d'),
-                                'ActionCode': action,
-                                'LegalEmployerName': le,
-                                'PreviousLegalEmployer': current_le,
-                                'Scenario': 'LE changed mid-employment without valid action',
-                                'Status': f"LE changed to '{le}' with action '{action}'"
-                            })
-                            current_le = le
-                    last_was_termination = False
+        timeline = LegalEmployerTimeline(df, 'PERSONNUMBER', 'EFFECTIVESTARTDATE', 'ACTIONCODE', 'LEGALEMPLOYERNAME')
+        transitions = timeline.employment_transitions(hire_actions, term_actions, allowed_le_change_actions)
+        previous_le = transitions["previous_le"]
+        eff_dates = timeline.dates.dt.strftime('%Y-%m-%d').to_numpy()
+
+        def scenario_record(i, scenario, status, with_previous=False):
+            record = {
+                'PersonNumber': timeline.person[i],
+                'EffectiveStartDate': eff_dates[i],
+                'ActionCode': timeline.action[i],
+                'LegalEmployerName': timeline.le[i],
+            }
+            if with_previous:
+                record['PreviousLegalEmployer'] = previous_le[i]
+            record['Scenario'] = scenario
+            record['Status'] = status
+            return record
+
+        flagged = (
+            transitions["hire_le_change_without_termination"] | transitions["termination_without_hire"]
+            | transitions["termination_le_mismatch"] | transitions["action_without_employment"]
+            | transitions["le_change_without_allowed_action"]
+        )
+        for i in np.flatnonzero(flagged):
+            action, le, current_le = timeline.action[i], timeline.le[i], previous_le[i]
+            if transitions["hire_le_change_without_termination"][i]:
+                add_inconsistency(scenario_record(i, 'Hire without prior Termination with LE change', f"LE changed to '{le}' without termination from '{current_le}'", True))
+            elif transitions["termination_without_hire"][i]:
+                add_inconsistency(scenario_record(i, 'Termination without prior Hire', 'Termination found without Hire'))
+            elif transitions["termination_le_mismatch"][i]:
+                add_inconsistency(scenario_record(i, 'Termination with mismatched LE', f"Termination LE '{le}' does not match '{current_le}'", True))
+            elif transitions["action_without_employment"][i]:
+                add_inconsistency(scenario_record(i, 'Action without Hire', f"Action '{action}' outside of employment period"))
+            else:
+                add_inconsistency(scenario_record(i, 'LE changed mid-employment without valid action', f"LE changed to '{le}' with action '{action}'", True))
 
         if person_numbers_with_errors:
             df = df[~df['PERSONNUMBER'].isin(person_numbers_with_errors)]
             logger.info(f"[INFO] Removed inconsistent PersonNumbers: {person_numbers_with_errors}")
 
-        for pn, group in df.groupby('PERSONNUMBER'):
-            hires = group[group['ACTIONCODE'].isin(hire_actions)].sort_values(by='EFFECTIVESTARTDATE')
-            terms = group[group['ACTIONCODE'].isin(term_actions)].sort_values(by='EFFECTIVESTARTDATE')
+        remaining = ~pd.Series(timeline.person, dtype=object).isin(person_numbers_with_errors).to_numpy()
+        first_hires = timeline.first_per_person(remaining & timeline.action_in(hire_actions))
+        first_terms = timeline.first_per_person(remaining & timeline.action_in(term_actions))
 
-            if not hires.empty and not terms.empty:
-                if hires.iloc[0]['LEGALEMPLOYERNAME'] != terms.iloc[0]['LEGALEMPLOYERNAME']:
+        for pn in dict.fromkeys(timeline.person[remaining]):
+            hire_i, term_i = first_hires.get(pn), first_terms.get(pn)
+            if hire_i is not None and term_i is not None:
+                if timeline.le[hire_i] != timeline.le[term_i]:
                     add_inconsistency({
                         'PersonNumber': pn,
                         'Scenario': 'First Hire vs First Termination LE mismatch',
-                        'FirstHireLE': hires.iloc[0]['LEGALEMPLOYERNAME'],
-                        'FirstTerminationLE': terms.iloc[0]['LEGALEMPLOYERNAME'],
+                        'FirstHireLE': timeline.le[hire_i],
+                        'FirstTerminationLE': timeline.le[term_i],
                         'Status': 'Mismatch between hire and termination LE'
                     })
-            elif hires.empty and not terms.empty:
+            elif hire_i is None and term_i is not None:
                 add_inconsistency({
                     'PersonNumber': pn,
                     'Scenario': 'Termination without any Hire',
@@ -1910,89 +2598,80 @@ def _make_response(inconsistent_records, person_numbers_with_errors, df):
 
 
 
-@app.post("/api/hdl/bulk-excel-upload")
-async def bulk_excel_upload(
-    parent_name: str = Form(...),
-    excelFile: UploadFile = File(...),
-    Mandatory_Objects: str = Form(...),
-    assignment_status_rules: str = Form(...),
-    TermActions: str = Form(...),
-    HireActions: str = Form(...),
-    glbTransfers: str = Form(...),
-    all_mandatory_objects: str = Form(...),
-    all_non_mandatory_objects: str = Form(...),
-    # Add customerName and InstanceName as form parameters
-    customerName: str = Form(...),
-    InstanceName: str = Form(...)
-):
-    if not excelFile.filename.endswith(".xlsx"):
-        raise HTTPException(status_code=400, detail="Invalid file format. Please upload an .xlsx file.")
+BULK_SPLIT_MEMORY_SAMPLE_ROWS = 5000
 
-    # Construct the new parent_folder path: uploads/customerName/InstanceName/parent_name
-    customer_folder = DIR / customerName
-    instance_folder = customer_folder / InstanceName
-    parent_folder = instance_folder / parent_name
-
-    # Create the nested directories if they don't exist
-    parent_folder.mkdir(parents=True, exist_ok=True)
-    logger.info(f"Created directory structure: {parent_folder}")
 
+def current_rss_mb() -> Optional[float]:
+    """Resident memory of this process in MB, or None when psutil is unavailable."""
     try:
-        # ✅ Parse JSON strings into lists
-        term_actions_list = json.loads(TermActions)
-        hire_actions_list = json.loads(HireActions)
-        glb_transfer_list = json.loads(glbTransfers)
-        assignment_status_rules_list = json.loads(assignment_status_rules)
-        mandatory_objects_list = json.loads(all_mandatory_objects)
-        all_non_mandatory_objects_list = json.loads(all_non_mandatory_objects) # Added this as it's passed from frontend
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except Exception:
+        return None
 
-        logger.info(f"✅ Parsed Actions: Term={term_actions_list}, Hire={hire_actions_list}, GT={glb_transfer_list}")
 
-        contents = await excelFile.read()
-        wb = openpyxl.load_workbook(BytesIO(contents))
-        saved_files = []
-        mandatory_person_numbers = set()
+def collect_sheet_person_numbers(ws) -> Set[str]:
+    """
+    Reads only the PersonNumber column (headers in row 3) of a read-only worksheet.
+    Returns an empty set when the sheet has no PersonNumber header.
+    """
+    headers = next(ws.iter_rows(min_row=3, max_row=3, values_only=True), ())
+    if "PersonNumber" not in headers:
+        return set()
+    column = list(headers).index("PersonNumber") + 1
+    return {
+        str(person).strip()
+        for (person,) in ws.iter_rows(min_row=4, min_col=column, max_col=column, values_only=True)
+        if person
+    }
 
+
+def split_bulk_workbook(source, parent_folder: Path, parent_name: str, mandatory_objects_list: List[str]) -> Tuple[List[dict], dict]:
+    """
+    Splits an uploaded workbook into one .xlsx per sheet under parent_folder.
+    The source is opened read-only and each output is a write-only workbook, so rows stream
+    straight through. Rows of non-mandatory sheets are kept only for PersonNumbers found in the
+    mandatory sheets (collected first from the PersonNumber column alone).
+    Returns (saved_files, metrics) where metrics holds per-sheet timings and the peak RSS seen.
+    """
+    split_started = time.perf_counter()
+    memory_samples = [current_rss_mb()]
+    wb = openpyxl.load_workbook(source, read_only=True)
+    saved_files = []
+    sheet_metrics = []
+    try:
         # === 1️⃣ First Pass — Collect PersonNumbers from Mandatory Sheets ===
+        mandatory_person_numbers = set()
         for sheet_name in wb.sheetnames:
             if sheet_name.strip() in mandatory_objects_list:
-                ws = wb[sheet_name]
-                # Assuming headers are in the 3rd row (index 2 for 0-indexed list)
-                headers = [cell.value for cell in ws[3]]
-                if not headers:
-                    continue
-                try:
-                    person_idx = headers.index("PersonNumber")
-                except ValueError:
-                    continue
-
-                for row_idx, row in enumerate(ws.iter_rows(min_row=4, values_only=True), start=4):
-                    if person_idx is not None and person_idx < len(row) and row[person_idx]:
-                        mandatory_person_numbers.add(str(row[person_idx]).strip())
+                mandatory_person_numbers |= collect_sheet_person_numbers(wb[sheet_name])
+        memory_samples.append(current_rss_mb())
+        person_scan_seconds = time.perf_counter() - split_started
 
         # === 2️⃣ Second Pass — Filter Rows and Save Each Sheet ===
         for sheet_name in wb.sheetnames:
+            sheet_started = time.perf_counter()
             ws = wb[sheet_name]
-            # Assuming headers are in the 3rd row (index 2 for 0-indexed list)
-            headers = [cell.value for cell in ws[3]]
+            # Assuming headers are in the 3rd row
+            headers = list(next(ws.iter_rows(min_row=3, max_row=3, values_only=True), ()))
             if not headers:
                 continue
 
-            new_wb = openpyxl.Workbook()
-            new_ws = new_wb.active
-            new_ws.title = sheet_name
-            # Append the original headers
-            new_ws.append(headers)
-
             try:
                 person_idx = headers.index("PersonNumber")
             except ValueError:
                 person_idx = None
 
             is_mandatory = sheet_name.strip() in mandatory_objects_list
+            new_wb = None
+            new_ws = None
+            rows_read = 0
             rows_added = 0
 
             for row_idx, row in enumerate(ws.iter_rows(min_row=4, values_only=True), start=4):
+                rows_read += 1
+                if rows_read % BULK_SPLIT_MEMORY_SAMPLE_ROWS == 0:
+                    memory_samples.append(current_rss_mb())
                 if all(cell is None or (isinstance(cell, str) and cell.strip() == "") for cell in row):
                     continue # Skip entirely empty rows
 
@@ -2007,6 +2686,12 @@ async def bulk_excel_upload(
                         logger.warning(f"⚠️ Mandatory sheet '{sheet_name}' row {row_idx} missing PersonNumber. Skipping row.")
                         continue
 
+                if new_ws is None:
+                    # Output workbooks are only opened once a sheet has a row to keep
+                    new_wb = openpyxl.Workbook(write_only=True)
+                    new_ws = new_wb.create_sheet(title=sheet_name)
+                    # Append the original headers
+                    new_ws.append(headers)
                 new_ws.append(row)
                 rows_added += 1
 
@@ -2023,87 +2708,181 @@ async def bulk_excel_upload(
                 })
                 logger.info(f"[✅] Saved sheet '{sheet_name}' to '{out_path.name}'")
 
-        # === 3️⃣ Post-Save Validations (assuming these functions are defined elsewhere) ===
-        errors = []
-
-        # Placeholder for validation functions (you need to define these or import them)
-        def populate_actual_termination_date_from_resignation(file_path, hireActions, globalTransfers, termAction):
-            logger.info(f"Running populate_actual_termination_date_from_resignation for {file_path}")
-            # Implement your logic here
-            pass
-
-        def validate_workrelationship_sheet(file_path, hireActions, globalTransfers):
-            logger.info(f"Running validate_workrelationship_sheet for {file_path}")
-            # Implement your logic here
-            pass
-
-        def Assignment_type_Code(file_path, assignment_status_rules, save_as_new_file):
-            logger.info(f"Running Assignment_type_Code for {file_path}")
-            # Implement your logic here
-            pass
-
-        def validate_termination_date(file_path, save_as_new_file, TermActions, HireActions):
-            logger.info(f"Running validate_termination_date for {file_path}")
-            # Implement your logic here
-            pass
-
-        def validate_LegalEmployer_change(file_content, original_filename, hire_action_codes, termination_action_codes, allowed_le_change_action_codes):
-            logger.info(f"Running validate_LegalEmployer_change for {original_filename}")
-            # Implement your logic here, return a list of errors if any
-            return []
-
+            memory_samples.append(current_rss_mb())
+            sheet_metrics.append({
+                "sheet": sheet_name,
+                "rows_read": rows_read,
+                "rows_written": rows_added,
+                "seconds": round(time.perf_counter() - sheet_started, 3),
+            })
+    finally:
+        wb.close()
+
+    observed = [sample for sample in memory_samples if sample is not None]
+    metrics = {
+        "person_number_scan_seconds": round(person_scan_seconds, 3),
+        "sheets": sheet_metrics,
+        "total_seconds": round(time.perf_counter() - split_started, 3),
+        "peak_rss_mb": round(max(observed), 1) if observed else None,
+        "start_rss_mb": round(observed[0], 1) if observed else None,
+    }
+    return saved_files, metrics
+
+
+def run_bulk_excel_upload(
+    source,
+    filename: str,
+    parent_folder: Path,
+    parent_name: str,
+    term_actions_list: List[str],
+    hire_actions_list: List[str],
+    glb_transfer_list: List[str],
+    assignment_status_rules_list: list,
+    mandatory_objects_list: List[str]
+) -> dict:
+    """
+    Synchronous body of /api/hdl/bulk-excel-upload: splits the workbook read from source
+    into per-sheet files under parent_folder, then runs the post-save checks.
+    """
+    run = current_validation_run()
+    restored = run.restored_state()
+    if restored is None:
+        run.enter("split")
+        saved_files, split_metrics = split_bulk_workbook(source, parent_folder, parent_name, mandatory_objects_list)
+        logger.info(f"Split '{filename}' into {len(saved_files)} file(s) in {split_metrics['total_seconds']}s (peak RSS {split_metrics['peak_rss_mb']} MB)")
+        run.checkpoint("split", {"saved_files": saved_files, "split_metrics": split_metrics})
+    else:
+        saved_files, split_metrics = restored["saved_files"], restored["split_metrics"]
+
+    # === 3️⃣ Post-Save Validations (assuming these functions are defined elsewhere) ===
+    run.enter("post_validation")
+    errors = []
+
+    # Placeholder for validation functions (you need to define these or import them)
+    def populate_actual_termination_date_from_resignation(file_path, hireActions, globalTransfers, termAction):
+        logger.info(f"Running populate_actual_termination_date_from_resignation for {file_path}")
+        # Implement your logic here
+        pass
+
+    def validate_workrelationship_sheet(file_path, hireActions, globalTransfers):
+        logger.info(f"Running validate_workrelationship_sheet for {file_path}")
+        # Implement your logic here
+        pass
+
+    def Assignment_type_Code(file_path, assignment_status_rules, save_as_new_file):
+        logger.info(f"Running Assignment_type_Code for {file_path}")
+        # Implement your logic here
+        pass
+
+    def validate_termination_date(file_path, save_as_new_file, TermActions, HireActions):
+        logger.info(f"Running validate_termination_date for {file_path}")
+        # Implement your logic here
+        pass
+
+    def validate_LegalEmployer_change(file_content, original_filename, hire_action_codes, termination_action_codes, allowed_le_change_action_codes):
+        logger.info(f"Running validate_LegalEmployer_change for {original_filename}")
+        # Implement your logic here, return a list of errors if any
+        return []
+
+
+    for file_meta in saved_files:
+        sheet_name_lower = file_meta["sheet"].strip().lower()
+        # Ensure the path is absolute for internal operations
+        current_file_path = DIR / file_meta["file"]
+
+        if sheet_name_lower == "workrelationship":
+            populate_actual_termination_date_from_resignation(
+                current_file_path, hireActions=hire_actions_list,
+                globalTransfers=glb_transfer_list, termAction=term_actions_list
+            )
 
-        for file_meta in saved_files:
-            sheet_name_lower = file_meta["sheet"].strip().lower()
-            # Ensure the path is absolute for internal operations
-            current_file_path = DIR / file_meta["file"]
+            validate_workrelationship_sheet(
+                current_file_path, hireActions=hire_actions_list,
+                globalTransfers=glb_transfer_list
+            )
 
-            if sheet_name_lower == "workrelationship":
-                populate_actual_termination_date_from_resignation(
-                    current_file_path, hireActions=hire_actions_list,
-                    globalTransfers=glb_transfer_list, termAction=term_actions_list
+            assignment_file = parent_folder / "Assignment.xlsx"
+            if assignment_file.exists():
+                Assignment_type_Code(
+                    assignment_file, assignment_status_rules=assignment_status_rules_list, save_as_new_file=False
                 )
-
-                validate_workrelationship_sheet(
-                    current_file_path, hireActions=hire_actions_list,
-                    globalTransfers=glb_transfer_list
+                validate_termination_date(
+                    assignment_file, save_as_new_file=False, TermActions=term_actions_list, HireActions=hire_actions_list
+                )
+            else:
+                logger.warning("⚠️ Assignment.xlsx not found — skipping validations.")
+
+            workterms_file = parent_folder / "WorkTerms.xlsx"
+            if workterms_file.exists():
+                with open(workterms_file, "rb") as f:
+                    workterms_content = BytesIO(f.read())
+
+                le_validation_results = validate_LegalEmployer_change(
+                    file_content=workterms_content,
+                    original_filename="WorkTerms.xlsx",
+                    hire_action_codes=",".join(hire_actions_list),
+                    termination_action_codes=",".join(term_actions_list),
+                    allowed_le_change_action_codes=",".join(glb_transfer_list)
                 )
 
-                assignment_file = parent_folder / "Assignment.xlsx"
-                if assignment_file.exists():
-                    Assignment_type_Code(
-                        assignment_file, assignment_status_rules=assignment_status_rules_list, save_as_new_file=False
-                    )
-                    validate_termination_date(
-                        assignment_file, save_as_new_file=False, TermActions=term_actions_list, HireActions=hire_actions_list
-                    )
+                if le_validation_results:
+                    errors.extend(le_validation_results)
+                    logger.warning(f"⚠️ Legal Employer validation found inconsistencies: {le_validation_results}")
                 else:
-                    logger.warning("⚠️ Assignment.xlsx not found — skipping validations.")
-
-                workterms_file = parent_folder / "WorkTerms.xlsx"
-                if workterms_file.exists():
-                    with open(workterms_file, "rb") as f:
-                        workterms_content = BytesIO(f.read())
-
-                    le_validation_results = validate_LegalEmployer_change(
-                        file_content=workterms_content,
-                        original_filename="WorkTerms.xlsx",
-                        hire_action_codes=",".join(hire_actions_list),
-                        termination_action_codes=",".join(term_actions_list),
-                        allowed_le_change_action_codes=",".join(glb_transfer_list)
-                    )
+                    logger.info("✅ Legal Employer validation passed.")
+            else:
+                logger.warning("⚠️ WorkTerms.xlsx not found — skipping LE validation.")
 
-                    if le_validation_results:
-                        errors.extend(le_validation_results)
-                        logger.warning(f"⚠️ Legal Employer validation found inconsistencies: {le_validation_results}")
-                    else:
-                        logger.info("✅ Legal Employer validation passed.")
-                else:
-                    logger.warning("⚠️ WorkTerms.xlsx not found — skipping LE validation.")
+            break  # Only validating WorkRelationship cycle
 
-                break  # Only validating WorkRelationship cycle
+    return {"parent": parent_name, "files": saved_files, "errors": errors, "metrics": split_metrics}
 
-        return {"parent": parent_name, "files": saved_files, "errors": errors}
+
+@app.post("/api/hdl/bulk-excel-upload")
+async def bulk_excel_upload(
+    parent_name: str = Form(...),
+    excelFile: UploadFile = File(...),
+    Mandatory_Objects: str = Form(...),
+    assignment_status_rules: str = Form(...),
+    TermActions: str = Form(...),
+    HireActions: str = Form(...),
+    glbTransfers: str = Form(...),
+    all_mandatory_objects: str = Form(...),
+    all_non_mandatory_objects: str = Form(...),
+    # Add customerName and InstanceName as form parameters
+    customerName: str = Form(...),
+    InstanceName: str = Form(...)
+):
+    if not excelFile.filename.endswith(".xlsx"):
+        raise HTTPException(status_code=400, detail="Invalid file format. Please upload an .xlsx file.")
+
+    # Construct the new parent_folder path: uploads/customerName/InstanceName/parent_name
+    customer_folder = DIR / customerName
+    instance_folder = customer_folder / InstanceName
+    parent_folder = instance_folder / parent_name
+
+    # Create the nested directories if they don't exist
+    parent_folder.mkdir(parents=True, exist_ok=True)
+    logger.info(f"Created directory structure: {parent_folder}")
+
+    try:
+        # ✅ Parse JSON strings into lists
+        term_actions_list = json.loads(TermActions)
+        hire_actions_list = json.loads(HireActions)
+        glb_transfer_list = json.loads(glbTransfers)
+        assignment_status_rules_list = json.loads(assignment_status_rules)
+        mandatory_objects_list = json.loads(all_mandatory_objects)
+        all_non_mandatory_objects_list = json.loads(all_non_mandatory_objects) # Added this as it's passed from frontend
+
+        logger.info(f"✅ Parsed Actions: Term={term_actions_list}, Hire={hire_actions_list}, GT={glb_transfer_list}")
+
+        # The upload is already spooled to a temporary file; read it in place instead of copying it into memory
+        await excelFile.seek(0)
+        return await BLOCKING_WORK_POOL.run(
+            "bulk-excel-upload", run_bulk_excel_upload,
+            excelFile.file, excelFile.filename, parent_folder, parent_name,
+            term_actions_list, hire_actions_list, glb_transfer_list, assignment_status_rules_list, mandatory_objects_list
+        )
 
     except HTTPException as http_exc:
         raise http_exc
@@ -2128,11 +2907,8 @@ async def get_data_transformation_mapping(Attributes: List[str] = Body(..., embe
         # Define the path to the mapping file (using the Excel file name)
         mapping_file_path = TRANSFORMATION_ATTRIBUTES_FILE_PATH
         
-        # Load the Excel file into a DataFrame
-        df = pd.read_excel(mapping_file_path, engine="openpyxl")
-
-        # Clean column names by stripping whitespace
-        df.columns = [col.strip() for col in df.columns]
+        # Load the cached, column-cleaned DataFrame for the mapping workbook
+        df = REFERENCE_DATA_CACHE.get(mapping_file_path, load_transformation_rules_frame)
 
         # Filter the DataFrame to include only the correct column names
         mapping_df = df[['Attributes for Transformation', 'Transformation Map Name']].copy()
@@ -2237,8 +3013,81 @@ class AttributeValidationData(BaseModel):
     # --- NEW: Add the includeInDatFileGeneration field to the Pydantic model ---
     includeInDatFileGeneration: bool = True # Default to True as per frontend logic
 
+class ValidationFailures:
+    """
+    Columnar collector for row-level validation failures.
+
+    Stages add chunks of (row positions, rule id, message) instead of concatenating onto
+    'Reason for Failed'. The reason text is rendered from the entries in the order they
+    were added, joining with '; ', and per-rule counts come straight from the arrays.
+    """
+
+    def __init__(self, row_count: int):
+        self.row_count = row_count
+        self._positions: List[np.ndarray] = []
+        self._rule_ids: List[str] = []
+        self._messages: List[list] = []
+
+    def add(self, rule_id: str, rows, messages) -> int:
+        """
+        Records failures for rows, given as a boolean mask or integer positions.
+        messages is one string for all rows or a list aligned to the selected rows.
+        Returns the number of entries added.
+        """
+        rows = np.asarray(rows)
+        positions = np.flatnonzero(rows) if rows.dtype == bool else rows.astype(np.int64, copy=False)
+        if len(positions) == 0:
+            return 0
+        if isinstance(messages, str):
+            messages = [messages] * len(positions)
+        else:
+            messages = list(messages)
+            if len(messages) != len(positions):
+                raise ValueError(f"Rule '{rule_id}' has {len(positions)} rows but {len(messages)} messages.")
+        self._positions.append(positions)
+        self._rule_ids.append(rule_id)
+        self._messages.append(messages)
+        return len(positions)
+
+    def render(self, existing: Optional[List[str]] = None) -> List[str]:
+        """Renders the 'Reason for Failed' text per row, optionally continuing from existing text."""
+        texts = [""] * self.row_count if existing is None else list(existing)
+        for positions, messages in zip(self._positions, self._messages):
+            for pos, message in zip(positions.tolist(), messages):
+                text = texts[pos]
+                texts[pos] = f"{text}; {message}" if text else message
+        return texts
+
+    def apply_to(self, df: pd.DataFrame) -> None:
+        """Appends the collected reasons onto df's existing 'Reason for Failed' column."""
+        df["Reason for Failed"] = self.render(df["Reason for Failed"].tolist())
+
+    def take(self, positions) -> "ValidationFailures":
+        """
+        Returns a collector for a frame made of the given rows of this one (in that order),
+        keeping only the entries of rows that survived.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        new_positions = np.full(self.row_count, -1, dtype=np.int64)
+        new_positions[positions] = np.arange(len(positions))
+
+        taken = ValidationFailures(len(positions))
+        for chunk_positions, rule_id, messages in zip(self._positions, self._rule_ids, self._messages):
+            mapped = new_positions[chunk_positions]
+            keep = mapped >= 0
+            taken.add(rule_id, mapped[keep], [message for message, kept in zip(messages, keep) if kept])
+        return taken
+
+    def rule_counts(self) -> Dict[str, int]:
+        """Number of distinct rows flagged by each rule, in the order rules first reported."""
+        rows_by_rule: Dict[str, Set[int]] = {}
+        for positions, rule_id in zip(self._positions, self._rule_ids):
+            rows_by_rule.setdefault(rule_id, set()).update(positions.tolist())
+        return {rule_id: len(rows) for rule_id, rows in rows_by_rule.items()}
+
+
 def required_field_validations(
-    df: pd.DataFrame, required_columns: List[str]
+    df: pd.DataFrame, required_columns: List[str], failures: Optional[ValidationFailures] = None
 ) -> pd.DataFrame:
     """
     Performs validation to ensure required fields are present and not empty in the DataFrame.
@@ -2252,6 +3101,8 @@ def required_field_validations(
     Args:
         df (pd.DataFrame): The input DataFrame to validate.
         required_columns (List[str]): A list of column names that are mandatory.
+        failures (ValidationFailures, optional): Shared collector to record failures in.
+            When given, 'Reason for Failed' is reset and the caller renders it later.
 
     Returns:
         pd.DataFrame: A new DataFrame with an added 'Reason for Failed' column,
@@ -2274,9 +3125,10 @@ def required_field_validations(
 
     df_copy = df.copy()
 
-    # Initialize a list of lists to store reasons for each row
-    # This is more robust than string concatenation inside a loop
-    all_row_reasons = [[] for _ in range(len(df_copy))]
+    # Reasons are collected per row and rendered into 'Reason for Failed' once
+    own_failures = failures is None
+    if own_failures:
+        failures = ValidationFailures(len(df_copy))
 
     # Check for missing required columns in the DataFrame schema
     actual_columns = set(df_copy.columns)
@@ -2286,8 +3138,7 @@ def required_field_validations(
         missing_cols_str = ', '.join(missing_cols_in_excel)
         logger.warning(f"Missing required columns in Excel file: {missing_cols_str}. Marking all rows as failed for these columns.")
         # Mark all rows as failed for missing columns
-        for i in range(len(df_copy)):
-            all_row_reasons[i].append(f"Missing required column(s): {missing_cols_str}")
+        failures.add("required_column_missing", np.ones(len(df_copy), dtype=bool), f"Missing required column(s): {missing_cols_str}")
         # Add the missing columns to the DataFrame so subsequent steps don't fail,
         # but they will contain NaN or empty strings, correctly failing validation.
         for col in missing_cols_in_excel:
@@ -2298,28 +3149,29 @@ def required_field_validations(
         if col in df_copy.columns: # Only check if the column actually exists in the DataFrame
             # Identify rows where the required column is empty or contains only whitespace
             # Convert to string to handle mixed types and NaN safely
-            empty_mask = df_copy[col].astype(str).str.strip() == ""
+            empty_mask = (df_copy[col].astype(str).str.strip() == "").to_numpy()
             
-            # Append reason for each affected row
-            for i in df_copy.index[empty_mask]:
-                all_row_reasons[i].append(f"'{col}' is required and cannot be empty")
+            # Record the reason for each affected row
+            failures.add("required_field", empty_mask, f"'{col}' is required and cannot be empty")
             logger.info(f"Validated required field '{col}'. Found {empty_mask.sum()} empty values.")
         # else: already logged in missing_cols_in_excel block or handled above.
 
-    # Consolidate all reasons for each row into the 'Reason for Failed' column
-    df_copy["Reason for Failed"] = ["; ".join(filter(None, reasons)).strip(" ;") for reasons in all_row_reasons]
-    
-    # Replace empty strings (from rows with no failures) with a proper empty string, if needed.
-    # The filter(None, ...) and strip(";") already handles this for the most part.
-    df_copy["Reason for Failed"] = df_copy["Reason for Failed"].replace("^$", "", regex=True)
+    # Required checks start a fresh 'Reason for Failed'; a shared collector is rendered by the caller
+    if own_failures:
+        df_copy["Reason for Failed"] = [reason.strip(" ;") for reason in failures.render()]
+    else:
+        df_copy["Reason for Failed"] = ""
 
     return df_copy
 
-def lookup_validations(df: pd.DataFrame, all_lookups: Dict[str, List[Dict[str, str]]]) -> pd.DataFrame:
+def lookup_validations(df: pd.DataFrame, all_lookups: Dict[str, Any], failures: Optional[ValidationFailures] = None) -> pd.DataFrame:
     """
     Performs lookup validations on the DataFrame.
+    all_lookups maps a column to its LookupItem list, or to a pre-built frozenset of
+    normalized values (see resolve_lookup_refs).
     If a column has lookup values defined but a row's data for that column is empty,
     it will be ignored and not added to the failed list for lookup validation.
+    Failures go to the shared collector when one is given, otherwise onto 'Reason for Failed'.
     """
     df_copy = df.copy()
     if "Reason for Failed" not in df_copy.columns:
@@ -2327,14 +3179,21 @@ def lookup_validations(df: pd.DataFrame, all_lookups: Dict[str, List[Dict[str, s
     else:
         df_copy["Reason for Failed"] = df_copy["Reason for Failed"].astype(str)
 
+    own_failures = failures is None
+    if own_failures:
+        failures = ValidationFailures(len(df_copy))
+
     for attribute, lookup_list in all_lookups.items():
         if attribute in df_copy.columns:
-            # FIX: Use getattr to safely access 'Value' from Pydantic LookupItem objects
-            valid_values = set(
-                str(getattr(item, 'Value', '')).strip().lower()
-                for item in lookup_list
-                if getattr(item, 'Value', '') is not None and str(getattr(item, 'Value', '')).strip() != ''
-            )
+            if isinstance(lookup_list, frozenset):
+                valid_values = lookup_list
+            else:
+                # FIX: Use getattr to safely access 'Value' from Pydantic LookupItem objects
+                valid_values = set(
+                    str(getattr(item, 'Value', '')).strip().lower()
+                    for item in lookup_list
+                    if getattr(item, 'Value', '') is not None and str(getattr(item, 'Value', '')).strip() != ''
+                )
             
             # If no valid values are defined for a lookup, skip validation for this attribute entirely
             if not valid_values:
@@ -2345,14 +3204,16 @@ def lookup_validations(df: pd.DataFrame, all_lookups: Dict[str, List[Dict[str, s
             is_valid_lookup = df_copy[attribute].astype(str).str.strip().str.lower().isin(valid_values)
             
             # An invalid lookup occurs if the value is NOT empty AND is NOT a valid lookup value
-            invalid_mask = (~is_empty_in_row_data) & (~is_valid_lookup)
-            df_copy.loc[invalid_mask, "Reason for Failed"] += f"; Invalid lookup value for {attribute}"
+            invalid_mask = ((~is_empty_in_row_data) & (~is_valid_lookup)).to_numpy()
+            failures.add("lookup", invalid_mask, f"Invalid lookup value for {attribute}")
             logger.info(f"Validated lookup for '{attribute}'. Found {invalid_mask.sum()} invalid values (excluding empty row data).")
         else:
             logger.warning(f"Lookup attribute '{attribute}' not found in DataFrame columns. Skipping lookup validation for this column.")
     
-    # Clean up the "Reason for Failed" column
-    df_copy["Reason for Failed"] = df_copy["Reason for Failed"].str.strip(" ;").replace("^$", "", regex=True)
+    if own_failures:
+        failures.apply_to(df_copy)
+        # Clean up the "Reason for Failed" column
+        df_copy["Reason for Failed"] = df_copy["Reason for Failed"].str.strip(" ;").replace("^$", "", regex=True)
     return df_copy
 
 
@@ -2364,8 +3225,7 @@ def transformation_for_validation(excel_file_io: BytesIO):
     """
     # Load the mapping from the Excel file (same as apply_transformation_and_download)
     mapping_file_path = TRANSFORMATION_ATTRIBUTES_FILE_PATH
-    mapping_df = pd.read_excel(mapping_file_path, engine="openpyxl")
-    mapping_df.columns = [col.strip() for col in mapping_df.columns]
+    mapping_df = REFERENCE_DATA_CACHE.get(mapping_file_path, load_transformation_rules_frame)
     mapping_dict = mapping_df[['Attributes for Transformation', 'Transformation Map Name']].set_index('Attributes for Transformation')['Transformation Map Name'].fillna('').to_dict()
     mapping_dict = {k: v.strip() for k, v in mapping_dict.items()}
 
@@ -2442,12 +3302,24 @@ class LookupItem(BaseModel):
     Enabled_Flag: str
     Effective_Date: str
 
+# Reference to a server-side lookup set, used instead of sending the LookupItem list
+class LookupSetRef(BaseModel):
+    attribute: str # HDL_Attribute_Name in the LookupData workbook
+    codeName: Optional[str] = None # CODE_Name; None takes every row batch returns for the attribute, like the allLookups list
+    componentName: Optional[str] = None # Defaults to the payload's componentName
+    globalBoName: Optional[str] = None # Defaults to the payload's globalBoName
+    transaction: bool = False # Same flag as /api/hdl/lookup/batch: also the rows with empty BO_NAME/COMP_NAME
+    version: Optional[str] = None # 'version' from /api/hdl/lookup/batch or /api/hdl/lookup/sets; stale versions get a 409
+    customerName: Optional[str] = None # Defaults to the payload's customerName
+    instanceName: Optional[str] = None # Defaults to the payload's InstanceName
+
 # Pydantic model for the entire validation payload
 class ValidatePayload(BaseModel):
     pyFileName: Optional[str] = None
     componentName: str
     attributes: List[AttributeConfig]
-    allLookups: Dict[str, List[LookupItem]]
+    allLookups: Dict[str, List[LookupItem]] = Field(default_factory=dict)
+    lookupRefs: Optional[Dict[str, LookupSetRef]] = None # Column -> server-side lookup set; overrides allLookups for that column
     allMapping: Dict[str, Any] # Assuming mapping can be flexible
     excelFile: str # Base64 encoded Excel file content
     globalBoName: Optional[str] = None
@@ -2511,51 +3383,114 @@ DATA_TYPE_MAPPING = {
     "BOOL": "boolean",
 }
 
-def validate_data_types(df: pd.DataFrame, attributes: List[AttributeConfig]) -> pd.DataFrame:
+BOOLEAN_TOKENS = frozenset(["TRUE", "FALSE", "1", "0"])
+
+# Last datetime format that parsed a column, reused as the fast path on the next upload
+DATE_FORMAT_CACHE: Dict[str, str] = {}
+
+
+def _integer_failures(values: list) -> np.ndarray:
+    return np.fromiter((not str(val).isdigit() for val in values), dtype=bool, count=len(values))
+
+
+def _float_failures(values: list) -> np.ndarray:
+    # to_numeric handles the bulk; anything it could not parse is confirmed with float()
+    parsed = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy()
+    is_plain = np.fromiter(
+        (isinstance(val, (str, int, float, np.integer, np.floating)) for val in values),
+        dtype=bool, count=len(values)
+    )
+    failures = np.zeros(len(values), dtype=bool)
+    for pos in np.flatnonzero(pd.isna(parsed) | ~is_plain):
+        try:
+            float(values[pos])
+        except Exception:
+            failures[pos] = True
+    return failures
+
+
+def _boolean_failures(values: list) -> np.ndarray:
+    normalized = pd.Series([str(val).strip().upper() for val in values], dtype=object)
+    return ~normalized.isin(BOOLEAN_TOKENS).to_numpy()
+
+
+def _date_failures(values: list, col: str) -> np.ndarray:
+    is_timestamp = np.fromiter((isinstance(val, pd.Timestamp) for val in values), dtype=bool, count=len(values))
+    is_text = np.fromiter((isinstance(val, str) for val in values), dtype=bool, count=len(values))
+    parsed_ok = is_timestamp.copy()
+
+    text_positions = np.flatnonzero(is_text)
+    if len(text_positions):
+        texts = pd.Series([values[pos] for pos in text_positions], dtype=object)
+        date_format = DATE_FORMAT_CACHE.get(col) or guess_datetime_format(texts.iloc[0])
+        if date_format:
+            parsed = pd.to_datetime(texts, format=date_format, errors="coerce")
+            text_ok = parsed.notna().to_numpy()
+            if text_ok.any():
+                DATE_FORMAT_CACHE[col] = date_format
+            elif col in DATE_FORMAT_CACHE:
+                # Stale format from an earlier upload; guess again from this column
+                del DATE_FORMAT_CACHE[col]
+            parsed_ok[text_positions] = text_ok
+
+    # Values the vectorized parse did not accept go through the scalar parser to decide
+    failures = np.zeros(len(values), dtype=bool)
+    for pos in np.flatnonzero(~parsed_ok):
+        try:
+            pd.to_datetime(values[pos], errors='raise')
+        except Exception:
+            failures[pos] = True
+    return failures
+
+
+def validate_data_types(df: pd.DataFrame, attributes: List[AttributeConfig], failures: Optional[ValidationFailures] = None) -> pd.DataFrame:
     """
     Validate each column's values against its expected data_type.
-    Updates 'Reason for Failed' column with errors.
+    Records errors in the shared collector when given, otherwise updates 'Reason for Failed'.
     Supports mapping of SQL/HCM types to Python types.
+    Each column is checked in one pass that yields a failure mask, and reasons are merged in bulk.
     """
+    own_failures = failures is None
+    if own_failures:
+        failures = ValidationFailures(len(df))
+
     for attr in attributes:
         col = attr.Attributes
         dtype_raw = attr.data_type.upper()
         expected_type = DATA_TYPE_MAPPING.get(dtype_raw)
 
         if not expected_type:
-            # Unknown type, skip or log
-            for idx in df.index:
-                existing_reason = df.at[idx, "Reason for Failed"]
-                df.at[idx, "Reason for Failed"] = f"{existing_reason}; Unknown data_type '{attr.data_type}' specified for column." if existing_reason else f"Unknown data_type '{attr.data_type}' specified for column."
+            # Unknown type, flag every row
+            failures.add("data_type_unknown", np.ones(len(df), dtype=bool), f"Unknown data_type '{attr.data_type}' specified for column.")
             continue
 
         if col not in df.columns:
             continue  # Skip missing columns
 
-        for idx, val in df[col].items():
-            if val == "" or pd.isna(val):
-                continue  # Empty values handled by required field validation
-            reason = ""
-            try:
-                if expected_type == "string":
-                    str(val)
-                elif expected_type == "integer":
-                    if not str(val).isdigit():
-                        reason = f"Expected integer but got '{val}'"
-                elif expected_type == "float":
-                    float(val)
-                elif expected_type == "boolean":
-                    if str(val).strip().upper() not in ["TRUE", "FALSE", "1", "0"]:
-                        reason = f"Expected boolean (TRUE/FALSE/1/0) but got '{val}'"
-                elif expected_type == "date":
-                    pd.to_datetime(val, errors='raise')
-            except Exception:
-                reason = f"Value '{val}' does not match expected data_type '{expected_type}'"
+        if expected_type == "string":
+            continue  # Any value can be represented as a string
+
+        column = df[col]
+        # Empty values handled by required field validation
+        checked_mask = ~(column.isna() | (column == "")).to_numpy(dtype=bool)
+        if not checked_mask.any():
+            continue
+        values = column[checked_mask].tolist()
+
+        if expected_type == "integer":
+            failed = _integer_failures(values)
+            reasons = [f"Expected integer but got '{val}'" for val, is_failed in zip(values, failed) if is_failed]
+        elif expected_type == "boolean":
+            failed = _boolean_failures(values)
+            reasons = [f"Expected boolean (TRUE/FALSE/1/0) but got '{val}'" for val, is_failed in zip(values, failed) if is_failed]
+        else:
+            failed = _float_failures(values) if expected_type == "float" else _date_failures(values, col)
+            reasons = [f"Value '{val}' does not match expected data_type '{expected_type}'" for val, is_failed in zip(values, failed) if is_failed]
 
-            if reason:
-                existing_reason = df.at[idx, "Reason for Failed"]
-                df.at[idx, "Reason for Failed"] = f"{existing_reason}; {reason}" if existing_reason else reason
+        failures.add("data_type", np.flatnonzero(checked_mask)[failed], reasons)
 
+    if own_failures:
+        failures.apply_to(df)
     return df
 
 def apply_workrelationship_rules(df: pd.DataFrame,
@@ -2626,6 +3561,95 @@ def apply_workrelationship_rules(df: pd.DataFrame,
 
     return df_final
 
+#------------- Worker processes ------------------#
+# Process pools are started with spawn (not fork): the server runs request, job and bundle
+# threads, and a forked child could inherit a lock one of them held (logging, caches) and hang.
+WORKER_PROCESS_START_METHOD = os.getenv("WORKER_PROCESS_START_METHOD", "spawn")
+
+
+class WorkerProcessPools:
+    """
+    Long-lived process pools, one per worker count, created on first use and shut down with the
+    app, so worker processes (and their import of this module) are reused across requests.
+    """
+
+    def __init__(self, start_method: str):
+        self._context = multiprocessing.get_context(start_method)
+        self._pools: Dict[int, ProcessPoolExecutor] = {}
+        self._lock = threading.Lock()
+
+    def get(self, workers: int) -> ProcessPoolExecutor:
+        with self._lock:
+            pool = self._pools.get(workers)
+            if pool is None or getattr(pool, "_broken", False):
+                # A worker that died takes its pool down with it, so start a fresh one
+                if pool is not None:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                pool = self._pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=self._context)
+            return pool
+
+    def shutdown(self):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+WORKER_PROCESS_POOLS = WorkerProcessPools(WORKER_PROCESS_START_METHOD)
+
+
+@app.on_event("shutdown")
+async def shutdown_worker_process_pools():
+    await asyncio.to_thread(WORKER_PROCESS_POOLS.shutdown)
+
+
+#------------- Person timeline executor ------------------#
+# Per-person rules are independent across PersonNumbers, so large frames are split by a hash of
+# PersonNumber and the partitions run in worker processes.
+TIMELINE_VALIDATION_WORKERS = int(os.getenv("TIMELINE_VALIDATION_WORKERS", "0"))
+TIMELINE_PARALLEL_MIN_ROWS = int(os.getenv("TIMELINE_PARALLEL_MIN_ROWS", "20000"))
+
+
+def partition_by_person(df: pd.DataFrame, person_col: str, partitions: int) -> List[np.ndarray]:
+    """Row positions of df split into `partitions` buckets by a stable hash of person_col."""
+    buckets = pd.util.hash_pandas_object(df[person_col], index=False).to_numpy() % np.uint64(partitions)
+    return [np.flatnonzero(buckets == bucket) for bucket in range(partitions)]
+
+
+def run_person_timelines(df: pd.DataFrame, person_col: str, func, *args, workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Runs func(frame, *args), a per-person rule that returns rows grouped in PersonNumber order
+    (as groupby yields them). With TIMELINE_VALIDATION_WORKERS > 1 and at least
+    TIMELINE_PARALLEL_MIN_ROWS rows, df is partitioned by person, the partitions run in a process
+    pool and the results are merged back into person order, so the output matches a single call.
+    """
+    workers = TIMELINE_VALIDATION_WORKERS if workers is None else workers
+    if workers <= 1 or len(df) < TIMELINE_PARALLEL_MIN_ROWS or person_col not in df.columns:
+        return func(df, *args)
+
+    positions = [positions for positions in partition_by_person(df, person_col, workers) if len(positions)]
+    partitions = [df.iloc[partition_positions] for partition_positions in positions]
+    if len(partitions) <= 1:
+        return func(df, *args)
+
+    started = time.perf_counter()
+    pool = WORKER_PROCESS_POOLS.get(workers)
+    results = list(pool.map(func, partitions, *[[arg] * len(partitions) for arg in args]))
+    if all(result.index.equals(partition.index) for result, partition in zip(results, partitions)):
+        # func handed every partition back row for row (e.g. a required column is missing),
+        # so the single call would have returned df in its original row order
+        merged = pd.concat(results)
+        merged = merged.iloc[np.argsort(np.concatenate(positions), kind="stable")]
+    else:
+        merged = pd.concat(results, ignore_index=True)
+        # Each person lives in one partition, so a stable sort on the person's group rank (factorize sorts
+        # keys the way groupby does, mixed types included) restores the single-call order
+        person_rank, _ = pd.factorize(merged[person_col], sort=True)
+        merged = merged.iloc[np.argsort(person_rank, kind="stable")].reset_index(drop=True)
+    logger.info(f"{func.__name__} ran over {len(partitions)} person partitions in {time.perf_counter() - started:.2f}s.")
+    return merged
+
+
 def safe_format_date(val):
     if pd.isna(val) or val is None:
         return None
@@ -2638,6 +3662,454 @@ def safe_format_date(val):
         return None
 
 
+DAT_WRITE_CHUNK_ROWS = 50000
+
+
+def frame_numpy_dtype(df: pd.DataFrame) -> np.dtype:
+    """
+    The dtype of df.to_numpy(), which iterrows() boxes rows from, without converting the frame.
+    It depends on which nullable (Int64, boolean) columns hold NA, so the sample keeps one such row per column.
+    """
+    positions = {0}
+    for position in range(df.shape[1]):
+        missing = np.flatnonzero(df.iloc[:, position].isna().to_numpy())
+        if len(missing):
+            positions.add(int(missing[0]))
+    return df.iloc[sorted(positions) if len(df) else []].to_numpy().dtype
+
+
+def frame_column_values(df: pd.DataFrame, position: int, common_dtype: Optional[np.dtype] = None) -> np.ndarray:
+    """
+    Values of the column at position, boxed the way iterrows() hands them out: cast to the
+    frame's common dtype (object for mixed frames, e.g. a float for ints in an all-numeric frame).
+    """
+    if common_dtype is None:
+        common_dtype = df.iloc[:0].to_numpy().dtype
+    try:
+        return df.iloc[:, position].to_numpy(dtype=common_dtype)
+    except ValueError:
+        # Nullable columns holding NA cannot be cast to a numpy bool/int dtype
+        return df.iloc[:, position].to_numpy(dtype=object)
+
+
+def format_dat_column(series: pd.Series, values: np.ndarray, date_format: Optional[str] = "%Y/%m/%d") -> list:
+    """
+    Formats one column for a DAT file. Datetime columns use date_format with NaT as '',
+    everything else is str(value) with None as ''. Without a date_format every value is str(value).
+    """
+    if date_format is None:
+        return [str(value) for value in values]
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.strftime(date_format).fillna("").tolist()
+    if values.dtype == object and pd.api.types.infer_dtype(values, skipna=False) == "string":
+        return values.tolist()
+    return [str(value) if value is not None else '' for value in values]
+
+
+def _datetime_like_rows(chunk: pd.DataFrame, column_values: List[np.ndarray]) -> np.ndarray:
+    """
+    Positions of rows made only of datetime-like and null values. A row Series built from
+    such values is inferred as datetime64 (nulls become NaT), so they are formatted row by row.
+    """
+    mask = np.ones(len(chunk), dtype=bool)
+    for position, values in enumerate(column_values):
+        if chunk.dtypes.iloc[position].kind in "mM":
+            continue
+        if values.dtype == object and pd.api.types.infer_dtype(values, skipna=False) == "string":
+            return np.empty(0, dtype=np.int64)
+        mask &= pd.isna(values) | np.fromiter(
+            (isinstance(value, (datetime, timedelta, np.datetime64, np.timedelta64)) for value in values),
+            dtype=bool, count=len(values)
+        )
+        if not mask.any():
+            break
+    return np.flatnonzero(mask)
+
+
+def _string_like_null_rows(chunk: pd.DataFrame, column_values: List[np.ndarray]) -> np.ndarray:
+    """
+    Positions of rows made only of strings and nulls that hold a None or pd.NA. A row Series
+    built from such values is inferred as str, so every null in them renders as 'nan'.
+    """
+    candidates = np.zeros(len(chunk), dtype=bool)
+    for values in column_values:
+        null_positions = np.flatnonzero(pd.isna(values))
+        if len(null_positions):
+            candidates[null_positions] |= np.fromiter(
+                (values[position] is None or values[position] is pd.NA for position in null_positions),
+                dtype=bool, count=len(null_positions)
+            )
+    rows = []
+    for row_position in np.flatnonzero(candidates):
+        row_values = [values[row_position] for values in column_values]
+        if any(isinstance(value, str) for value in row_values) and all(
+            isinstance(value, str) or value is None or value is pd.NA or (isinstance(value, float) and math.isnan(value))
+            for value in row_values
+        ):
+            rows.append(row_position)
+    return np.array(rows, dtype=np.int64)
+
+
+def _dat_line_from_row(chunk: pd.DataFrame, row_values: np.ndarray, date_format: Optional[str]) -> str:
+    row = pd.Series(row_values, index=chunk.columns)
+    if date_format is None:
+        return "|".join([str(x) for x in row])
+    formatted_values = []
+    for col_name, value in row.items():
+        if pd.api.types.is_datetime64_any_dtype(chunk[col_name]):
+            formatted_values.append('' if pd.isna(value) else value.strftime(date_format))
+        else:
+            formatted_values.append(str(value) if value is not None else '')
+    return "|".join(formatted_values)
+
+
+DAT_GROUP_PATTERN = re.compile(r"(W\d+)", re.IGNORECASE)
+DAT_GROUP_INDEX_SUFFIX = ".groups.npz"
+DAT_GROUP_INDEX_VERSION = 1
+
+
+def dat_group_index_path(dat_path: Path) -> Path:
+    """Sidecar holding the DatGroupIndex of dat_path ('<name>.dat.groups.npz')."""
+    return Path(dat_path).with_name(Path(dat_path).name + DAT_GROUP_INDEX_SUFFIX)
+
+
+class DatGroupIndex:
+    """
+    Bundle W-group of every record of a DAT file, with the byte layout needed to copy
+    records into a bundle instead of re-parsing them.
+
+    The grouping is the one /api/hdl/download-bundle applies: under a 'METADATA|' header
+    with a SourceSystemId column, each non-empty line goes to the W{n} found in that
+    column (W1 when there is none, or for w1); otherwise every line goes to W1 as is.
+    For every line after the header it keeps the byte length, the content length
+    (without the terminator), the group code (-1 for skipped lines) and flags.
+    write_dat_file builds it while writing passed data; other files are scanned once.
+    Either way it is saved next to the file and reused while the file is unchanged.
+    """
+
+    NEEDS_STRIP = 1
+    NEWLINE_OK = 2
+
+    def __init__(self, first_line: str, terminator: str):
+        self.header = first_line.strip()
+        self.has_header = self.header.startswith("METADATA|")
+        self.sid_index = -1
+        if self.has_header:
+            for i, column in enumerate(self.header.split("|")):
+                if "SourceSystemId" in column: # Checks for "SourceSystemId" or "PersonId(SourceSystemId)"
+                    self.sid_index = i
+                    break
+        self.groups: List[str] = []
+        self._group_codes: Dict[str, int] = {}
+        self.line_bytes = array("I")
+        self.content_bytes = array("I")
+        self.codes = array("i")
+        self.flags = array("B")
+        self.short_lines = 0
+        self.size = 0
+        self.mtime_ns = 0
+        self.data_start = 0
+        if self.has_header:
+            self.data_start = self.text_size(first_line) + len(terminator)
+        else:
+            # Without the header every line, the first one included, is W1 data
+            self.add_lines([first_line], terminator)
+
+    @staticmethod
+    def text_size(text: str) -> int:
+        return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+    def _code(self, group_key: str) -> int:
+        code = self._group_codes.get(group_key)
+        if code is None:
+            code = self._group_codes[group_key] = len(self.groups)
+            self.groups.append(group_key)
+        return code
+
+    def _record_code(self, stripped: str) -> int:
+        if not stripped:
+            return -1
+        fields = stripped.split("|", self.sid_index + 1)
+        if len(fields) <= self.sid_index:
+            self.short_lines += 1
+            return self._code("W1")
+        match = DAT_GROUP_PATTERN.search(fields[self.sid_index])
+        if match is None or match.group(1).upper() == "W1":
+            return self._code("W1")
+        return self._code(match.group(1))
+
+    def add_lines(self, lines: List[str], terminators):
+        """Indexes lines (without their terminators); terminators is one string for all of them or a list."""
+        if isinstance(terminators, str):
+            terminators = [terminators] * len(lines)
+        stripped = list(map(str.strip, lines))
+        if self.sid_index == -1:
+            codes = [self._code("W1")] * len(lines)
+        else:
+            codes = list(map(self._record_code, stripped))
+        sizes = list(map(len, lines)) if "".join(lines).isascii() else list(map(self.text_size, lines))
+        newline = os.linesep
+        self.content_bytes.extend(sizes)
+        self.line_bytes.extend([size + len(terminator) for size, terminator in zip(sizes, terminators)])
+        self.codes.extend(codes)
+        self.flags.extend([
+            (self.NEEDS_STRIP if clean != line else 0) | (self.NEWLINE_OK if terminator == newline else 0)
+            for clean, line, terminator in zip(stripped, lines, terminators)
+        ])
+
+    @classmethod
+    def scan(cls, dat_path: Path) -> Optional["DatGroupIndex"]:
+        """Indexes dat_path by reading it once; None for an empty file. Read and decode errors propagate."""
+        index = None
+        contents: List[str] = []
+        terminators: List[str] = []
+        with open(dat_path, "r", encoding="utf-8", newline="") as f:
+            for line in f:
+                if line.endswith("\r\n"):
+                    content, terminator = line[:-2], "\r\n"
+                elif line.endswith(("\n", "\r")):
+                    content, terminator = line[:-1], line[-1]
+                else:
+                    content, terminator = line, ""
+                if index is None:
+                    index = cls(content, terminator)
+                    continue
+                contents.append(content)
+                terminators.append(terminator)
+                if len(contents) >= DAT_WRITE_CHUNK_ROWS:
+                    index.add_lines(contents, terminators)
+                    contents, terminators = [], []
+        if contents:
+            index.add_lines(contents, terminators)
+        if index is not None:
+            index.stamp(dat_path)
+            if index.short_lines:
+                logger.warning(f"File '{Path(dat_path).name}': {index.short_lines} data lines have fewer columns than its 'SourceSystemId' index ({index.sid_index}). Grouped as 'W1'.")
+        return index
+
+    def stamp(self, dat_path: Path):
+        stat = os.stat(dat_path)
+        self.size, self.mtime_ns = stat.st_size, stat.st_mtime_ns
+
+    def first_seen(self) -> Dict[str, int]:
+        """Group -> index of its first line, for the groups that have lines."""
+        codes = np.asarray(self.codes)
+        present = codes >= 0
+        unique_codes, first = np.unique(codes[present], return_index=True)
+        positions = np.flatnonzero(present)[first]
+        return {self.groups[code]: int(position) for code, position in zip(unique_codes.tolist(), positions.tolist())}
+
+    def meta(self) -> dict:
+        return {
+            "version": DAT_GROUP_INDEX_VERSION, "size": self.size, "mtime_ns": self.mtime_ns,
+            "newline": os.linesep, "header": self.header, "has_header": self.has_header,
+            "sid_index": self.sid_index, "data_start": self.data_start, "groups": self.groups,
+            "first_seen": self.first_seen(),
+        }
+
+    def save(self, dat_path: Path):
+        meta = self.meta()
+        sidecar = dat_group_index_path(dat_path)
+        tmp_path = sidecar.with_name(sidecar.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f, meta=np.array(json.dumps(meta)), line_bytes=np.asarray(self.line_bytes),
+                content_bytes=np.asarray(self.content_bytes), codes=np.asarray(self.codes), flags=np.asarray(self.flags)
+            )
+        os.replace(tmp_path, sidecar)
+
+    @staticmethod
+    def load_meta(dat_path: Path) -> Optional[dict]:
+        """Metadata of dat_path's sidecar, or None when there is none or it no longer matches the file."""
+        try:
+            stat = os.stat(dat_path)
+            with np.load(dat_group_index_path(dat_path), allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+        except (OSError, ValueError, KeyError):
+            return None
+        if (meta.get("version") != DAT_GROUP_INDEX_VERSION or meta.get("newline") != os.linesep
+                or meta.get("size") != stat.st_size or meta.get("mtime_ns") != stat.st_mtime_ns):
+            return None
+        return meta
+
+    @classmethod
+    def load(cls, dat_path: Path) -> Optional["DatGroupIndex"]:
+        meta = cls.load_meta(dat_path)
+        if meta is None:
+            return None
+        index = cls.__new__(cls)
+        index.header, index.has_header, index.sid_index = meta["header"], meta["has_header"], meta["sid_index"]
+        index.data_start = meta["data_start"]
+        index.groups = meta["groups"]
+        index._group_codes = {group_key: code for code, group_key in enumerate(index.groups)}
+        index.size, index.mtime_ns, index.short_lines = meta["size"], meta["mtime_ns"], 0
+        try:
+            with np.load(dat_group_index_path(dat_path), allow_pickle=False) as data:
+                index.line_bytes, index.content_bytes = data["line_bytes"], data["content_bytes"]
+                index.codes, index.flags = data["codes"], data["flags"]
+        except (OSError, ValueError, KeyError):
+            return None
+        return index
+
+    def group_ranges(self, group_key: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (start, end, needs_strip) byte ranges of group_key's lines in file order. Adjacent lines that
+        need no stripping and are separated by the platform newline are merged into one range.
+        """
+        code = self._group_codes.get(group_key)
+        codes = np.asarray(self.codes)
+        lines = np.flatnonzero(codes == code) if code is not None else np.empty(0, dtype=np.int64)
+        line_bytes = np.asarray(self.line_bytes, dtype=np.int64)
+        starts = self.data_start + np.cumsum(line_bytes) - line_bytes
+        flags = np.asarray(self.flags)[lines]
+        clean = (flags & self.NEEDS_STRIP) == 0
+        joined = np.zeros(len(lines), dtype=bool)
+        joined[1:] = (lines[1:] == lines[:-1] + 1) & clean[1:] & clean[:-1] & ((flags[:-1] & self.NEWLINE_OK) != 0)
+        first = np.flatnonzero(~joined)
+        last = np.append(first[1:], len(lines)) - 1
+        range_starts = starts[lines[first]]
+        range_ends = starts[lines[last]] + np.asarray(self.content_bytes, dtype=np.int64)[lines[last]]
+        return range_starts, range_ends, ~clean[first]
+
+
+def write_dat_file(df: pd.DataFrame, file_path: Path, date_format: Optional[str] = "%Y/%m/%d", chunk_rows: int = DAT_WRITE_CHUNK_ROWS, group_index: bool = False) -> int:
+    """
+    Writes df as a pipe-delimited DAT file (header line, then one line per row).
+    Columns are formatted a whole chunk at a time and each chunk is written with a single call.
+    With group_index the bundle W-group of every line is recorded as it is written and saved as
+    the file's DatGroupIndex sidecar (skipped when a value contains a line break).
+    Returns the number of rows written.
+    """
+    header_line = "|".join([str(col) for col in df.columns])
+    index = DatGroupIndex(header_line, os.linesep) if group_index and not re.search(r"[\r\n]", header_line) else None
+    # Every chunk is boxed with the whole frame's dtype, as iterrows() over df would
+    common_dtype = frame_numpy_dtype(df) if df.shape[1] else None
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(header_line + "\n")
+        for start in range(0, len(df), chunk_rows):
+            chunk = df.iloc[start:start + chunk_rows]
+            if chunk.shape[1] == 0:
+                f.write("\n" * len(chunk))
+                if index is not None:
+                    index.add_lines([""] * len(chunk), os.linesep)
+                continue
+            column_values = [frame_column_values(chunk, position, common_dtype) for position in range(chunk.shape[1])]
+            columns = [
+                format_dat_column(chunk.iloc[:, position], values, date_format)
+                for position, values in enumerate(column_values)
+            ]
+            lines = list(map("|".join, zip(*columns)))
+            for row_position in _datetime_like_rows(chunk, column_values):
+                row_values = np.array([values[row_position] for values in column_values], dtype=object)
+                lines[row_position] = _dat_line_from_row(chunk, row_values, date_format)
+            for row_position in _string_like_null_rows(chunk, column_values):
+                lines[row_position] = "|".join(
+                    [value if isinstance(value, str) else "nan" for value in (values[row_position] for values in column_values)]
+                )
+            text = "\n".join(lines)
+            f.write(text + "\n")
+            if index is not None:
+                # A value holding a line break splits its row when the file is read back
+                if "\r" in text or text.count("\n") != len(lines) - 1:
+                    index = None
+                else:
+                    index.add_lines(lines, os.linesep)
+    if index is not None:
+        try:
+            index.stamp(file_path)
+            index.save(file_path)
+        except Exception as e:
+            logger.warning(f"Could not save the group index of '{file_path}': {e}")
+    return len(df)
+
+
+SOURCE_KEY_PLACEHOLDER = re.compile(r'\{([^}]+)\}')
+
+
+def compile_source_key_template(template: str) -> List[Tuple[str, bool]]:
+    """
+    Splits a sourceKeys template such as '{PersonNumber}_{Iterator}' into (text, is_reference) segments.
+    """
+    parts = SOURCE_KEY_PLACEHOLDER.split(str(template))
+    return [(part, index % 2 == 1) for index, part in enumerate(parts) if part or index % 2 == 1]
+
+
+class IterrowsStrings:
+    """
+    str() of each value as the row Series from df.iterrows() hand it out, a column at a time.
+    Rows pandas infers as datetime64 show nulls as NaT, and rows of only strings and nulls
+    are inferred as str, so every null in them reads 'nan' (see write_dat_file).
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        common_dtype = frame_numpy_dtype(df) if df.shape[1] else None
+        self.column_values = [frame_column_values(df, position, common_dtype) for position in range(df.shape[1])]
+        if df.shape[1]:
+            self.datetime_rows = [
+                (row_position, pd.Series(df.iloc[row_position:row_position + 1].to_numpy()[0], index=df.columns))
+                for row_position in _datetime_like_rows(df, self.column_values)
+            ]
+            self.string_rows = _string_like_null_rows(df, self.column_values)
+        else:
+            self.datetime_rows, self.string_rows = [], np.empty(0, dtype=np.int64)
+
+    def column(self, name: str) -> np.ndarray:
+        values = self.column_values[self.df.columns.get_loc(name)]
+        strings = np.array(list(map(str, values)), dtype=object)
+        for row_position in self.string_rows:
+            value = values[row_position]
+            strings[row_position] = value if isinstance(value, str) else "nan"
+        for row_position, row in self.datetime_rows:
+            strings[row_position] = str(row.get(name, ''))
+        return strings
+
+
+def compute_source_key_iterator(df: pd.DataFrame, personnumber_col: Optional[str], actioncode_col: Optional[str], actions: List[str]) -> np.ndarray:
+    """
+    {Iterator} value per row: the running count of hire / global transfer / rehire actions,
+    restarting whenever PersonNumber changes from the previous row.
+    """
+    row_strings = IterrowsStrings(df)
+    if actioncode_col:
+        action_values = row_strings.column(actioncode_col)
+        hits = pd.Series(action_values, dtype=object).str.strip().str.upper().isin(actions).to_numpy()
+    else:
+        hits = np.zeros(len(df), dtype=bool)
+    if not personnumber_col:
+        return np.cumsum(hits)
+    person_values = row_strings.column(personnumber_col)
+    person_changed = np.ones(len(df), dtype=bool)
+    person_changed[1:] = person_values[1:] != person_values[:-1]
+    return pd.Series(hits.astype(np.int64)).groupby(np.cumsum(person_changed)).cumsum().to_numpy()
+
+
+def expand_source_keys(df: pd.DataFrame, source_keys: Dict[str, str], iterator: np.ndarray) -> pd.DataFrame:
+    """
+    Builds one column per sourceKeys entry by concatenating the template's literal text with the
+    referenced columns ({Iterator} uses iterator; unknown columns expand to '').
+    """
+    row_strings = IterrowsStrings(df)
+    reference_strings: Dict[str, np.ndarray] = {"Iterator": np.array(list(map(str, iterator)), dtype=object)}
+
+    def strings_for(reference: str) -> np.ndarray:
+        if reference not in reference_strings:
+            if reference in df.columns:
+                reference_strings[reference] = row_strings.column(reference)
+            else:
+                reference_strings[reference] = np.full(len(df), "", dtype=object)
+        return reference_strings[reference]
+
+    source_keys_data = {}
+    for key, template in source_keys.items():
+        expanded = np.full(len(df), "", dtype=object)
+        for text, is_reference in compile_source_key_template(template):
+            expanded = expanded + (strings_for(text) if is_reference else text)
+        # As a list, so the column gets the dtype the row-wise lists had (float64 when empty)
+        source_keys_data[key] = expanded.tolist()
+    return pd.DataFrame(source_keys_data, index=df.index)
+
+
 def load_validation_module(file_path: Path):
     spec = importlib.util.spec_from_file_location(file_path.stem, file_path)
     module = importlib.util.module_from_spec(spec)
@@ -2645,6 +4117,155 @@ def load_validation_module(file_path: Path):
     return module
 
 
+#------------- Custom validation engine ------------------#
+# Saved validate_row / validate_frame modules are compiled once per file content and
+# run over plain record dicts, optionally split across worker processes.
+CUSTOM_VALIDATION_WORKERS = int(os.getenv("CUSTOM_VALIDATION_WORKERS", "0"))
+CUSTOM_VALIDATION_CHUNK_ROWS = int(os.getenv("CUSTOM_VALIDATION_CHUNK_ROWS", "5000"))
+
+
+class ValidationModuleCache:
+    """
+    Cache of the modules under uploads/saved_code, keyed on (resolved path, sha256 of the source).
+    Saving new code changes the hash, so the next request compiles the new version.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[str, Any]] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, file_path: Path):
+        """Returns (module, sha256) for file_path, re-executing it only when its content changed."""
+        file_path = Path(file_path)
+        key = str(file_path.resolve())
+        digest = hashlib.sha256(file_path.read_bytes()).hexdigest()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == digest:
+                self.hits += 1
+                return entry[1], digest
+
+            self.misses += 1
+            module = load_validation_module(file_path)
+            self._entries[key] = (digest, module)
+            return module, digest
+
+    def invalidate(self, file_path: Optional[Path] = None):
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(Path(file_path).resolve()), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "modules": sorted(Path(path).name for path in self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+VALIDATION_MODULE_CACHE = ValidationModuleCache()
+
+
+def run_validate_row_chunk(file_path: str, records: List[dict], labels: list, start_position: int):
+    """
+    Runs the saved module's validate_row over one chunk of records.
+    Returns ([(position, reason)] for rows that failed, [(position, message)] for rows that raised).
+    Also used as the ProcessPoolExecutor task, where the module is loaded through the worker's own cache.
+    """
+    module, _ = VALIDATION_MODULE_CACHE.get(Path(file_path))
+    validate_row = module.validate_row
+    failed, errored = [], []
+    for offset, (record, idx) in enumerate(zip(records, labels)):
+        try:
+            is_valid, reason = validate_row(record, idx)
+            # Normalize outputs
+            is_valid = bool(is_valid)
+            reason = str(reason).strip() if reason else ""
+            if not is_valid:
+                failed.append((start_position + offset, reason))
+        except Exception as row_err:
+            # Catch row-level exceptions, log but continue
+            logger.error(f"Custom validation failed for row {idx}: {row_err}", exc_info=True)
+            errored.append((start_position + offset, f"Custom validation error: {row_err}"))
+    return failed, errored
+
+
+def run_validate_frame(module, df: pd.DataFrame):
+    """
+    Calls the saved module's validate_frame(df), which must return (valid_mask, reasons):
+    a boolean per row and either one reason string or one reason per row.
+    Returns the same shape as run_validate_row_chunk.
+    """
+    valid_mask, reasons = module.validate_frame(df.copy())
+    valid_mask = np.asarray(valid_mask, dtype=bool)
+    if valid_mask.shape != (len(df),):
+        raise ValueError(f"validate_frame returned {valid_mask.shape[0] if valid_mask.ndim else 1} flags for {len(df)} rows")
+    if isinstance(reasons, str) or reasons is None:
+        reasons = [reasons] * len(df)
+    reasons = list(reasons)
+    failed = [
+        (int(position), str(reasons[position]).strip() if reasons[position] else "")
+        for position in np.flatnonzero(~valid_mask)
+    ]
+    return failed, []
+
+
+def run_custom_validation(file_path: Path, df: pd.DataFrame):
+    """
+    Applies the saved custom validation in file_path to df.
+    Prefers validate_frame(df) when the module defines it (falling back to validate_row if it raises);
+    otherwise runs validate_row over record dicts in chunks, in a process pool when
+    CUSTOM_VALIDATION_WORKERS > 1. Results are always in row order.
+    Returns (failed, errored) as lists of (position, message), or None if the module defines neither hook.
+    """
+    module, digest = VALIDATION_MODULE_CACHE.get(file_path)
+    logger.info(f"Loaded custom validation module: {file_path} (sha256 {digest[:12]})")
+
+    if hasattr(module, "validate_frame"):
+        logger.info(f"Found 'validate_frame' function in {file_path}. Applying custom frame-level validation.")
+        try:
+            return run_validate_frame(module, df)
+        except Exception as frame_err:
+            logger.error(f"Custom validate_frame failed: {frame_err}", exc_info=True)
+            if not hasattr(module, "validate_row"):
+                raise
+
+    if not hasattr(module, "validate_row"):
+        return None
+
+    logger.info(f"Found 'validate_row' function in {file_path}. Applying custom row-level validation.")
+    labels = df.index.tolist()
+    chunk_rows = max(CUSTOM_VALIDATION_CHUNK_ROWS, 1)
+    starts = range(0, len(df), chunk_rows)
+
+    def chunk_args(start):
+        return str(file_path), df.iloc[start:start + chunk_rows].to_dict("records"), labels[start:start + chunk_rows], start
+
+    # Chunks are reported to the running job (if any) as they finish, in row order
+    progress = current_validation_run()
+    results = []
+    if CUSTOM_VALIDATION_WORKERS > 1 and len(starts) > 1:
+        logger.info(f"Running validate_row over {len(starts)} chunks with {CUSTOM_VALIDATION_WORKERS} worker processes.")
+        pool = WORKER_PROCESS_POOLS.get(CUSTOM_VALIDATION_WORKERS)
+        for start, chunk_result in zip(starts, pool.map(run_validate_row_chunk, *zip(*(chunk_args(start) for start in starts)))):
+            results.append(chunk_result)
+            progress.advance(min(chunk_rows, len(df) - start))
+    else:
+        for start in starts:
+            results.append(run_validate_row_chunk(*chunk_args(start)))
+            progress.advance(min(chunk_rows, len(df) - start))
+
+    failed = [item for chunk_failed, _ in results for item in chunk_failed]
+    errored = [item for _, chunk_errored in results for item in chunk_errored]
+    return failed, errored
+
+
 @app.post("/api/hdl/validate-data")
 async def validate_data(payload: ValidatePayload):
     """
@@ -2653,6 +4274,15 @@ async def validate_data(payload: ValidatePayload):
     Calls each function to check for its status and return the results.
     Fetches excel file from the static directory using the componentName and globalBoName.
     """
+    return await BLOCKING_WORK_POOL.run("validate-data", run_validate_data, payload)
+
+
+def run_validate_data(payload: ValidatePayload, excel_path: Optional[Path] = None):
+    """
+    Synchronous body of /api/hdl/validate-data; runs on BLOCKING_WORK_POOL.
+    excel_path is the workbook already streamed to disk by the multipart endpoint;
+    when it is None the base64 payload.excelFile is decoded instead.
+    """
     component_name = payload.componentName
     global_bo_name = payload.globalBoName
     attributes_to_validate = payload.attributes
@@ -2691,338 +4321,344 @@ async def validate_data(payload: ValidatePayload):
             logger.error(f"Unexpected error fetching setup: {e}")
             raise HTTPException(status_code=500, detail=f"Error fetching setup data: {str(e)}")
 
+    # Server-side lookup sets referenced by (attribute, CODE_Name, version) replace the inline lists
+    if payload.lookupRefs:
+        all_lookups = {**all_lookups, **resolve_lookup_refs(payload.lookupRefs, customerName, instanceName, component_name, global_bo_name)}
+
     # ----------------------------------------------------------
-    if not excel_base64:
+    if not excel_base64 and excel_path is None:
         raise HTTPException(status_code=400, detail="Excel file content is missing.")
 
-    try:
-        # Decode the base64 Excel file
-        excel_bytes = base64.b64decode(excel_base64)
-        excel_file_io = BytesIO(excel_bytes)
-        excel_filename = f"{component_name}.xlsx"
-        store_excel = DIR / (global_bo_name or component_name) / excel_filename
-        # Ensure the directory exists
-        store_excel.parent.mkdir(parents=True, exist_ok=True)
-        # Save the Excel file to the determined path
-        with open(store_excel, "wb") as f:
-            f.write(excel_bytes)
-        file_path_in_static = Path("uploads/Excel_Files") / (global_bo_name or component_name) / excel_filename
-        # Load Excel file into DataFrame
-        df = pd.read_excel(excel_file_io, engine='openpyxl')
-        df.columns = [str(col).strip() for col in df.columns]
-        df.columns = [col.strip() for col in df.columns] # Clean column names
-        df = df.fillna("") # Fill NaN values with empty string for consistent validation
-
-        # Get the original columns from the uploaded Excel (before any additions like sourceKeys)
-        original_excel_columns = df.columns.tolist()
-
-        # Initialize 'Reason for Failed' column
-        if "Reason for Failed" not in df.columns:
-            df["Reason for Failed"] = ""
-        else:
-            df["Reason for Failed"] = df["Reason for Failed"].astype(str)
-
-        all_errors = []
+    run = current_validation_run()
 
-        # Remove only leading and trailing whitespaces from all string values
-        df = df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
+    try:
+        def checkpoint(stage):
+            # Everything later stages read from the earlier ones, so a resumed job can skip them
+            run.checkpoint(stage, {
+                "df": df, "failures": failures,
+                "original_excel_columns": original_excel_columns, "all_errors": all_errors,
+            })
 
+        restored = run.restored_state()
+        if restored is None:
+            run.enter("read")
+            excel_filename = f"{component_name}.xlsx"
+            store_excel = validation_upload_path(component_name, global_bo_name)
+            if excel_path is None:
+                # Decode the base64 Excel file
+                excel_bytes = base64.b64decode(excel_base64)
+                excel_file_io = BytesIO(excel_bytes)
+                # Ensure the directory exists
+                store_excel.parent.mkdir(parents=True, exist_ok=True)
+                # Save the Excel file to the determined path
+                with open(store_excel, "wb") as f:
+                    f.write(excel_bytes)
+            else:
+                # Already streamed to disk by the multipart endpoint; openpyxl reads it in place
+                excel_file_io = excel_path
+            file_path_in_static = Path("uploads/Excel_Files") / (global_bo_name or component_name) / excel_filename
+            # Load Excel file into DataFrame
+            df = pd.read_excel(excel_file_io, engine='openpyxl')
+            df.columns = [str(col).strip() for col in df.columns]
+            df.columns = [col.strip() for col in df.columns] # Clean column names
+            df = df.fillna("") # Fill NaN values with empty string for consistent validation
+
+            # Get the original columns from the uploaded Excel (before any additions like sourceKeys)
+            original_excel_columns = df.columns.tolist()
+
+            # Initialize 'Reason for Failed' column
+            if "Reason for Failed" not in df.columns:
+                df["Reason for Failed"] = ""
+            else:
+                df["Reason for Failed"] = df["Reason for Failed"].astype(str)
 
-        # 1. Perform Data Transformation/Mapping Validations (NOW FIRST)
-        logger.info("Skipping data transformation step as requested.")
-        # df = transformation_for_validation(excel_file_io) 
-        # logger.info("Finished data transformation.")
+            all_errors = []
 
-        # 2. Perform Required Field Validations (after transformation)
-        logger.info("Starting required field validations.")
-        required_cols_from_payload = [attr.Attributes for attr in attributes_to_validate if attr.required]
-        df = required_field_validations(df, required_cols_from_payload)
-        logger.info("Finished required field validations.")
+            # Remove only leading and trailing whitespaces from all string values
+            df = df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
 
-        # 2a. Perform Data Type Validation
-        logger.info("Starting datatype validations.")
-        df = validate_data_types(df, attributes_to_validate)
-        logger.info("Finished datatype validations.")
+            # Every stage records (row, rule, message) here; 'Reason for Failed' is rendered from it
+            failures = ValidationFailures(len(df))
 
-        # 2b. Perform Key Values Uniqueness Validation
-        logger.info("Starting key values uniqueness validation.")
+            # 1. Perform Data Transformation/Mapping Validations (NOW FIRST)
+            logger.info("Skipping data transformation step as requested.")
+            # df = transformation_for_validation(excel_file_io) 
+            # logger.info("Finished data transformation.")
+            checkpoint("read")
+        else:
+            df, failures = restored["df"], restored["failures"]
+            original_excel_columns, all_errors = restored["original_excel_columns"], restored["all_errors"]
+            logger.info(f"Resuming validation of {len(df)} rows after stage '{run.completed_stages[-1]}'.")
+
+        if run.enter("required", len(df)):
+            # 2. Perform Required Field Validations (after transformation)
+            logger.info("Starting required field validations.")
+            required_cols_from_payload = [attr.Attributes for attr in attributes_to_validate if attr.required]
+            df = required_field_validations(df, required_cols_from_payload, failures)
+            logger.info("Finished required field validations.")
+            checkpoint("required")
+
+        if run.enter("datatype", len(df)):
+            # 2a. Perform Data Type Validation
+            logger.info("Starting datatype validations.")
+            df = validate_data_types(df, attributes_to_validate, failures)
+            logger.info("Finished datatype validations.")
+
+            # 2b. Perform Key Values Uniqueness Validation
+            logger.info("Starting key values uniqueness validation.")
 
         
 
-        # Collect all attributes flagged as keyValues=True
-        key_value_cols_from_payload = [attr.Attributes for attr in attributes_to_validate if attr.keyValues]
+            # Collect all attributes flagged as keyValues=True
+            key_value_cols_from_payload = [attr.Attributes for attr in attributes_to_validate if attr.keyValues]
 
-        if key_value_cols_from_payload:
-            missing_cols = [col for col in key_value_cols_from_payload if col not in df.columns]
-            if missing_cols:
-                logger.warning(f"Key value validation skipped for missing columns: {', '.join(missing_cols)}")
-            else:
-                # Build composite key if multiple key columns exist
-                df["_key_combo"] = df[key_value_cols_from_payload].astype(str).agg("|".join, axis=1)
+            if key_value_cols_from_payload:
+                missing_cols = [col for col in key_value_cols_from_payload if col not in df.columns]
+                if missing_cols:
+                    logger.warning(f"Key value validation skipped for missing columns: {', '.join(missing_cols)}")
+                else:
+                    # Build composite key if multiple key columns exist
+                    df["_key_combo"] = df[key_value_cols_from_payload].astype(str).agg("|".join, axis=1)
 
-                # Detect duplicates in that composite key
-                dup_mask = df["_key_combo"].duplicated(keep=False)  # mark all duplicates, not just later ones
-                if dup_mask.any():
-                    for col in key_value_cols_from_payload:
-                        df.loc[dup_mask, "Reason for Failed"] = df.loc[dup_mask, "Reason for Failed"].astype(str) + \
-                            f"; Duplicate detected in key combination ({', '.join(key_value_cols_from_payload)})"
+                    # Detect duplicates in that composite key
+                    dup_mask = df["_key_combo"].duplicated(keep=False).to_numpy()  # mark all duplicates, not just later ones
+                    if dup_mask.any():
+                        # One entry per key column, as the reason text has always listed it
+                        for col in key_value_cols_from_payload:
+                            failures.add("duplicate_key", dup_mask, f"Duplicate detected in key combination ({', '.join(key_value_cols_from_payload)})")
 
-                # Drop helper column after validation
-                df = df.drop(columns=["_key_combo"])
+                    # Drop helper column after validation
+                    df = df.drop(columns=["_key_combo"])
 
-        logger.info("Finished key values uniqueness validation.")
+            logger.info("Finished key values uniqueness validation.")
 
 
-        # --- VALIDATE START DATE BEFORE END DATE ---
-        logger.info("Starting EffectiveStartDate < EffectiveEndDate validation...")
+            # --- VALIDATE START DATE BEFORE END DATE ---
+            logger.info("Starting EffectiveStartDate < EffectiveEndDate validation...")
 
-        if "EffectiveStartDate" in df.columns and "EffectiveEndDate" in df.columns:
-            # Ensure proper datetime format
-            df["EffectiveStartDate"] = pd.to_datetime(df["EffectiveStartDate"], errors="coerce")
-            df["EffectiveEndDate"] = pd.to_datetime(df["EffectiveEndDate"], errors="coerce")
+            if "EffectiveStartDate" in df.columns and "EffectiveEndDate" in df.columns:
+                # Ensure proper datetime format
+                df["EffectiveStartDate"] = pd.to_datetime(df["EffectiveStartDate"], errors="coerce")
+                df["EffectiveEndDate"] = pd.to_datetime(df["EffectiveEndDate"], errors="coerce")
 
-            # Find rows where start date is missing or not before end date
-            invalid_mask = df["EffectiveEndDate"] <= df["EffectiveStartDate"]
-            if invalid_mask.any():
-                for idx in df[invalid_mask].index:
-                    start = df.at[idx, "EffectiveStartDate"]
-                    end = df.at[idx, "EffectiveEndDate"]
-                    existing_reason = df.at[idx, "Reason for Failed"]
-                    reason = f"EffectiveStartDate ({start.date()}) must be before EffectiveEndDate ({end.date()})"
-                    df.at[idx, "Reason for Failed"] = f"{existing_reason}; {reason}" if existing_reason else reason
+                # Find rows where start date is missing or not before end date
+                invalid_mask = (df["EffectiveEndDate"] <= df["EffectiveStartDate"]).to_numpy()
+                if invalid_mask.any():
+                    failures.add("start_before_end", invalid_mask, [
+                        f"EffectiveStartDate ({start.date()}) must be before EffectiveEndDate ({end.date()})"
+                        for start, end in zip(df.loc[invalid_mask, "EffectiveStartDate"], df.loc[invalid_mask, "EffectiveEndDate"])
+                    ])
 
-        logger.info("Completed EffectiveStartDate < EffectiveEndDate validation.")
+            logger.info("Completed EffectiveStartDate < EffectiveEndDate validation.")
+            checkpoint("datatype")
 
 
-        # 3. Perform Lookup Validations (after transformation and required field checks)
-        logger.info("Starting lookup validations.")
-        # `all_lookups` from payload is already in the correct format (attribute -> list of dicts)
-        df = lookup_validations(df, all_lookups)
-        logger.info("Finished lookup validations.")        
+        if run.enter("lookup", len(df)):
+            # 3. Perform Lookup Validations (after transformation and required field checks)
+            logger.info("Starting lookup validations.")
+            # `all_lookups` from payload is already in the correct format (attribute -> list of dicts)
+            df = lookup_validations(df, all_lookups, failures)
+            logger.info("Finished lookup validations.")
+            checkpoint("lookup")
 
         
-        # 4. Custom validation: First row for a Person Number must be 'HIRE' based on minimum Start Date
-        logger.info("Starting custom validation: First row for Person Number must be 'HIRE'.")
+        if run.enter("timeline", len(df)):
+            # 4. Custom validation: First row for a Person Number must be 'HIRE' based on minimum Start Date
+            logger.info("Starting custom validation: First row for Person Number must be 'HIRE'.")
         
-        start_date_column = None
-        if "EffectiveStartDate" in df.columns:
-            start_date_column = "EffectiveStartDate"
-        elif "DateStart" in df.columns:
-            start_date_column = "DateStart"
-
-        if "PersonNumber" in df.columns and "ActionCode" in df.columns and start_date_column:
-            # Convert start_date_column to datetime, handling potential errors
-            df[start_date_column] = pd.to_datetime(df[start_date_column], errors='coerce')
-
-            # Drop rows where start_date_column could not be parsed, as they cannot be validated on date
-            df_cleaned_dates = df.dropna(subset=[start_date_column]).copy()
-
-            # Group by Person Number and find the row with the minimum DateStart
-            idx = df_cleaned_dates.groupby('PersonNumber')[start_date_column].idxmin()
-            first_rows_for_person = df_cleaned_dates.loc[idx]
-
-            for _, row in first_rows_for_person.iterrows():
-                person_number = row["PersonNumber"]
-                action_code = str(row["ActionCode"]).strip().upper()
-
-                if action_code not in hire_actions:
-                    # Find all original indices for this person_number to mark all their rows as failed
-                    original_indices_for_person = df[df["PersonNumber"] == person_number].index
-                    for i in original_indices_for_person:
-                        # Append the reason, ensuring it's not None
-                        current_reason = df.loc[i, "Reason for Failed"]
-                        if current_reason:
-                            df.loc[i, "Reason for Failed"] = f"{current_reason}; First action for PersonNumber '{person_number}' (based on minimum start date) must be 'HIRE', but was '{action_code}'"
-                        else:
-                            df.loc[i, "Reason for Failed"] = f"First action for PersonNumber '{person_number}' (based on minimum start date) must be 'HIRE', but was '{action_code}'"
-        else: 
-            missing_cols = []
-            if "PersonNumber" not in df.columns: missing_cols.append("PersonNumber")
-            if "ActionCode" not in df.columns: missing_cols.append("ActionCode")
-            if not start_date_column: missing_cols.append("EffectiveStartDate or DateStart") # Updated warning message
-            if missing_cols:
-                logger.warning(f"Skipping 'HIRE' validation due to missing column(s): {', '.join(missing_cols)}")
-        logger.info("Finished custom validation: First row for Person Number must be 'HIRE'.")
-
-
-        # Legal Employer Name has to be consistant 
-        logger.info("Starting validation: LegalEmployerName consistency check with reset on HIRE/TERMINATION/GT.")
-        required_cols = ["PersonNumber", "ActionCode", start_date_column, "LegalEmployerName"]
-        if all(col in df.columns for col in required_cols):
-            df[start_date_column] = pd.to_datetime(df[start_date_column], errors='coerce')
-            df["ActionCode"] = df["ActionCode"].astype(str).str.strip().str.upper()
-            df["LegalEmployerName"] = df["LegalEmployerName"].astype(str).str.strip()
-
-            grouped = df.sort_values(by=["PersonNumber", start_date_column]).groupby("PersonNumber")
-
-            for person, group in grouped:
-                expected_legal = None
-                for _, row in group.iterrows():
-                    action = row["ActionCode"]
-                    legal = row["LegalEmployerName"]
-                    idx = row.name
-
-                    if expected_legal is None:
-                        expected_legal = legal
-                    elif action in rehire_actions or action in gt_actions:
-                        expected_legal = legal
-                    else:
-                        if legal != expected_legal:
-                            existing_reason = df.at[idx, "Reason for Failed"]
-                            reason = f"Inconsistent LegalEmployerName. Expected '{expected_legal}', but found '{legal}' and action code '{action}'."
-                            df.at[idx, "Reason for Failed"] = f"{existing_reason}; {reason}" if existing_reason else reason
-
-        else:
-            logger.warning("Missing columns for LegalEmployerName consistency validation. Skipping.")
-
-        logger.info("Completed validation: LegalEmployerName consistency check.")
-
+            start_date_column = None
+            if "EffectiveStartDate" in df.columns:
+                start_date_column = "EffectiveStartDate"
+            elif "DateStart" in df.columns:
+                start_date_column = "DateStart"
+
+            if "PersonNumber" in df.columns and "ActionCode" in df.columns and start_date_column:
+                # Convert start_date_column to datetime, handling potential errors
+                df[start_date_column] = pd.to_datetime(df[start_date_column], errors='coerce')
+
+                # Drop rows where start_date_column could not be parsed, as they cannot be validated on date
+                df_cleaned_dates = df.dropna(subset=[start_date_column]).copy()
+
+                # Group by Person Number and find the row with the minimum DateStart
+                idx = df_cleaned_dates.groupby('PersonNumber')[start_date_column].idxmin()
+                first_rows_for_person = df_cleaned_dates.loc[idx]
+
+                first_action_codes = first_rows_for_person["ActionCode"].map(str).str.strip().str.upper()
+                not_hire = ~first_action_codes.isin(hire_actions).to_numpy()
+                first_action_failures = {
+                    person_number: f"First action for PersonNumber '{person_number}' (based on minimum start date) must be 'HIRE', but was '{action_code}'"
+                    for person_number, action_code in zip(
+                        first_rows_for_person["PersonNumber"].to_numpy(dtype=object)[not_hire].tolist(),
+                        first_action_codes.to_numpy(dtype=object)[not_hire].tolist()
+                    )
+                }
 
+                if first_action_failures:
+                    # Mark all rows of those person numbers as failed
+                    person_mask = df["PersonNumber"].isin(list(first_action_failures)).to_numpy()
+                    failures.add("first_action_hire", person_mask, [
+                        first_action_failures[person_number] for person_number in df.loc[person_mask, "PersonNumber"]
+                    ])
+            else: 
+                missing_cols = []
+                if "PersonNumber" not in df.columns: missing_cols.append("PersonNumber")
+                if "ActionCode" not in df.columns: missing_cols.append("ActionCode")
+                if not start_date_column: missing_cols.append("EffectiveStartDate or DateStart") # Updated warning message
+                if missing_cols:
+                    logger.warning(f"Skipping 'HIRE' validation due to missing column(s): {', '.join(missing_cols)}")
+            logger.info("Finished custom validation: First row for Person Number must be 'HIRE'.")
+
+
+            # Legal Employer Name has to be consistant 
+            logger.info("Starting validation: LegalEmployerName consistency check with reset on HIRE/TERMINATION/GT.")
+            required_cols = ["PersonNumber", "ActionCode", start_date_column, "LegalEmployerName"]
+            if all(col in df.columns for col in required_cols):
+                df[start_date_column] = pd.to_datetime(df[start_date_column], errors='coerce')
+                df["ActionCode"] = df["ActionCode"].astype(str).str.strip().str.upper()
+                df["LegalEmployerName"] = df["LegalEmployerName"].astype(str).str.strip()
+
+                # The first row of a person and every rehire / global transfer set the expected LE;
+                # every other row must match the most recent one.
+                timeline = LegalEmployerTimeline(df, "PersonNumber", start_date_column, "ActionCode", "LegalEmployerName")
+                anchors = timeline.first_of_person | timeline.action_in(rehire_actions + gt_actions)
+                expected_legal, _ = timeline.carried(timeline.le, anchors)
+                inconsistent = np.flatnonzero(~anchors & (timeline.le != expected_legal).astype(bool))
+                failures.add("legal_employer_consistency", timeline.positions[inconsistent], [
+                    f"Inconsistent LegalEmployerName. Expected '{expected_legal[i]}', but found '{timeline.le[i]}' and action code '{timeline.action[i]}'."
+                    for i in inconsistent
+                ])
 
-        # --- GLOBAL TRANSFER validation: legal employer change + no employment gap ---
-        logger.info("Starting GLOBAL TRANSFER validation (LegalEmployerName change + date continuity)...")
+            else:
+                logger.warning("Missing columns for LegalEmployerName consistency validation. Skipping.")
 
-        required_cols = ["PersonNumber", "ActionCode", "EffectiveStartDate", "EffectiveEndDate", "LegalEmployerName"]
-        if all(col in df.columns for col in required_cols):
-            df["EffectiveStartDate"] = pd.to_datetime(df["EffectiveStartDate"], errors="coerce")
-            df["EffectiveEndDate"] = pd.to_datetime(df["EffectiveEndDate"], errors="coerce")
-            df["ActionCode"] = df["ActionCode"].astype(str).str.strip()
-            df["LegalEmployerName"] = df["LegalEmployerName"].astype(str).str.strip()
+            logger.info("Completed validation: LegalEmployerName consistency check.")
 
-            grouped = df.sort_values(by=["PersonNumber", "EffectiveStartDate"]).groupby("PersonNumber")
 
-            for person_number, group in grouped:
-                group = group.reset_index()
 
-                for i in range(1, len(group)):
-                    prev = group.loc[i - 1]
-                    curr = group.loc[i]
+            # --- GLOBAL TRANSFER validation: legal employer change + no employment gap ---
+            logger.info("Starting GLOBAL TRANSFER validation (LegalEmployerName change + date continuity)...")
 
-                    if curr["ActionCode"].upper() in gt_actions:
-                        legal_changed = curr["LegalEmployerName"] != prev["LegalEmployerName"]
-                        expected_start = prev["EffectiveEndDate"] + pd.Timedelta(days=1)
-                        actual_start = curr["EffectiveStartDate"]
+            required_cols = ["PersonNumber", "ActionCode", "EffectiveStartDate", "EffectiveEndDate", "LegalEmployerName"]
+            if all(col in df.columns for col in required_cols):
+                df["EffectiveStartDate"] = pd.to_datetime(df["EffectiveStartDate"], errors="coerce")
+                df["EffectiveEndDate"] = pd.to_datetime(df["EffectiveEndDate"], errors="coerce")
+                df["ActionCode"] = df["ActionCode"].astype(str).str.strip()
+                df["LegalEmployerName"] = df["LegalEmployerName"].astype(str).str.strip()
 
+                # Each global transfer is compared with the person's previous row
+                timeline = LegalEmployerTimeline(df, "PersonNumber", "EffectiveStartDate", "ActionCode", "LegalEmployerName")
+                previous_le, has_previous = timeline.previous(timeline.le)
+                is_gt = has_previous & pd.Series(timeline.action, dtype=object).str.upper().isin(gt_actions).to_numpy()
 
-                        reasons = []
-                        if not legal_changed:
-                            reasons.append("Legal Employer Name must change for change legal employer")
-                        if pd.notna(expected_start) and pd.notna(actual_start) and actual_start != expected_start:
-                            reasons.append(
-                                f"EffectiveStartDate ({actual_start.date()}) must be the day after previous EffectiveEndDate ({prev['EffectiveEndDate'].date()})"
-                            )
+                same_legal = is_gt & (previous_le == timeline.le).astype(bool)
+                failures.add("global_transfer_legal_employer", timeline.positions[same_legal], "Legal Employer Name must change for change legal employer")
 
-                        if reasons:
-                            row_index = curr["index"]
-                            existing_reason = df.at[row_index, "Reason for Failed"]
-                            combined = "; ".join(reasons)
-                            df.at[row_index, "Reason for Failed"] = f"{existing_reason}; {combined}" if existing_reason else combined
-        else:
-            missing = [c for c in required_cols if c not in df.columns]
-            logger.warning(f"Skipping GLOBAL TRANSFER validation due to missing columns: {', '.join(missing)}")
-        logger.info("Completed GLOBAL TRANSFER validation.")
-
-        # --- WORKRELATIONSHIP specific rules ---
-        if component_name.lower() == "workrelationship":
-            logger.info("Applying WorkRelationship-specific rules.")
-            df = apply_workrelationship_rules(
-                df=df.copy(),
-                hire_actions=hire_actions,
-                rehire_actions=rehire_actions,
-                gt_actions=gt_actions,
-                term_actions=term_actions
-            )
-            logger.info("Completed WorkRelationship-specific rules.")
+                previous_end = df["EffectiveEndDate"].iloc[timeline.positions].shift(1).reset_index(drop=True)
+                expected_start = previous_end + pd.Timedelta(days=1)
+                actual_start = timeline.dates
+                gap = np.flatnonzero(is_gt & (expected_start.notna() & actual_start.notna() & (actual_start != expected_start)).to_numpy())
+                failures.add("global_transfer_continuity", timeline.positions[gap], [
+                    f"EffectiveStartDate ({actual_start.iloc[i].date()}) must be the day after previous EffectiveEndDate ({previous_end.iloc[i].date()})"
+                    for i in gap
+                ])
+            else:
+                missing = [c for c in required_cols if c not in df.columns]
+                logger.warning(f"Skipping GLOBAL TRANSFER validation due to missing columns: {', '.join(missing)}")
+            logger.info("Completed GLOBAL TRANSFER validation.")
+
+            # --- WORKRELATIONSHIP specific rules ---
+            if component_name.lower() == "workrelationship":
+                logger.info("Applying WorkRelationship-specific rules.")
+                # The rules drop and reorder rows; carry positions through so recorded failures follow their rows
+                df = df.assign(_validation_row=np.arange(len(df)))
+                df = run_person_timelines(
+                    df.copy(), "PersonNumber", apply_workrelationship_rules,
+                    hire_actions, rehire_actions, gt_actions, term_actions
+                )
+                failures = failures.take(df["_validation_row"].to_numpy())
+                df = df.drop(columns=["_validation_row"])
+                logger.info("Completed WorkRelationship-specific rules.")
 
 
+            df["Reason for Failed"] = failures.render()
         
-        # Filter passed and failed rows
-        failed_df = df[df["Reason for Failed"] != ""].copy()
-        passed_df = df[df["Reason for Failed"] == ""].copy()
+            # Filter passed and failed rows
+            failed_df = df[df["Reason for Failed"] != ""].copy()
+            passed_df = df[df["Reason for Failed"] == ""].copy()
 
-        # Save results to temporary files
-        output_dir = VALIDATION_RESULTS_DIR
+            # Save results to temporary files
+            output_dir = VALIDATION_RESULTS_DIR
         
-        # Ensure the output directory exists
-        output_dir.mkdir(parents=True, exist_ok=True)
+            # Ensure the output directory exists
+            output_dir.mkdir(parents=True, exist_ok=True)
 
-        validation_results = {}
+            validation_results = {}
 
-        # Step 1 — Get all PersonNumbers with at least one failed record
-        if "PersonNumber" not in df.columns:
-            logger.error("PersonNumber column missing when trying to cascade fail. Available columns: %s", df.columns.tolist())
-        else:
-            failed_persons = df.loc[df["Reason for Failed"] != "", "PersonNumber"].unique()
+            # Step 1 — Get all PersonNumbers with at least one failed record
+            if "PersonNumber" not in df.columns:
+                logger.error("PersonNumber column missing when trying to cascade fail. Available columns: %s", df.columns.tolist())
+            else:
+                failed_rows = (df["Reason for Failed"] != "").to_numpy()
+                failed_persons = df.loc[failed_rows, "PersonNumber"].unique()
 
-            # Step 2 — For all rows of those PersonNumbers, mark as failed (if not already)
-            for person_number in failed_persons:
-                person_rows = df[df["PersonNumber"] == person_number].index
-                for idx in person_rows:
-                    if df.at[idx, "Reason for Failed"] == "":
-                        df.at[idx, "Reason for Failed"] = "Failed due to other row(s) for this PersonNumber failing validation."
+                # Step 2 — For all rows of those PersonNumbers, mark as failed (if not already)
+                cascade_mask = ~failed_rows & (df["PersonNumber"].isin(failed_persons) & df["PersonNumber"].notna()).to_numpy()
+                failures.add("person_cascade", cascade_mask, "Failed due to other row(s) for this PersonNumber failing validation.")
+                df["Reason for Failed"] = failures.render()
 
 
-        # Save failed_df to an Excel file if it's not empty
-        if not failed_df.empty:
-            failed_file_name = get_generic_filename("failed", component_name, "xlsx")
-            failed_file_path = output_dir / failed_file_name
-            try:
-                failed_df.to_excel(failed_file_path, index=False, engine='openpyxl')
-                logger.info(f"Failed records saved to {failed_file_path}")
-                validation_results["failed_file_url"] = f"/excel_validation_results/{failed_file_name}" # URL for frontend
-                validation_results["failed_count"] = len(failed_df)
-            except Exception as e:
-                logger.error(f"Error saving failed_df to Excel: {e}")
-                validation_results["failed_file_error"] = f"Failed to save error file: {str(e)}"
-        else:
-            logger.info("No failed records found. Skipping failed file generation.")
-            validation_results["failed_count"] = 0
+            # Save failed_df to an Excel file if it's not empty
+            if not failed_df.empty:
+                failed_file_name = get_generic_filename("failed", component_name, "xlsx")
+                failed_file_path = output_dir / failed_file_name
+                try:
+                    failed_df.to_excel(failed_file_path, index=False, engine='openpyxl')
+                    logger.info(f"Failed records saved to {failed_file_path}")
+                    validation_results["failed_file_url"] = f"/excel_validation_results/{failed_file_name}" # URL for frontend
+                    validation_results["failed_count"] = len(failed_df)
+                except Exception as e:
+                    logger.error(f"Error saving failed_df to Excel: {e}")
+                    validation_results["failed_file_error"] = f"Failed to save error file: {str(e)}"
+            else:
+                logger.info("No failed records found. Skipping failed file generation.")
+                validation_results["failed_count"] = 0
+            checkpoint("timeline")
 
-        # --- inside validate_data ---
-        saved_code_file = UPLOAD_DIR / "saved_code" / f"{customerName}_{instanceName}_{component_name}.py"
+        if run.enter("custom_code", len(df)):
+            # --- inside validate_data ---
+            saved_code_file = UPLOAD_DIR / "saved_code" / f"{customerName}_{instanceName}_{component_name}.py"
 
-        if saved_code_file.exists():
-            try:
-                module = load_validation_module(saved_code_file)
-                logger.info(f"Loaded custom validation module: {saved_code_file}")
-
-                if hasattr(module, "validate_row"):
-                    logger.info(f"Found 'validate_row' function in {saved_code_file}. Applying custom row-level validation.")
-                    # Initialize column to track row-level validation failures
-                    if "RowValidationFailed" not in df.columns:
-                        df["RowValidationFailed"] = False
-
-                    for idx, row in df.iterrows():
-                        try:
-                            logger.debug(f"Applying custom validation to row {idx}")
-                            is_valid, reason = module.validate_row(row.to_dict(), idx)
-                            # Normalize outputs
-                            is_valid = bool(is_valid)
-                            reason = str(reason).strip() if reason else ""
-                            
-                            if not is_valid:
-                                logger.debug(f"Row {idx} failed custom validation: {reason}")
-                                # Append to existing "Reason for Failed"
-                                existing_reason = df.at[idx, "Reason for Failed"] or ""
-                                combined_reason = f"{existing_reason}; {reason}" if existing_reason else reason
-                                df.at[idx, "Reason for Failed"] = combined_reason
-                                df.at[idx, "RowValidationFailed"] = True
-                        except Exception as row_err:
-                            # Catch row-level exceptions, log but continue
-                            logger.error(f"Custom validation failed for row {idx}: {row_err}", exc_info=True)
-                            existing_reason = df.at[idx, "Reason for Failed"] or ""
-                            df.at[idx, "Reason for Failed"] = f"{existing_reason}; Custom validation error: {row_err}" if existing_reason else f"Custom validation error: {row_err}"
-                            df.at[idx, "RowValidationFailed"] = True
+            if saved_code_file.exists():
+                try:
+                    module, _ = VALIDATION_MODULE_CACHE.get(saved_code_file)
+
+                    if hasattr(module, "validate_row") or hasattr(module, "validate_frame"):
+                        # Initialize column to track row-level validation failures
+                        if "RowValidationFailed" not in df.columns:
+                            df["RowValidationFailed"] = False
+                        custom_results = run_custom_validation(saved_code_file, df)
+                        custom_failed, custom_errored = custom_results
+                        logger.info(f"Custom validation flagged {len(custom_failed)} row(s) and errored on {len(custom_errored)} row(s).")
+                        custom_positions = [position for position, _ in custom_failed]
+                        error_positions = [position for position, _ in custom_errored]
+                        failures.add("custom_validate_row", np.array(custom_positions, dtype=np.int64), [reason for _, reason in custom_failed])
+                        failures.add("custom_validate_row_error", np.array(error_positions, dtype=np.int64), [message for _, message in custom_errored])
+                        flagged_positions = custom_positions + error_positions
+                        if flagged_positions:
+                            df.loc[df.index[flagged_positions], "RowValidationFailed"] = True
+                        df["Reason for Failed"] = failures.render()
 
-                else:
-                    logger.warning(f"No 'validate_row' function found in {saved_code_file}")
+                    else:
+                        logger.warning(f"No 'validate_row' function found in {saved_code_file}")
 
-            except Exception as mod_err:
-                logger.error(f"Failed to load custom validation module: {mod_err}", exc_info=True)
-        else:
-            logger.info(f"No custom validation file found at: {saved_code_file}")
+                except Exception as mod_err:
+                    logger.error(f"Failed to load custom validation module: {mod_err}", exc_info=True)
+            else:
+                logger.info(f"No custom validation file found at: {saved_code_file}")
+            checkpoint("custom_code")
 
 
+        run.enter("dat_write", len(df))
         # Filter passed and failed rows
         failed_df = df[df["Reason for Failed"] != ""].copy()
         passed_df = df[df["Reason for Failed"] == ""].copy()
@@ -3043,50 +4679,19 @@ async def validate_data(payload: ValidatePayload):
                 actioncode_col = col
             if col.strip().lower() == "personnumber":
                 personnumber_col = col
-        iterator_list = []
-        iterator_counter = 0
-        prev_person_number = None
         combined_actions = hire_actions + gt_actions + rehire_actions
         logger.error(f"Combined Actions is : {combined_actions}")
-        for _, row in passed_df.iterrows():
-            current_person_number = str(row[personnumber_col]) if personnumber_col else None
-            if personnumber_col and current_person_number != prev_person_number:
-                iterator_counter = 0
-                prev_person_number = current_person_number
-            if actioncode_col and str(row[actioncode_col]).strip().upper() in combined_actions:
-                iterator_counter += 1
-                iterator_list.append(str(iterator_counter))
-            else:
-                iterator_list.append(iterator_counter)
 
-        # Insert sourceKeys columns at the front, using iterator_list for {Iterator} (including as part of a string)
+        # Insert sourceKeys columns at the front, expanding {Iterator} (including as part of a string)
         source_keys = getattr(payload, 'sourceKeys', None)
         # Store names of source keys and their original order as they appear in the payload.sourceKeys dict
         source_key_names_in_order = [] 
         if source_keys and isinstance(source_keys, dict):
-            # Create a temporary DataFrame for just the source keys, maintaining their intended order
-            source_keys_data = {}
-            for key, val in source_keys.items():
-                source_key_names_in_order.append(key) # Keep track of the order of source keys
-                col_values = []
-                for idx, (_, row) in enumerate(passed_df.iterrows()): # Iterate over the passed_df rows to substitute values
-                    def replacer(match):
-                        if match.group(1) == 'Iterator':
-                            return str(iterator_list[idx]) if idx < len(iterator_list) else ''
-                        col_name = match.group(1)
-                        # Ensure we are getting values from the original passed_df (before sourceKey insertion or initial drop of 'Reason for Failed')
-                        # For this, it's safer to get from the 'df' DataFrame (initial loaded Excel data) if possible,
-                        # or ensure 'passed_df' still contains all original columns before dropping 'Reason for Failed' and adding source keys.
-                        # As it is, `passed_df` right before this block *does* contain original columns (minus 'Reason for Failed' if it was there).
-                        return str(row.get(col_name, ''))
-                    
-                    substituted_value = re.sub(r'\{([^}]+)\}', replacer, str(val))
-                    col_values.append(substituted_value)
-                source_keys_data[key] = col_values
-            
-            # Create a DataFrame for source keys and concatenate it to the passed_df
-            # This ensures source keys are at the beginning in their specified order
-            source_keys_df = pd.DataFrame(source_keys_data, index=passed_df.index)
+            source_key_names_in_order = list(source_keys.keys()) # Keep track of the order of source keys
+            iterator_values = compute_source_key_iterator(passed_df, personnumber_col, actioncode_col, combined_actions)
+            # Each template is parsed once and expanded a whole column at a time, from the passed_df
+            # columns (original Excel columns minus 'Reason for Failed').
+            source_keys_df = expand_source_keys(passed_df, source_keys, iterator_values)
             # Use concat to place source_keys_df at the start
             passed_df = pd.concat([source_keys_df, passed_df], axis=1)
             logger.info(f"Added source keys to passed_df. New columns added: {source_key_names_in_order}")
@@ -3146,36 +4751,21 @@ async def validate_data(payload: ValidatePayload):
             passed_file_path = output_dir / passed_file_name
             
             # Find ActionCode column again after potential column filtering
-            actioncode_col = None
-            for col in passed_df_final_output.columns:
+            actioncode_position = None
+            for position, col in enumerate(passed_df_final_output.columns):
                 if col.strip().lower() == "actioncode":
-                    actioncode_col = col
+                    actioncode_position = position
                     break
             
             # Calculate special_counter before writing .dat
-            if actioncode_col:
-                logger.info(f"Found ActionCode column: {actioncode_col}. Calculating special counter.")
-                special_counter = sum(
-                    str(row[actioncode_col]).strip().lower() in combined_actions
-                    for _, row in passed_df_final_output.iterrows()
-                )
+            if actioncode_position is not None:
+                logger.info(f"Found ActionCode column: {passed_df_final_output.columns[actioncode_position]}. Calculating special counter.")
+                action_values = pd.Series(frame_column_values(passed_df_final_output, actioncode_position), dtype=object)
+                special_counter = int(action_values.astype(str).str.strip().str.lower().isin(combined_actions).sum())
                 logger.info(f"Special counter calculated: {special_counter} for ActionCode values.")
             
-            # Write .dat file (pipe-separated, include header, all filtered columns)
-            with open(passed_file_path, "w", encoding="utf-8") as f:
-                f.write("|".join([str(col) for col in passed_df_final_output.columns]) + "\n")
-                for index, row in passed_df_final_output.iterrows(): # Use index for dtype lookup
-                    formatted_values = []
-                    for col_name, value in row.items():
-                        # Check if the column's dtype is a datetime type
-                        if pd.api.types.is_datetime64_any_dtype(passed_df_final_output[col_name]):
-                            if pd.isna(value): # Handle NaT (Not a Time)
-                                formatted_values.append('')
-                            else:
-                                formatted_values.append(value.strftime('%Y/%m/%d')) # Format as %Y/%m/%d
-                        else:
-                            formatted_values.append(str(value) if value is not None else '')
-                    f.write("|".join(formatted_values) + "\n")
+            # Write .dat file (pipe-separated, include header, all filtered columns; dates as %Y/%m/%d)
+            write_dat_file(passed_df_final_output, passed_file_path, group_index=True)
             logger.info(f"Passed validation data saved to: {passed_file_path}. Special count: {special_counter}")
 
         if not failed_df.empty:
@@ -3194,6 +4784,7 @@ async def validate_data(payload: ValidatePayload):
             "failed_records_count": len(failed_df),
             "passed_file_url": f"http://localhost:8000/validation_results/{passed_file_name}" if passed_file_name else None,
             "failed_file_url": f"http://localhost:8000/validation_results/{failed_file_name}" if failed_file_name else None,
+            "failure_counts_by_rule": failures.rule_counts(),
             "errors": all_errors       
          }
 
@@ -3216,6 +4807,633 @@ os.makedirs(VALIDATION_RESULTS_DIR, exist_ok=True)
 # Mount the directory for serving validation results. It's now ensured to exist at startup.
 app.mount("/validation_results", StaticFiles(directory=VALIDATION_RESULTS_DIR), name="validation_results")
 
+
+#------------- Validate-data uploads ------------------#
+UPLOAD_CHUNK_BYTES = max(64 * 1024, int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024))))
+CHUNKED_UPLOADS_DIR = UPLOAD_DIR / "chunked_uploads"
+CHUNKED_UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+CHUNKED_UPLOAD_ID = re.compile(r"[0-9a-f]{32}")
+# One writer per session: held from the offset check until the chunk is on disk
+CHUNKED_UPLOAD_LOCKS: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+
+def validation_upload_path(component_name: str, global_bo_name: Optional[str]) -> Path:
+    """Where validate-data keeps the uploaded workbook: DIR/<globalBoName or component>/<component>.xlsx."""
+    return DIR / (global_bo_name or component_name) / f"{component_name}.xlsx"
+
+
+def chunked_upload_path(upload_id: str) -> Path:
+    """Staging file of a chunked upload session; 404 for unknown or malformed ids."""
+    part = CHUNKED_UPLOADS_DIR / f"{upload_id}.part"
+    if not CHUNKED_UPLOAD_ID.fullmatch(upload_id) or not part.exists():
+        raise HTTPException(status_code=404, detail=f"Upload '{upload_id}' not found.")
+    return part
+
+
+def run_validate_data_upload(payload: ValidatePayload, source, target: Path):
+    """
+    Puts the workbook at target and validates it from disk. source is either a finished
+    chunked-upload staging file (moved into place) or the spooled multipart file (copied
+    in UPLOAD_CHUNK_BYTES pieces), so the workbook is never held in memory as a whole.
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(source, Path):
+        os.replace(source, target)
+    else:
+        tmp_path = target.with_suffix(".xlsx.part")
+        with open(tmp_path, "wb") as out:
+            shutil.copyfileobj(source, out, UPLOAD_CHUNK_BYTES)
+        os.replace(tmp_path, target)
+    return run_validate_data(payload, excel_path=target)
+
+
+@app.post("/api/hdl/validate-data/upload")
+async def validate_data_upload(
+    config: str = Form(..., description="The validate-data JSON payload without excelFile"),
+    excelFile: Optional[UploadFile] = File(None, description="The workbook, as a multipart file part"),
+    upload_id: Optional[str] = Form(None, description="A finished /api/hdl/uploads session, instead of excelFile")
+):
+    """
+    Multipart variant of /api/hdl/validate-data. The workbook arrives as a file part (or as a
+    previously uploaded chunked session) and is streamed to disk instead of being sent
+    base64-encoded inside the JSON body; the response is the same as validate-data's.
+    """
+    try:
+        payload = ValidatePayload(**{**json.loads(config), "excelFile": ""})
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"config is not valid JSON: {e}")
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid validation config: {e}")
+
+    if (excelFile is None) == (upload_id is None):
+        raise HTTPException(status_code=400, detail="Send either excelFile or upload_id.")
+
+    target = validation_upload_path(payload.componentName, payload.globalBoName)
+    if upload_id is not None:
+        source = chunked_upload_path(upload_id)
+        if upload_id in CHUNKED_UPLOAD_LOCKS and CHUNKED_UPLOAD_LOCKS[upload_id].locked():
+            raise HTTPException(status_code=409, detail=f"Upload '{upload_id}' is still receiving a chunk.")
+        # The staging file is moved into place, which ends the session
+        CHUNKED_UPLOAD_LOCKS.pop(upload_id, None)
+    else:
+        if not excelFile.filename.endswith(".xlsx"):
+            raise HTTPException(status_code=400, detail="Invalid file format. Please upload an .xlsx file.")
+        await excelFile.seek(0)
+        source = excelFile.file
+    return await BLOCKING_WORK_POOL.run("validate-data", run_validate_data_upload, payload, source, target)
+
+
+@app.post("/api/hdl/uploads")
+async def create_chunked_upload():
+    """Starts a chunked upload session. PUT the file to /api/hdl/uploads/{upload_id} in pieces."""
+    upload_id = uuid.uuid4().hex
+    (CHUNKED_UPLOADS_DIR / f"{upload_id}.part").touch()
+    return {"upload_id": upload_id, "offset": 0}
+
+
+@app.get("/api/hdl/uploads/{upload_id}")
+async def get_chunked_upload(upload_id: str):
+    """Bytes received so far, i.e. the offset the next chunk must start at."""
+    return {"upload_id": upload_id, "offset": chunked_upload_path(upload_id).stat().st_size}
+
+
+@app.put("/api/hdl/uploads/{upload_id}")
+async def append_chunked_upload(upload_id: str, request: Request, offset: int = Query(..., ge=0)):
+    """
+    Appends the raw request body to the session. offset must equal the bytes already
+    received; a retried chunk gets a 409 with the current offset instead of being
+    written twice, and so does a chunk sent while another one is still being written.
+    A chunk that does not arrive in full is dropped again.
+    """
+    part = chunked_upload_path(upload_id)
+    lock = CHUNKED_UPLOAD_LOCKS[upload_id]
+    if lock.locked():
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={"detail": "Another chunk of this upload is being written.", "upload_id": upload_id, "offset": part.stat().st_size},
+        )
+    async with lock:
+        received = part.stat().st_size
+        if offset != received:
+            return JSONResponse(
+                status_code=status.HTTP_409_CONFLICT,
+                content={"detail": f"Expected offset {received}, got {offset}.", "upload_id": upload_id, "offset": received},
+            )
+        with open(part, "r+b") as f:
+            f.seek(offset)
+            try:
+                async for chunk in request.stream():
+                    f.write(chunk)
+            except BaseException:
+                f.truncate(offset)
+                raise
+            received = f.tell()
+    return {"upload_id": upload_id, "offset": received}
+
+
+@app.delete("/api/hdl/uploads/{upload_id}")
+async def delete_chunked_upload(upload_id: str):
+    """Discards an unfinished chunked upload."""
+    chunked_upload_path(upload_id).unlink(missing_ok=True)
+    CHUNKED_UPLOAD_LOCKS.pop(upload_id, None)
+    return {"upload_id": upload_id, "deleted": True}
+
+
+#------------- Validation jobs ------------------#
+VALIDATION_JOBS_DIR = UPLOAD_DIR / "validation_jobs"
+VALIDATION_JOBS_DIR.mkdir(parents=True, exist_ok=True)
+VALIDATION_JOB_WORKERS = max(1, int(os.getenv("VALIDATION_JOB_WORKERS", "2")))
+VALIDATION_JOB_MAX_QUEUED = max(0, int(os.getenv("VALIDATION_JOB_MAX_QUEUED", "20")))
+VALIDATION_JOB_SAVE_INTERVAL_SECONDS = 1.0
+# Finished jobs kept in memory (older ones are read back from job.json), and how long a job's
+# directory is kept after its last update before it is deleted
+VALIDATION_JOB_KEEP_FINISHED = max(0, int(os.getenv("VALIDATION_JOB_KEEP_FINISHED", "50")))
+VALIDATION_JOB_RETENTION_HOURS = float(os.getenv("VALIDATION_JOB_RETENTION_HOURS", "24"))
+VALIDATION_JOB_PRUNE_INTERVAL_SECONDS = 600
+
+# Stages of each job kind in run order, with the share of the run time each one usually takes.
+# The shares only drive the progress fraction and ETA.
+VALIDATION_JOB_STAGES = {
+    "validate-data": [
+        ("read", 0.15), ("required", 0.05), ("datatype", 0.15), ("lookup", 0.10),
+        ("timeline", 0.25), ("custom_code", 0.10), ("dat_write", 0.20),
+    ],
+    "bulk-excel-upload": [("split", 0.85), ("post_validation", 0.15)],
+}
+VALIDATION_JOB_TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+
+
+class ValidationJobCancelled(BaseException):
+    """
+    Raised inside a job's pipeline when cancellation was requested. Derives from
+    BaseException (like asyncio.CancelledError) so the pipelines' catch-all
+    `except Exception` handlers don't turn it into a 500.
+    """
+
+
+class InlineValidationRun:
+    """Progress sink used when a pipeline runs inside a plain request: every stage runs, nothing is recorded."""
+
+    def restored_state(self) -> Optional[dict]:
+        return None
+
+    def enter(self, stage: str, rows_total: Optional[int] = None) -> bool:
+        return True
+
+    def advance(self, rows: int):
+        pass
+
+    def checkpoint(self, stage: str, state: dict):
+        pass
+
+
+INLINE_VALIDATION_RUN = InlineValidationRun()
+VALIDATION_RUN_CONTEXT = threading.local()
+
+
+def current_validation_run():
+    """Returns the job the current thread is running, or INLINE_VALIDATION_RUN outside the job executor."""
+    return getattr(VALIDATION_RUN_CONTEXT, "job", None) or INLINE_VALIDATION_RUN
+
+
+class ValidationJob:
+    """
+    One background validate-data or bulk-excel-upload run, persisted under
+    uploads/validation_jobs/<id>/ as job.json (status), inputs.json (request),
+    an optional input.xlsx (uploaded workbook) and checkpoint.pkl.
+
+    The pipeline reports through enter/advance/checkpoint. Each checkpoint pickles
+    the state the next stage needs, so a job interrupted by a restart resumes
+    after its last completed stage instead of starting over.
+    """
+
+    FIELDS = (
+        "id", "kind", "status", "stage", "completed_stages", "rows_total", "rows_processed",
+        "created_at", "started_at", "finished_at", "cancel_requested", "resumed_from", "result", "error",
+    )
+
+    def __init__(self, kind: str, job_id: Optional[str] = None):
+        self.id = job_id or uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.stage = None
+        self.completed_stages: List[str] = []
+        self.rows_total = None
+        self.rows_processed = 0
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = False
+        self.resumed_from = None
+        self.result = None
+        self.error = None
+        self.resumed_stages: List[str] = []
+        self._run_started = None
+        self._last_saved = 0.0
+        self._lock = threading.RLock()
+
+    @property
+    def directory(self) -> Path:
+        return VALIDATION_JOBS_DIR / self.id
+
+    @property
+    def input_file(self) -> Path:
+        return self.directory / "input.xlsx"
+
+    @property
+    def checkpoint_file(self) -> Path:
+        return self.directory / "checkpoint.pkl"
+
+    @classmethod
+    def load(cls, record_path: Path) -> "ValidationJob":
+        with open(record_path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+        job = cls(record["kind"], record["id"])
+        for field in cls.FIELDS:
+            if field in record:
+                setattr(job, field, record[field])
+        return job
+
+    def save(self):
+        with self._lock:
+            record = {field: getattr(self, field) for field in self.FIELDS}
+            self._last_saved = time.monotonic()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.directory / "job.json.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2, default=str)
+        os.replace(tmp_path, self.directory / "job.json")
+
+    def save_inputs(self, inputs: dict):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / "inputs.json", "w", encoding="utf-8") as f:
+            json.dump(inputs, f, default=str)
+
+    def load_inputs(self) -> dict:
+        with open(self.directory / "inputs.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _check_cancelled(self):
+        if self.cancel_requested:
+            raise ValidationJobCancelled(self.id)
+
+    def restored_state(self) -> Optional[dict]:
+        """The state saved by the last checkpoint when resuming after a restart, else None."""
+        if not self.completed_stages or not self.checkpoint_file.exists():
+            return None
+        with open(self.checkpoint_file, "rb") as f:
+            return pickle.load(f)
+
+    def enter(self, stage: str, rows_total: Optional[int] = None) -> bool:
+        """Marks stage as running. Returns False when a restored checkpoint already covers it."""
+        self._check_cancelled()
+        if stage in self.completed_stages:
+            return False
+        with self._lock:
+            self.stage = stage
+            self.rows_processed = 0
+            if rows_total is not None:
+                self.rows_total = rows_total
+        self.save()
+        return True
+
+    def advance(self, rows: int):
+        """Adds rows processed in the current stage; persisted at most once per second."""
+        self._check_cancelled()
+        with self._lock:
+            self.rows_processed = min(self.rows_processed + rows, self.rows_total or self.rows_processed + rows)
+            due = time.monotonic() - self._last_saved >= VALIDATION_JOB_SAVE_INTERVAL_SECONDS
+        if due:
+            self.save()
+
+    def checkpoint(self, stage: str, state: dict):
+        """Persists the pipeline state after stage completes, then records the stage as done."""
+        tmp_path = self.checkpoint_file.with_suffix(".pkl.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.checkpoint_file)
+        with self._lock:
+            self.completed_stages.append(stage)
+            self.rows_processed = self.rows_total or 0
+        self.save()
+        self._check_cancelled()
+
+    def progress(self) -> float:
+        stages = VALIDATION_JOB_STAGES[self.kind]
+        done = sum(weight for name, weight in stages if name in self.completed_stages)
+        if self.stage and self.stage not in self.completed_stages and self.rows_total:
+            current = dict(stages).get(self.stage, 0.0)
+            done += current * min(self.rows_processed / self.rows_total, 1.0)
+        return min(done / sum(weight for _, weight in stages), 1.0)
+
+    def status_info(self) -> dict:
+        with self._lock:
+            info = {field: getattr(self, field) for field in self.FIELDS}
+            fraction = 1.0 if self.status == "completed" else self.progress()
+            eta = None
+            if self.status == "running" and self._run_started is not None and fraction > 0:
+                elapsed = time.monotonic() - self._run_started
+                # Stages restored from a checkpoint took no time in this run
+                restored = sum(w for name, w in VALIDATION_JOB_STAGES[self.kind] if name in self.resumed_stages)
+                fraction_this_run = max(fraction - restored, 1e-6)
+                eta = round(elapsed * (1.0 - fraction) / fraction_this_run, 1)
+            info["stages"] = [name for name, _ in VALIDATION_JOB_STAGES[self.kind]]
+            info["progress"] = round(fraction, 4)
+            info["eta_seconds"] = eta
+            return info
+
+
+def run_validate_data_job(job: ValidationJob) -> dict:
+    response = run_validate_data(ValidatePayload(**job.load_inputs()))
+    return json.loads(response.body)
+
+
+def run_bulk_upload_job(job: ValidationJob) -> dict:
+    inputs = job.load_inputs()
+    parent_folder = DIR / inputs["customerName"] / inputs["InstanceName"] / inputs["parent_name"]
+    parent_folder.mkdir(parents=True, exist_ok=True)
+    with open(job.input_file, "rb") as source:
+        return run_bulk_excel_upload(
+            source, inputs["filename"], parent_folder, inputs["parent_name"],
+            inputs["term_actions"], inputs["hire_actions"], inputs["glb_transfers"],
+            inputs["assignment_status_rules"], inputs["mandatory_objects"]
+        )
+
+
+VALIDATION_JOB_RUNNERS = {
+    "validate-data": run_validate_data_job,
+    "bulk-excel-upload": run_bulk_upload_job,
+}
+
+
+class ValidationJobStore:
+    """
+    Runs ValidationJobs on a dedicated bounded executor and keeps their records.
+
+    Submissions beyond workers + max_queued unfinished jobs get a 429. Jobs left
+    queued or running by a previous process are resubmitted by resume_interrupted()
+    and pick up from their last checkpoint.
+
+    Only the VALIDATION_JOB_KEEP_FINISHED most recently finished jobs stay in memory, and
+    prune() deletes job directories not updated for VALIDATION_JOB_RETENTION_HOURS.
+    """
+
+    def __init__(self, workers: int, max_queued: int):
+        self.workers = workers
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="validation-job")
+        self._jobs: Dict[str, ValidationJob] = {}
+        self._futures: Dict[str, Any] = {}
+        self._finished: deque = deque()
+        self._last_pruned = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _unfinished(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status not in VALIDATION_JOB_TERMINAL_STATUSES)
+
+    def create(self, kind: str, inputs: dict) -> ValidationJob:
+        """Registers a queued job after checking capacity; the caller stores inputs/files, then calls start()."""
+        with self._lock:
+            if self._unfinished() >= self.workers + self.max_queued:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many validation jobs are queued. Please retry shortly.",
+                    headers={"Retry-After": str(BLOCKING_POOL_RETRY_AFTER_SECONDS)},
+                )
+            job = ValidationJob(kind)
+            self._jobs[job.id] = job
+        job.save_inputs(inputs)
+        job.save()
+        return job
+
+    def discard(self, job: ValidationJob):
+        """Forgets a job that was created but never started, e.g. because its upload could not be stored."""
+        with self._lock:
+            self._jobs.pop(job.id, None)
+        shutil.rmtree(job.directory, ignore_errors=True)
+
+    def start(self, job: ValidationJob):
+        with self._lock:
+            self._futures[job.id] = self._executor.submit(self._run, job)
+
+    def _run(self, job: ValidationJob):
+        if job.cancel_requested:
+            self._finish(job, "cancelled")
+            return
+        with job._lock:
+            job.status = "running"
+            job.started_at = job.started_at or datetime.now().isoformat()
+            job._run_started = time.monotonic()
+            job.resumed_stages = list(job.completed_stages)
+        job.save()
+        VALIDATION_RUN_CONTEXT.job = job
+        try:
+            job.result = VALIDATION_JOB_RUNNERS[job.kind](job)
+            self._finish(job, "completed")
+        except ValidationJobCancelled:
+            logger.info(f"Validation job {job.id} cancelled during stage '{job.stage}'.")
+            self._finish(job, "cancelled")
+        except HTTPException as http_exc:
+            job.error = {"status_code": http_exc.status_code, "detail": http_exc.detail}
+            self._finish(job, "failed")
+        except Exception as e:
+            logger.exception(f"Validation job {job.id} failed.")
+            job.error = {"status_code": 500, "detail": str(e)}
+            self._finish(job, "failed")
+        finally:
+            VALIDATION_RUN_CONTEXT.job = None
+
+    def _finish(self, job: ValidationJob, final_status: str):
+        with job._lock:
+            job.status = final_status
+            job.finished_at = datetime.now().isoformat()
+            if final_status == "completed":
+                if job.stage and job.stage not in job.completed_stages:
+                    job.completed_stages.append(job.stage)
+                job.rows_processed = job.rows_total or 0
+        job.checkpoint_file.unlink(missing_ok=True)
+        job.input_file.unlink(missing_ok=True)
+        job.save()
+        with self._lock:
+            self._futures.pop(job.id, None)
+            self._finished.append(job.id)
+            while len(self._finished) > VALIDATION_JOB_KEEP_FINISHED:
+                # Still served from its job.json until prune() deletes it
+                self._jobs.pop(self._finished.popleft(), None)
+            prune_due = time.monotonic() - self._last_pruned >= VALIDATION_JOB_PRUNE_INTERVAL_SECONDS
+        logger.info(f"Validation job {job.id} ({job.kind}) {final_status}.")
+        if prune_due:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Deletes the directories of jobs whose job.json was last written more than
+        VALIDATION_JOB_RETENTION_HOURS ago (unfinished jobs of this process are kept).
+        Returns the number of jobs removed.
+        """
+        cutoff = time.time() - VALIDATION_JOB_RETENTION_HOURS * 3600
+        with self._lock:
+            self._last_pruned = time.monotonic()
+            active = {job_id for job_id, job in self._jobs.items() if job.status not in VALIDATION_JOB_TERMINAL_STATUSES}
+        removed = 0
+        for directory in VALIDATION_JOBS_DIR.iterdir():
+            if not directory.is_dir() or directory.name in active:
+                continue
+            record_path = directory / "job.json"
+            try:
+                updated = (record_path if record_path.exists() else directory).stat().st_mtime
+            except OSError:
+                continue
+            if updated >= cutoff:
+                continue
+            with self._lock:
+                self._jobs.pop(directory.name, None)
+            shutil.rmtree(directory, ignore_errors=True)
+            removed += 1
+        if removed:
+            logger.info(f"Removed {removed} validation job(s) older than {VALIDATION_JOB_RETENTION_HOURS:g}h.")
+        return removed
+
+    def get(self, job_id: str) -> ValidationJob:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        record_path = VALIDATION_JOBS_DIR / Path(job_id).name / "job.json"
+        if not record_path.exists():
+            raise HTTPException(status_code=404, detail=f"Validation job '{job_id}' not found.")
+        return ValidationJob.load(record_path)
+
+    def cancel(self, job_id: str) -> ValidationJob:
+        job = self.get(job_id)
+        if job.status in VALIDATION_JOB_TERMINAL_STATUSES:
+            return job
+        with job._lock:
+            job.cancel_requested = True
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            self._finish(job, "cancelled")
+        else:
+            # Running jobs stop at their next stage boundary or progress report
+            job.save()
+        return job
+
+    def resume_interrupted(self):
+        for record_path in sorted(VALIDATION_JOBS_DIR.glob("*/job.json")):
+            try:
+                job = ValidationJob.load(record_path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Skipping unreadable validation job record {record_path}: {e}")
+                continue
+            if job.status in VALIDATION_JOB_TERMINAL_STATUSES or job.id in self._jobs:
+                continue
+            job.status = "queued"
+            job.resumed_from = job.completed_stages[-1] if job.completed_stages else None
+            with self._lock:
+                self._jobs[job.id] = job
+            job.save()
+            logger.info(f"Resuming validation job {job.id} ({job.kind}) after stage '{job.resumed_from}'.")
+            self.start(job)
+        self.prune()
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = defaultdict(int)
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return {"workers": self.workers, "max_queued": self.max_queued, "jobs_by_status": dict(counts)}
+
+
+VALIDATION_JOB_STORE = ValidationJobStore(VALIDATION_JOB_WORKERS, VALIDATION_JOB_MAX_QUEUED)
+
+
+@app.on_event("startup")
+async def resume_validation_jobs():
+    VALIDATION_JOB_STORE.resume_interrupted()
+
+
+def job_accepted_response(job: ValidationJob) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"job_id": job.id, "status": job.status, "status_url": f"/api/hdl/jobs/{job.id}"},
+    )
+
+
+@app.post("/api/hdl/jobs/validate-data")
+async def submit_validate_data_job(payload: ValidatePayload):
+    """
+    Accepts the same payload as /api/hdl/validate-data, queues the validation and returns a job id
+    immediately. Poll /api/hdl/jobs/{job_id} for the stage, progress and the validate-data response.
+    """
+    job = VALIDATION_JOB_STORE.create("validate-data", payload.dict())
+    VALIDATION_JOB_STORE.start(job)
+    return job_accepted_response(job)
+
+
+@app.post("/api/hdl/jobs/bulk-excel-upload")
+async def submit_bulk_upload_job(
+    parent_name: str = Form(...),
+    excelFile: UploadFile = File(...),
+    Mandatory_Objects: str = Form(...),
+    assignment_status_rules: str = Form(...),
+    TermActions: str = Form(...),
+    HireActions: str = Form(...),
+    glbTransfers: str = Form(...),
+    all_mandatory_objects: str = Form(...),
+    all_non_mandatory_objects: str = Form(...),
+    customerName: str = Form(...),
+    InstanceName: str = Form(...)
+):
+    """
+    Accepts the same form as /api/hdl/bulk-excel-upload and runs the split in the background.
+    The workbook is kept with the job until it finishes so an interrupted job can resume.
+    """
+    if not excelFile.filename.endswith(".xlsx"):
+        raise HTTPException(status_code=400, detail="Invalid file format. Please upload an .xlsx file.")
+    try:
+        inputs = {
+            "parent_name": parent_name,
+            "filename": excelFile.filename,
+            "customerName": customerName,
+            "InstanceName": InstanceName,
+            "term_actions": json.loads(TermActions),
+            "hire_actions": json.loads(HireActions),
+            "glb_transfers": json.loads(glbTransfers),
+            "assignment_status_rules": json.loads(assignment_status_rules),
+            "mandatory_objects": json.loads(all_mandatory_objects),
+        }
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON in form field: {e}")
+
+    job = VALIDATION_JOB_STORE.create("bulk-excel-upload", inputs)
+
+    def store_workbook():
+        with open(job.input_file, "wb") as target:
+            shutil.copyfileobj(excelFile.file, target)
+
+    try:
+        await excelFile.seek(0)
+        await BLOCKING_WORK_POOL.run("bulk-excel-upload", store_workbook)
+    except BaseException:
+        VALIDATION_JOB_STORE.discard(job)
+        raise
+    VALIDATION_JOB_STORE.start(job)
+    return job_accepted_response(job)
+
+
+@app.get("/api/hdl/jobs/{job_id}")
+async def get_validation_job(job_id: str):
+    """Status, current stage, rows processed, progress and ETA of a job; 'result' holds the endpoint response once completed."""
+    return VALIDATION_JOB_STORE.get(job_id).status_info()
+
+
+@app.post("/api/hdl/jobs/{job_id}/cancel")
+async def cancel_validation_job(job_id: str):
+    """Cancels a queued job immediately, or a running one at its next stage boundary or progress report."""
+    return VALIDATION_JOB_STORE.cancel(job_id).status_info()
+
+
 @app.post("/api/validate-personname")
 async def validate_personname(
     user_id: str = Form(...),
@@ -3316,11 +5534,8 @@ async def validate_personname(
             logging.info(f"Failed rows saved at {failed_file_path}.")
         if not passed_df.empty:
             passed_file_path = COMPLETED_FOLDER / get_generic_filename(user_id, "validation_passed", "dat")
-            # Write as .dat (pipe-separated)
-            with open(passed_file_path, "w", encoding="utf-8") as f:
-                f.write("|".join(passed_df.columns) + "\n")
-                for _, row in passed_df.iterrows():
-                    f.write("|".join([str(x) for x in row]) + "\n")
+            # Write as .dat (pipe-separated, values written as-is)
+            write_dat_file(passed_df, passed_file_path, date_format=None)
             logging.info(f"Passed rows saved at {passed_file_path}.")
 
         return JSONResponse(content={
@@ -3372,6 +5587,20 @@ async def validate_person_numbers(
     all_non_mandatory_objects: List[str] = Body(..., embed=True),
     export_as_excel: bool = Query(False)
 ):
+    return await BLOCKING_WORK_POOL.run(
+        "cross-file-person-validation", run_person_number_validation,
+        parent_name, component_files, all_mandatory_objects, all_non_mandatory_objects, export_as_excel
+    )
+
+
+def run_person_number_validation(
+    parent_name: str,
+    component_files: Dict[str, str],
+    all_mandatory_objects: List[str],
+    all_non_mandatory_objects: List[str],
+    export_as_excel: bool = False
+):
+    """Synchronous body of /api/hdl/bulk/cross-file/personNumber/validate; runs on BLOCKING_WORK_POOL."""
     logging.info(f"Starting validation for parent: {parent_name}")
 
     all_person_numbers: Set[str] = set()
@@ -3683,123 +5912,67 @@ async def validate_workterms_file(
 
         inconsistent_records = []
 
-        for person_number, group in df.groupby('PERSONNUMBER'):
-            logger.debug(f"Processing PersonNumber: {person_number}")
-            
-            # Sort by EffectiveStartDate to ensure chronological processing
-            group = group.sort_values(by='EFFECTIVESTARTDATE').reset_index(drop=True)
-
-            current_le = None
-            last_action_was_termination = False # Flag to indicate if the immediate previous action was a termination
-
-            for i, row in group.iterrows():
-                action_code = row['ACTIONCODE']
-                legal_employer_name = row['LEGALEMPLOYERNAME']
-                effective_start_date = row['EFFECTIVESTARTDATE']
-                
-                # Special handling for null/empty LegalEmployerName
-                if pd.isna(legal_employer_name) or legal_employer_name == '':
-                    inconsistent_records.append({
-                        'PersonNumber': person_number,
-                        'EffectiveStartDate': effective_start_date.strftime('%Y-%m-%d'),
-                        'ActionCode': action_code,
-                        'LegalEmployerName': legal_employer_name,
-                        'Scenario': 'Missing Legal Employer Name',
-                        'Status': 'Legal Employer Name is missing or null for this record.'
-                    })
-                    logger.warning(f"Person {person_number} (Effectivity {effective_start_date}): Missing Legal Employer Name.")
-                    continue # Skip further checks for this row as LE is invalid
-
-                logger.debug(f"Person {person_number} (Effective {effective_start_date}) - Action: {action_code}, LE: '{legal_employer_name}', Current LE state: '{current_le}', Last Action was Term: {last_action_was_termination}")
-
-
-                if action_code in hire_actions_list:
-                    # Case 1: Hire/Rehire action
-                    if current_le is not None:
-                        if not last_action_was_termination:
-                            pass 
-                        if current_le != legal_employer_name:
-                            if not last_action_was_termination:
-                                inconsistent_records.append({
-                                    'PersonNumber': person_number,
-                                    'EffectiveStartDate': effective_start_date.strftime('%Y-%m-%d'),
-                                    'ActionCode': action_code,
-                                    'LegalEmployerName': legal_employer_name,
-                                    'PreviousLegalEmployer': current_le,
-                                    'Scenario': 'Legal Employer Change with HIRE/REHIRE without prior Termination',
-                                    'Status': f"Legal Employer changed to '{legal_employer_name}' with '{action_code}' but previous employment period was not terminated. Previous LE was '{current_le}'."
-                                })
-                                logger.info(f"Inconsistency for {person_number} (Effectivity {effective_start_date}): LE changed with '{action_code}' but no prior termination.")
-                            else:
-                                logger.debug(f"Person {person_number} (Effectivity {effective_start_date}): Valid REHIRE with new LE '{legal_employer_name}' after termination.")
-                    
-                    current_le = legal_employer_name 
-                    last_action_was_termination = False 
-
-                elif action_code in termination_actions_list:
-                    if current_le is None:
-                        inconsistent_records.append({
-                            'PersonNumber': person_number,
-                            'EffectiveStartDate': effective_start_date.strftime('%Y-%m-%d'),
-                            'ActionCode': action_code,
-                            'LegalEmployerName': legal_employer_name,
-                            'Scenario': 'Termination without preceding active employment',
-                            'Status': 'Termination record found without an active prior hire record for this person.'
-                        })
-                        logger.info(f"Inconsistency for {person_number} (Effectivity {effective_start_date}): Termination without prior active employment.")
-                    if current_le is not None and current_le != legal_employer_name:
-                        inconsistent_records.append({
-                            'PersonNumber': person_number,
-                            'EffectiveStartDate': effective_start_date.strftime('%Y-%m-%d'),
-                            'ActionCode': action_code,
-                            'LegalEmployerName': legal_employer_name,
-                            'PreviousLegalEmployer': current_le,
-                            'Scenario': 'Legal Employer Name Mismatch at Termination',
-                            'Status': f"Legal Employer '{legal_employer_name}' at termination does not match last active LE '{current_le}'."
-                        })
-                        logger.info(f"Inconsistency for {person_number} (Effectivity {effective_start_date}): LE mismatch at termination.")
-
-                    current_le = None 
-                    last_action_was_termination = True 
-                    logger.debug(f"Person {person_number} (Effectivity {effective_start_date}): TERMINATION '{action_code}'. Active period ended.")
-
-                else: 
-                    if current_le is None:
-                        # Action without an active employment period (e.g., after a termination but before a rehire)
-                        # This could be legitimate if it's a "post-employment" record, or an error.
-                        # It depends on how your data is structured. For now, flag if it's not a hire/term.
-                        inconsistent_records.append({
-                            'PersonNumber': person_number,
-                            'EffectiveStartDate': effective_start_date.strftime('%Y-%m-%d'),
-                            'ActionCode': action_code,
-                            'LegalEmployerName': legal_employer_name,
-                            'Scenario': 'Action without active employment period',
-                            'Status': f"Record found with non-hire/termination action '{action_code}' and LE '{legal_employer_name}' outside an active employment period."
-                        })
-                        logger.info(f"Inconsistency for {person_number} (Effectivity {effective_start_date}): Action '{action_code}' found without active employment.")
-                    else:
-                        # An active employment period exists. Check if LE changed.
-                        if current_le != legal_employer_name:
-                            # LE changed, but it's not a hire/rehire or termination.
-                            # Is this an allowed LE change action (e.g., GLOBAL_TRANSFER)?
-                            if action_code in allowed_le_change_actions_list:
-                                logger.info(f"Person {person_number} (Effectivity {effective_start_date}): Valid LE change from '{current_le}' to '{legal_employer_name}' via allowed action '{action_code}'.")
-                                current_le = legal_employer_name # Update current LE as this is an allowed change
-                            else:
-                                # This is an inconsistency: LE changed mid-employment without a proper trigger.
-                                inconsistent_records.append({
-                                    'PersonNumber': person_number,
-                                    'EffectiveStartDate': effective_start_date.strftime('%Y-%m-%d'),
-                                    'ActionCode': action_code,
-                                    'LegalEmployerName': legal_employer_name,
-                                    'PreviousLegalEmployer': current_le,
-                                    'Scenario': 'Legal Employer Name changed mid-employment without proper action',
-                                    'Status': f"Legal Employer Name changed from '{current_le}' to '{legal_employer_name}' with action '{action_code}'. This action is not a hire, termination, or an explicitly allowed LE change action."
-                                })
-                                logger.info(f"Inconsistency found for {person_number} (Effectivity {effective_start_date}): LE changed from '{current_le}' to '{legal_employer_name}' with invalid action '{action_code}'.")
-                                current_le = legal_employer_name # Still update for subsequent checks
-
-                    last_action_was_termination = False # Reset flag
+        # Sort once by (PersonNumber, EffectiveStartDate); rows with a missing Legal Employer Name are
+        # reported and left out of the employment state machine.
+        timeline = LegalEmployerTimeline(df, 'PERSONNUMBER', 'EFFECTIVESTARTDATE', 'ACTIONCODE', 'LEGALEMPLOYERNAME')
+        missing_le = np.array([pd.isna(le) or le == '' for le in timeline.le], dtype=bool)
+        transitions = timeline.employment_transitions(
+            hire_actions_list, termination_actions_list, allowed_le_change_actions_list, rows=~missing_le
+        )
+        previous_le = transitions["previous_le"]
+        eff_dates = timeline.dates.dt.strftime('%Y-%m-%d').to_numpy()
+
+        def scenario_record(i, scenario, status, with_previous=False):
+            record = {
+                'PersonNumber': timeline.person[i],
+                'EffectiveStartDate': eff_dates[i],
+                'ActionCode': timeline.action[i],
+                'LegalEmployerName': timeline.le[i],
+            }
+            if with_previous:
+                record['PreviousLegalEmployer'] = previous_le[i]
+            record['Scenario'] = scenario
+            record['Status'] = status
+            return record
+
+        flagged = (
+            missing_le | transitions["hire_le_change_without_termination"] | transitions["termination_without_hire"]
+            | transitions["termination_le_mismatch"] | transitions["action_without_employment"]
+            | transitions["le_change_without_allowed_action"]
+        )
+        for i in np.flatnonzero(flagged):
+            action_code, legal_employer_name, current_le = timeline.action[i], timeline.le[i], previous_le[i]
+            if missing_le[i]:
+                inconsistent_records.append(scenario_record(i, 'Missing Legal Employer Name', 'Legal Employer Name is missing or null for this record.'))
+            elif transitions["hire_le_change_without_termination"][i]:
+                inconsistent_records.append(scenario_record(
+                    i, 'Legal Employer Change with HIRE/REHIRE without prior Termination',
+                    f"Legal Employer changed to '{legal_employer_name}' with '{action_code}' but previous employment period was not terminated. Previous LE was '{current_le}'.",
+                    True
+                ))
+            elif transitions["termination_without_hire"][i]:
+                inconsistent_records.append(scenario_record(
+                    i, 'Termination without preceding active employment',
+                    'Termination record found without an active prior hire record for this person.'
+                ))
+            elif transitions["termination_le_mismatch"][i]:
+                inconsistent_records.append(scenario_record(
+                    i, 'Legal Employer Name Mismatch at Termination',
+                    f"Legal Employer '{legal_employer_name}' at termination does not match last active LE '{current_le}'.",
+                    True
+                ))
+            elif transitions["action_without_employment"][i]:
+                inconsistent_records.append(scenario_record(
+                    i, 'Action without active employment period',
+                    f"Record found with non-hire/termination action '{action_code}' and LE '{legal_employer_name}' outside an active employment period."
+                ))
+            else:
+                inconsistent_records.append(scenario_record(
+                    i, 'Legal Employer Name changed mid-employment without proper action',
+                    f"Legal Employer Name changed from '{current_le}' to '{legal_employer_name}' with action '{action_code}'. This action is not a hire, termination, or an explicitly allowed LE change action.",
+                    True
+                ))
+        logger.info(f"Chronological Legal Employer scan flagged {len(inconsistent_records)} record(s) across {len(set(timeline.person))} PersonNumber(s).")
 
         # --- Post-processing checks for hire/termination alignment (your original scenario 1 & 2) ---
         # These checks might duplicate some of what the chronological loop found, but can catch
@@ -3817,18 +5990,17 @@ async def validate_workterms_file(
                 seen_inconsistencies.add(rec_tuple)
 
         # Now, perform the original first-hire vs first-termination check
-        for person_number, group in df.groupby('PERSONNUMBER'):
-            hire_rows_sorted = group[group['ACTIONCODE'].isin(hire_actions_list)].sort_values(by='EFFECTIVESTARTDATE')
-            termination_rows_sorted = group[group['ACTIONCODE'].isin(termination_actions_list)].sort_values(by='EFFECTIVESTARTDATE')
+        first_hires = timeline.first_per_person(timeline.action_in(hire_actions_list))
+        first_terms = timeline.first_per_person(timeline.action_in(termination_actions_list))
+        for person_number in dict.fromkeys(timeline.person):
+            hire_i, term_i = first_hires.get(person_number), first_terms.get(person_number)
 
-            if not hire_rows_sorted.empty and not termination_rows_sorted.empty:
-                first_hire_le = hire_rows_sorted['LEGALEMPLOYERNAME'].iloc[0]
-                first_termination_le = termination_rows_sorted['LEGALEMPLOYERNAME'].iloc[0]
-                first_hire_date = hire_rows_sorted['EFFECTIVESTARTDATE'].iloc[0]
-                first_termination_date = termination_rows_sorted['EFFECTIVESTARTDATE'].iloc[0]
+            if hire_i is not None and term_i is not None:
+                first_hire_le = timeline.le[hire_i]
+                first_termination_le = timeline.le[term_i]
 
                 # Only check if first hire occurs BEFORE first termination
-                if first_hire_date < first_termination_date:
+                if timeline.dates.iloc[hire_i] < timeline.dates.iloc[term_i]:
                     if first_hire_le != first_termination_le:
                         rec_data = {
                             'PersonNumber': person_number,
@@ -3842,7 +6014,7 @@ async def validate_workterms_file(
                             unique_inconsistent_records_final.append(rec_data)
                             seen_inconsistencies.add(rec_tuple)
                             logger.info(f"Inconsistency found for {person_number} (First Hire vs First Termination LE): '{first_hire_le}' != '{first_termination_le}'")
-            elif not termination_rows_sorted.empty and hire_rows_sorted.empty:
+            elif term_i is not None and hire_i is None:
                 rec_data = {
                     'PersonNumber': person_number,
                     'Scenario': 'Termination without any Hire',
@@ -3894,6 +6066,209 @@ BUNDLE_DEPOT_ZONE = BASE_DIR / "BUNDLE_DEPOT_ZONE"
 # Create the funky folder if it doesn't exist
 BUNDLE_DEPOT_ZONE.mkdir(parents=True, exist_ok=True)
 
+#------------- DAT bundling ------------------#
+
+DAT_BUNDLE_PREAMBLE = "SET PURGE_FUTURE_CHANGES N\n\n"
+# Bundles are streamed here and moved into BUNDLE_DEPOT_ZONE once their final name is known
+DAT_BUNDLE_STAGING_DIR = BUNDLE_DEPOT_ZONE / ".staging"
+
+
+class DatFileIndex:
+    """
+    Filename -> path index of the .dat files under the validation results directory.
+
+    The tree is walked again only when one of its folders changed (adding, removing or
+    renaming a file bumps the folder mtime) or when a requested name is missing or gone,
+    so a bundle request no longer rglob()s the whole results directory.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._paths: Dict[str, Path] = {}
+        self._dir_mtimes: Dict[str, int] = {}
+        self.scans = 0
+
+    def _stale(self) -> bool:
+        if not self._dir_mtimes:
+            return True
+        for directory, mtime in self._dir_mtimes.items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _scan(self):
+        paths: Dict[str, Path] = {}
+        dir_mtimes: Dict[str, int] = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            try:
+                dir_mtimes[dirpath] = os.stat(dirpath).st_mtime_ns
+            except OSError:
+                continue
+            for name in filenames:
+                if name.endswith(".dat"):
+                    paths[name] = Path(dirpath) / name
+        self._paths = paths
+        self._dir_mtimes = dir_mtimes
+        self.scans += 1
+        logger.info(f"Indexed {len(paths)} .dat files under {self.root}.")
+
+    def _lookup(self, names: List[str]) -> Dict[str, Path]:
+        return {name: self._paths[name] for name in names if name in self._paths and self._paths[name].is_file()}
+
+    def resolve(self, names: List[str]) -> Dict[str, Path]:
+        """Returns the paths of the requested names that exist; walks the tree at most once per call."""
+        with self._lock:
+            scanned = self._stale()
+            if scanned:
+                self._scan()
+            found = self._lookup(names)
+            if len(found) < len(set(names)) and not scanned:
+                self._scan()
+                found = self._lookup(names)
+            return found
+
+
+DAT_FILE_INDEX = DatFileIndex(VALIDATION_RESULTS_DIR)
+
+DAT_BUNDLE_WORKERS = int(os.getenv("DAT_BUNDLE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Ranges at least this long are copied with os.sendfile where available
+DAT_BUNDLE_SENDFILE_MIN_BYTES = 64 * 1024
+DAT_BUNDLE_EXECUTOR = ThreadPoolExecutor(max_workers=DAT_BUNDLE_WORKERS, thread_name_prefix="dat-bundle")
+
+
+def copy_file_range(src, dst, start: int, length: int):
+    """Copies length bytes of src from offset start to the end of dst (both binary files)."""
+    if length >= DAT_BUNDLE_SENDFILE_MIN_BYTES and hasattr(os, "sendfile"):
+        dst.flush()
+        offset, remaining = start, length
+        while remaining > 0:
+            sent = os.sendfile(dst.fileno(), src.fileno(), offset, remaining)
+            if sent == 0:
+                raise OSError(f"Unexpected end of '{src.name}' at byte {offset}.")
+            offset += sent
+            remaining -= sent
+        dst.seek(0, os.SEEK_END)
+        return
+    src.seek(start)
+    data = src.read(length)
+    if len(data) != length:
+        raise OSError(f"Unexpected end of '{src.name}' at byte {start + len(data)}.")
+    dst.write(data)
+
+
+class DatBundleGroupWriter:
+    """
+    Writer for the bundle of one W-group.
+
+    Lines are appended to a staging file under DAT_BUNDLE_STAGING_DIR as they are copied
+    out of the inputs. A METADATA header (and a blank separator line) is written whenever
+    the source component changes, producing the same bytes as joining the group's lines
+    with newlines after the preamble. finish() moves the staging file to its final name.
+    """
+
+    def __init__(self, group_key: str, staging_dir: Path):
+        self.group_key = group_key
+        self.path = staging_dir / f"{group_key}_{uuid.uuid4().hex}.part"
+        self.newline = os.linesep.encode("utf-8")
+        self.file = open(self.path, "wb")
+        self.file.write(DAT_BUNDLE_PREAMBLE.replace("\n", os.linesep).encode("utf-8"))
+        self.has_lines = False
+        self.current_source: Optional[str] = None
+        self.finished = False
+
+    def _start_line(self):
+        if self.has_lines:
+            self.file.write(self.newline)
+        self.has_lines = True
+
+    def begin_source(self, source: str, header: Optional[str]):
+        """Starts the block of source, writing its header unless the previous block came from it too."""
+        if source == self.current_source:
+            return
+        if self.current_source is not None:
+            self._start_line()
+        if header:
+            self._start_line()
+            self.file.write(header.encode("utf-8"))
+        else:
+            logger.warning(f"Header for source file '{source}' not found. Skipping header for this block in '{self.group_key}' bundle.")
+        self.current_source = source
+
+    def write_line(self, line: bytes):
+        self._start_line()
+        self.file.write(line)
+
+    def copy_line(self, src, start: int, length: int):
+        """Appends bytes [start, start + length) of the binary file src as the next line."""
+        self._start_line()
+        copy_file_range(src, self.file, start, length)
+
+    def finish(self, save_path: Path):
+        self.file.close()
+        os.replace(self.path, save_path)
+        self.finished = True
+
+    def discard(self):
+        if not self.file.closed:
+            self.file.close()
+        if not self.finished:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def write_dat_bundle_group(group_key: str, blocks: List[tuple], save_path: Path):
+    """
+    Writes the bundle of one W-group to save_path through a DatBundleGroupWriter. blocks holds
+    (filename, path, header, index) for every input file with lines in this group, in bundle
+    order; index is None when it is read back from the file's sidecar. Each input's lines are
+    copied as byte ranges; only lines that need stripping are decoded.
+    """
+    writer = DatBundleGroupWriter(group_key, DAT_BUNDLE_STAGING_DIR)
+    try:
+        for fname, dat_path, header, index in blocks:
+            if index is None:
+                index = DatGroupIndex.load(dat_path)
+                if index is None:
+                    raise RuntimeError(f"File '{fname}' changed while it was being bundled.")
+            writer.begin_source(fname, header)
+            starts, ends, needs_strip = index.group_ranges(group_key)
+            with open(dat_path, "rb") as src:
+                for start, end, strip in zip(starts.tolist(), ends.tolist(), needs_strip.tolist()):
+                    if strip:
+                        src.seek(start)
+                        writer.write_line(src.read(end - start).decode("utf-8").strip().encode("utf-8"))
+                    else:
+                        writer.copy_line(src, start, end - start)
+        writer.finish(save_path)
+    finally:
+        writer.discard()
+
+
+def dat_bundle_plan(dat_path: Path) -> Optional[Tuple[dict, Optional[DatGroupIndex]]]:
+    """
+    (index metadata, index) for one bundle input; None for an empty file. The file is scanned
+    only when it has no up-to-date sidecar, and the scan is saved for the next bundle. index is
+    None when write_dat_bundle_group can read it back from the sidecar.
+    """
+    meta = DatGroupIndex.load_meta(dat_path)
+    if meta is not None:
+        return meta, None
+    index = DatGroupIndex.scan(dat_path)
+    if index is None:
+        return None
+    try:
+        index.save(dat_path)
+    except Exception as e:
+        logger.warning(f"Could not save the group index of '{dat_path}': {e}")
+        return index.meta(), index
+    return index.meta(), None
+
 
 class FileBundleRequest(BaseModel):
     """
@@ -3913,6 +6288,11 @@ async def bundle_dat_files_in_order(payload: FileBundleRequest):
     The bundle filename will include the W-group, a list of original component names (without _passed_data_timestamp), and a timestamp.
     Returns a list of URLs for the generated bundle files.
     """
+    return await BLOCKING_WORK_POOL.run("download-bundle", run_dat_bundle, payload)
+
+
+def run_dat_bundle(payload: FileBundleRequest):
+    """Synchronous body of /api/hdl/download-bundle; runs on BLOCKING_WORK_POOL."""
     logger.info(f"Received bundle request for files: {payload.files}")
     try:
         if not payload.files:
@@ -3921,131 +6301,67 @@ async def bundle_dat_files_in_order(payload: FileBundleRequest):
 
         # Initialize bundle_results here
         bundle_results = []
-        
-        # Recursively find all .dat files in VALIDATION_RESULTS_DIR
-        all_dat_paths = {f.name: f for f in VALIDATION_RESULTS_DIR.rglob("*.dat")}
-        logger.info(f"Found {len(all_dat_paths)} .dat files in VALIDATION_RESULTS_DIR.")
 
-        # Dictionary to hold individual data records grouped by 'W{integer}'
-        # Key: "W1", "W2", etc. Value: List of tuples (data_line_string, original_filename_string)
-        grouped_records: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
-        
+        dat_paths = DAT_FILE_INDEX.resolve(payload.files)
+        logger.info(f"Resolved {len(dat_paths)} of {len(set(payload.files))} requested .dat files from the results index.")
+
         # Store headers for each file, keyed by filename
         all_file_headers: Dict[str, str] = {}
 
-        # To store the set of original filenames that contribute to each group
-        group_source_components: Dict[str, Set[str]] = defaultdict(set)
-
-        # Regex to capture the "W{integer}" pattern from the content.
-        content_pattern = re.compile(r"(W\d+)", re.IGNORECASE)
-        logger.debug(f"Using content regex pattern: {content_pattern.pattern}")
-
         # Regex to remove '_passed_data_YYYYMMDD_HHMMSS' from filenames
         filename_cleanup_pattern = re.compile(r'_passed_data_\d{8}_\d{6}')
 
-        for fname in payload.files:
+        # Groups keep the order in which the payload first produced them
+        payload_positions: Dict[str, int] = {}
+        for position, fname in enumerate(payload.files):
+            payload_positions.setdefault(fname, position)
+
+        # Key: "W1", "W2", etc. Value: (filename, path, header, index) per contributing file, in bundle order
+        group_blocks: Dict[str, List[tuple]] = defaultdict(list)
+        group_order: Dict[str, Tuple[int, int]] = {}
+
+        # Records within a bundle are ordered by source filename, so the files are planned in that
+        # order; sorted() is stable, so a name listed twice is bundled twice back to back.
+        for fname in sorted(payload.files):
             logger.debug(f"Processing file: {fname}")
-            dat_path = all_dat_paths.get(fname)
+            dat_path = dat_paths.get(fname)
             if not dat_path:
                 logger.warning(f"File '{fname}' not found in validation results directory. Skipping.")
                 continue
 
-            try:
-                with open(dat_path, "r", encoding="utf-8") as f:
-                    lines = f.readlines()
-                    
-                    if not lines:
-                        logger.warning(f"File '{fname}' is empty. Skipping.")
-                        continue
-
-                    # Log raw lines to debug what's actually being read
-                    logger.debug(f"File '{fname}': Raw lines[0]: '{lines[0].strip()}'")
-                    if len(lines) > 1:
-                        logger.debug(f"File '{fname}': Raw lines[1]: '{lines[1].strip()}'")
-
-                    # The actual header line is the one starting with "METADATA|"
-                    current_file_metadata_line = lines[0].strip()
-                    
-                    if not current_file_metadata_line.startswith("METADATA|"):
-                        logger.error(f"File '{fname}': First line does not start with 'METADATA|'. Expected header format not found. Treating all lines as ungrouped data.")
-                        # If the first line isn't the expected METADATA header,
-                        # we can't reliably find SourceSystemId. Group all its data as ungrouped.
-                        # These will now go into the 'W1' bundle as per the new logic.
-                        for data_line in lines: # All lines are potentially data if header is missing
-                            grouped_records["W1"].append((data_line.strip(), fname)) # Group into W1
-                            group_source_components["W1"].add(fname)
-                        continue # Skip to next file
-
-                    # Store this file's header for later use in bundling
-                    all_file_headers[fname] = current_file_metadata_line
-                    logger.debug(f"Stored header for '{fname}': '{current_file_metadata_line}'")
-                    
-                    # Determine SourceSystemId column index for *this specific file's header*
-                    # Use the METADATA line itself to get the headers
-                    current_headers = [h.strip() for h in current_file_metadata_line.split('|')]
-                    current_source_system_id_col_index = -1
-                    for i, header in enumerate(current_headers):
-                        if "SourceSystemId" in header: # Checks for "SourceSystemId" or "PersonId(SourceSystemId)"
-                            current_source_system_id_col_index = i
-                            break
-                    
-                    if current_source_system_id_col_index == -1:
-                        logger.warning(f"File '{fname}': 'SourceSystemId' column not found in its METADATA/HEADER line. All data records from this file will be grouped as 'W1'.")
-                        # If SourceSystemId is not found in this file's header, all its data lines go to 'W1'
-                        for line_num, data_line in enumerate(lines[1:], start=2): # Iterate from the first data line
-                            grouped_records["W1"].append((data_line.strip(), fname))
-                            group_source_components["W1"].add(fname)
-                        continue # Move to next file
-
-                    # Process data lines (starting from the second line, as first is METADATA/HEADER)
-                    for line_num, data_line in enumerate(lines[1:], start=2):
-                        data_line_stripped = data_line.strip()
-                        if not data_line_stripped: # Skip empty data lines
-                            continue
-
-                        data_fields = data_line_stripped.split('|')
-                        
-                        if len(data_fields) > current_source_system_id_col_index:
-                            source_system_id_value = data_fields[current_source_system_id_col_index]
-                            logger.debug(f"File '{fname}', Line {line_num}: Extracted 'SourceSystemId' value: '{source_system_id_value}'")
-                            match = content_pattern.search(source_system_id_value)
-                            if match:
-                                group_key = match.group(1) # Extract the captured "W{integer}"
-                                # If the group key is W1, or if it was originally 'ungrouped', map it to 'W1'
-                                if group_key.upper() == "W1":
-                                    grouped_records["W1"].append((data_line_stripped, fname))
-                                    group_source_components["W1"].add(fname)
-                                    logger.debug(f"File '{fname}', Line {line_num}: Found '{group_key}'. Appended to group 'W1'.")
-                                else:
-                                    grouped_records[group_key].append((data_line_stripped, fname))
-                                    group_source_components[group_key].add(fname)
-                                    logger.debug(f"File '{fname}', Line {line_num}: Found '{group_key}'. Appended to group '{group_key}'.")
-                            else:
-                                # If no W{integer} pattern found, append to 'W1' group
-                                grouped_records["W1"].append((data_line_stripped, fname))
-                                group_source_components["W1"].add(fname)
-                                logger.debug(f"File '{fname}', Line {line_num}: No 'W{{integer}}' pattern found in 'SourceSystemId' ('{source_system_id_value}'). Appended to 'W1'.")
-                        else:
-                            # If SourceSystemId column value is not accessible, append to 'W1' group
-                            grouped_records["W1"].append((data_line_stripped, fname))
-                            group_source_components["W1"].add(fname)
-                            logger.warning(f"File '{fname}', Line {line_num}: Data line has fewer columns ({len(data_fields)}) than expected for 'SourceSystemId' index ({current_source_system_id_col_index}). Appended to 'W1'.")
-
+            try:
+                plan = dat_bundle_plan(dat_path)
             except Exception as file_process_error:
+                # An unreadable file (e.g. invalid UTF-8) is skipped as a whole
                 logger.error(f"Error processing file '{fname}': {file_process_error}", exc_info=True)
-                # If an error occurs during processing a file, its records might be lost or misgrouped.
-                # For robustness, we could try to append remaining lines to 'W1' group.
-                # For now, just log and skip this file's further processing.
+                continue
+            if plan is None:
+                logger.warning(f"File '{fname}' is empty. Skipping.")
+                continue
+            meta, index = plan
 
+            header = None
+            if not meta["has_header"]:
+                logger.error(f"File '{fname}': First line does not start with 'METADATA|'. Expected header format not found. Treating all lines as ungrouped data.")
+            else:
+                # Store this file's header for later use in bundling
+                header = all_file_headers[fname] = meta["header"]
+                if meta["sid_index"] == -1:
+                    logger.warning(f"File '{fname}': 'SourceSystemId' column not found in its METADATA/HEADER line. All data records from this file will be grouped as 'W1'.")
+            for group_key, first_line in meta["first_seen"].items():
+                group_blocks[group_key].append((fname, dat_path, header, index))
+                position = (payload_positions[fname], first_line)
+                if group_key not in group_order or position < group_order[group_key]:
+                    group_order[group_key] = position
 
         # Final check if any records were grouped at all
-        if not grouped_records:
+        if not group_blocks:
             logger.warning("No data records were successfully grouped from any of the provided files.")
             raise HTTPException(
                 status_code=404,
                 detail="No data records found or processed from the provided files for bundling."
             )
-        
+
         # Ensure that all necessary headers were captured from the input files.
         # If any file was processed and had data, its header should be in all_file_headers.
         if not all_file_headers:
@@ -4055,65 +6371,27 @@ async def bundle_dat_files_in_order(payload: FileBundleRequest):
                 detail="Failed to extract essential METADATA/Header information from input files. Cannot proceed with bundling."
             )
 
-        # Log the final state of grouped_records and group_source_components before bundle generation
-        logger.info(f"Final grouped records before bundle generation (showing first 50 chars of each record and source file):")
-        for k, v in grouped_records.items():
-            logger.info(f"   Group '{k}' has {len(v)} records. Example: {[f'{rec[:50]}... (from {src})' for rec, src in v[:min(3, len(v))]]}")
-        logger.info(f"Final group source components: {json.dumps({k: list(v) for k, v in group_source_components.items()}, indent=2)}")
-
+        ordered_groups = sorted(group_blocks, key=lambda group_key: group_order[group_key])
+        group_source_components = {group_key: sorted({block[0] for block in group_blocks[group_key]}) for group_key in ordered_groups}
+        logger.info(f"Final group source components: {json.dumps(group_source_components, indent=2)}")
 
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        logger.info(f"Starting bundle generation for {len(grouped_records)} groups.")
-
-        # Generate bundles for each group
-        for group_key, records_with_source_list in grouped_records.items():
-            if not records_with_source_list:
-                logger.debug(f"Skipping empty group: '{group_key}'.")
-                continue # Skip empty groups (e.g., if 'ungrouped' is empty)
-
-            # Build the content for the bundle, adding specific headers and line breaks
-            bundle_content_lines = []
-            previous_source_fname = None
-            
-            # Sort records by original filename to ensure components are grouped together within the bundle
-            records_with_source_list.sort(key=lambda x: x[1])
-
-            for record_line, source_fname in records_with_source_list:
-                # If the source file changes, add a line break and the new component's header
-                if previous_source_fname is None or source_fname != previous_source_fname:
-                    if previous_source_fname is not None: # Don't add a blank line before the very first header in the bundle
-                        bundle_content_lines.append("") # Add a blank line for separation
-                        logger.debug(f"Added line break in '{group_key}' bundle: source changed from '{previous_source_fname}' to '{source_fname}'")
-                    
-                    # Retrieve the header for the current component (source_fname)
-                    header_for_current_component = all_file_headers.get(source_fname)
-                    if header_for_current_component:
-                        bundle_content_lines.append(header_for_current_component)
-                        logger.debug(f"Added header for component '{source_fname}' to '{group_key}' bundle.")
-                    else:
-                        logger.warning(f"Header for source file '{source_fname}' not found in all_file_headers. Skipping header for this block in '{group_key}' bundle.")
-
-                bundle_content_lines.append(record_line)
-                previous_source_fname = source_fname
-            
-            # Construct the full content for the bundle
-            combined_content = "\n".join(bundle_content_lines)
-            
-            # Prepend the required command to the combined content
-            final_bundle_content = "SET PURGE_FUTURE_CHANGES N\n\n" + combined_content
+        logger.info(f"Starting bundle generation for {len(ordered_groups)} groups.")
+        DAT_BUNDLE_STAGING_DIR.mkdir(parents=True, exist_ok=True)
 
+        # Groups are independent, so their bundles are written concurrently
+        pending = []
+        for group_key in ordered_groups:
             # Construct filename for the bundle based on the group key and component list
-            # Get sorted unique component names for this group
-            component_names_for_bundle = sorted(list(group_source_components[group_key]))
             # Remove the '_passed_data_timestamp' pattern and '.dat' extension for cleaner filename
             clean_component_names = []
-            for name in component_names_for_bundle:
+            for name in group_source_components[group_key]:
                 cleaned_name = filename_cleanup_pattern.sub('', name) # Remove _passed_data_timestamp
                 cleaned_name = cleaned_name.replace('.dat', '') # Remove .dat extension
                 clean_component_names.append(cleaned_name)
-            
+
             components_string = "_".join(clean_component_names)
-            
+
             # Ensure filename doesn't get too long (optional, but good practice)
             max_filename_len = 200 # Max length for the component string part
             if len(components_string) > max_filename_len:
@@ -4121,16 +6399,18 @@ async def bundle_dat_files_in_order(payload: FileBundleRequest):
                 logger.warning(f"Component string for filename truncated for group '{group_key}'.")
 
             bundle_filename = f"{group_key}_{components_string}_{timestamp}.dat"
-            
+
             # Define the full path where the bundled file will be saved
             save_path = BUNDLE_DEPOT_ZONE / bundle_filename
+            future = DAT_BUNDLE_EXECUTOR.submit(write_dat_bundle_group, group_key, group_blocks[group_key], save_path)
+            pending.append((group_key, bundle_filename, save_path, future))
 
+        for group_key, bundle_filename, save_path, future in pending:
             try:
-                with open(save_path, "w", encoding="utf-8") as f:
-                    f.write(final_bundle_content) # Write the content with the prepended command
-                
+                future.result()
+
                 logger.info(f"Successfully generated bundle for group '{group_key}': {save_path}")
-                
+
                 # Add the bundle information to the results list
                 bundle_results.append({
                     "group": group_key,
@@ -4288,6 +6568,237 @@ def load_oracle_credentials(customer_name: str, instance_name: str):
 
     return oracle_env, username, password
 
+#------------- Oracle REST client ------------------#
+HCM_REST_PATH = "/hcmRestApi/resources/11.13.18.05"
+ORACLE_HTTP_CONNECT_TIMEOUT = float(os.getenv("ORACLE_HTTP_CONNECT_TIMEOUT", "10"))
+ORACLE_HTTP_READ_TIMEOUT = float(os.getenv("ORACLE_HTTP_READ_TIMEOUT", "120"))
+ORACLE_HTTP_MAX_CONNECTIONS = int(os.getenv("ORACLE_HTTP_MAX_CONNECTIONS", "8"))
+# Requests per customer/instance running at once; the rest wait for a slot
+ORACLE_HTTP_MAX_CONCURRENCY = int(os.getenv("ORACLE_HTTP_MAX_CONCURRENCY", "8"))
+ORACLE_HTTP_RETRIES = int(os.getenv("ORACLE_HTTP_RETRIES", "3"))
+ORACLE_HTTP_BACKOFF_SECONDS = float(os.getenv("ORACLE_HTTP_BACKOFF_SECONDS", "0.5"))
+ORACLE_HTTP_MAX_BACKOFF_SECONDS = float(os.getenv("ORACLE_HTTP_MAX_BACKOFF_SECONDS", "30"))
+ORACLE_HTTP_RETRY_STATUSES = {429, 500, 502, 503, 504}
+# HTTP/2 needs the optional h2 package; without it connections are HTTP/1.1 keep-alive
+ORACLE_HTTP2 = os.getenv("ORACLE_HTTP2", "true").lower() == "true" and importlib.util.find_spec("h2") is not None
+ORACLE_HTTP_LATENCY_SAMPLES = 512
+
+
+class OracleRestClient:
+    """
+    Shared httpx.AsyncClient for one Oracle HCM instance.
+
+    Connections are kept alive between requests (HTTP/2 when available) and at most
+    max_concurrency requests are sent at once; the others wait for a slot. 429/5xx
+    responses and transport errors are retried with jittered exponential backoff,
+    honouring Retry-After. POSTs are only retried when Oracle cannot have acted on
+    them: 429/503 responses, or a connection that was never established.
+    """
+
+    def __init__(self, name: str, base_url: str, username: str, password: str, previous: Optional["OracleRestClient"] = None):
+        self.name = name
+        self.base_url = base_url
+        self.credentials = (username, password)
+        self.loop = asyncio.get_running_loop()
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            auth=(username, password),
+            http2=ORACLE_HTTP2,
+            timeout=httpx.Timeout(ORACLE_HTTP_READ_TIMEOUT, connect=ORACLE_HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=ORACLE_HTTP_MAX_CONNECTIONS, max_keepalive_connections=ORACLE_HTTP_MAX_CONNECTIONS),
+        )
+        self._slots = asyncio.Semaphore(ORACLE_HTTP_MAX_CONCURRENCY)
+        # Counters survive a rebuild caused by changed credentials
+        self.metrics = previous.metrics if previous is not None else {
+            "requests": 0, "attempts": 0, "retries": 0, "transport_errors": 0, "failed": 0,
+            "responses": defaultdict(int), "waited": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0,
+            "max_waiting": 0, "latency_seconds": 0.0, "max_latency_seconds": 0.0,
+            "latency_samples": deque(maxlen=ORACLE_HTTP_LATENCY_SAMPLES),
+        }
+        self.in_flight = 0
+        self.waiting = 0
+
+    def _retryable(self, method: str, response: Optional[httpx.Response], error: Optional[Exception]) -> bool:
+        idempotent = method.upper() in ("GET", "HEAD", "OPTIONS")
+        if error is not None:
+            return idempotent or isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+        if response.status_code not in ORACLE_HTTP_RETRY_STATUSES:
+            return False
+        return idempotent or response.status_code in (429, 503)
+
+    @staticmethod
+    def _backoff(attempt: int, response: Optional[httpx.Response]) -> float:
+        delay = random.uniform(0, min(ORACLE_HTTP_MAX_BACKOFF_SECONDS, ORACLE_HTTP_BACKOFF_SECONDS * 2 ** attempt))
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.strip().isdigit():
+            delay = max(delay, min(float(retry_after), ORACLE_HTTP_MAX_BACKOFF_SECONDS))
+        return delay
+
+    async def _send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        metrics = self.metrics
+        self.waiting += 1
+        if self._slots.locked():
+            metrics["max_waiting"] = max(metrics["max_waiting"], self.waiting)
+        wait_started = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - wait_started
+        if waited > 0.001:
+            metrics["waited"] += 1
+            metrics["wait_seconds"] += waited
+            metrics["max_wait_seconds"] = max(metrics["max_wait_seconds"], waited)
+        self.in_flight += 1
+        metrics["attempts"] += 1
+        started = time.perf_counter()
+        try:
+            return await self.client.request(method, path, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics["latency_seconds"] += elapsed
+            metrics["max_latency_seconds"] = max(metrics["max_latency_seconds"], elapsed)
+            metrics["latency_samples"].append(elapsed)
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def request(self, method: str, path: str, content_factory=None, **kwargs) -> httpx.Response:
+        """
+        Sends method to base_url + path with retries. A streamed body must be passed as
+        content_factory, called once per attempt, so that it can be replayed.
+        """
+        self.metrics["requests"] += 1
+        attempt = 0
+        while True:
+            if content_factory is not None:
+                kwargs["content"] = content_factory()
+            response, error = None, None
+            try:
+                response = await self._send(method, path, **kwargs)
+                self.metrics["responses"][f"{response.status_code // 100}xx"] += 1
+            except httpx.TransportError as e:
+                self.metrics["transport_errors"] += 1
+                error = e
+            if attempt >= ORACLE_HTTP_RETRIES or not self._retryable(method, response, error):
+                if error is not None:
+                    self.metrics["failed"] += 1
+                    raise error
+                return response
+            delay = self._backoff(attempt, response)
+            attempt += 1
+            self.metrics["retries"] += 1
+            logger.warning(
+                f"Oracle {self.name} {method} {path.split('?')[0]} "
+                f"{'failed: ' + str(error) if error else 'returned HTTP ' + str(response.status_code)}; "
+                f"retry {attempt}/{ORACLE_HTTP_RETRIES} in {delay:.2f}s"
+            )
+            if response is not None:
+                await response.aclose()
+            await asyncio.sleep(delay)
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    def stats(self) -> dict:
+        metrics = self.metrics
+        samples = sorted(metrics["latency_samples"])
+
+        def percentile(q: float) -> Optional[float]:
+            return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 1) if samples else None
+
+        return {
+            "base_url": self.base_url,
+            "http2": ORACLE_HTTP2,
+            "max_connections": ORACLE_HTTP_MAX_CONNECTIONS,
+            "max_concurrency": ORACLE_HTTP_MAX_CONCURRENCY,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_waiting": metrics["max_waiting"],
+            "requests": metrics["requests"],
+            "attempts": metrics["attempts"],
+            "retries": metrics["retries"],
+            "transport_errors": metrics["transport_errors"],
+            "failed": metrics["failed"],
+            "responses": dict(metrics["responses"]),
+            "latency_ms": {
+                "avg": round(metrics["latency_seconds"] / metrics["attempts"] * 1000, 1) if metrics["attempts"] else None,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(metrics["max_latency_seconds"] * 1000, 1),
+            },
+            "saturation": {
+                "waited_requests": metrics["waited"],
+                "avg_wait_ms": round(metrics["wait_seconds"] / metrics["waited"] * 1000, 1) if metrics["waited"] else 0.0,
+                "max_wait_ms": round(metrics["max_wait_seconds"] * 1000, 1),
+            },
+        }
+
+
+class OracleRestClients:
+    """One OracleRestClient per customer/instance, rebuilt when its URL or credentials change."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[str, OracleRestClient] = {}
+
+    def get(self, name: str, base_url: str, username: str, password: str) -> OracleRestClient:
+        base_url = (base_url or "").strip().rstrip("/")
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(name)
+            if client is not None and (client.base_url, client.credentials, client.loop) == (base_url, (username, password), loop):
+                return client
+            if client is not None and client.loop is loop:
+                loop.create_task(client.client.aclose())
+            self._clients[name] = OracleRestClient(name, base_url, username, password, previous=client)
+            return self._clients[name]
+
+    def for_instance(self, customer_name: str, instance_name: str) -> OracleRestClient:
+        oracle_env, username, password = load_oracle_credentials(customer_name, instance_name)
+        return self.get(f"{customer_name}/{instance_name}", oracle_env, username, password)
+
+    async def aclose(self):
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.client.aclose()
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {name: client.stats() for name, client in self._clients.items()}
+
+
+ORACLE_REST_CLIENTS = OracleRestClients()
+
+
+@app.on_event("shutdown")
+async def close_oracle_rest_clients():
+    await ORACLE_REST_CLIENTS.aclose()
+
+
+async def iterate_in_thread(iterable) -> Any:
+    """Async iterator over a blocking iterable; each item is produced on a worker thread."""
+    iterator = iter(iterable)
+    done = object()
+    try:
+        while True:
+            item = await asyncio.to_thread(next, iterator, done)
+            if item is done:
+                break
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            try:
+                close()
+            except ValueError:
+                # Still running on its worker thread after a cancellation; it is released when that step returns
+                pass
+
+
 class OracleUploadRequest(BaseModel):
     content: str
     fileName: str
@@ -4302,8 +6813,7 @@ async def upload_zip_to_oracle(req: OracleUploadRequest):
         customerName = req.customerName
         instanceName = req.instanceName
         oracle_env, username, password = load_oracle_credentials(customerName, instanceName)
-
-        url = f"{oracle_env}/hcmRestApi/resources/11.13.18.05/dataLoadDataSets/action/uploadFile"
+        oracle = ORACLE_REST_CLIENTS.get(f"{customerName}/{instanceName}", oracle_env, username, password)
 
         # ✅ Build payload strictly per schema
         payload = {
@@ -4318,7 +6828,7 @@ async def upload_zip_to_oracle(req: OracleUploadRequest):
         logger.info("Uploading HDL file to Oracle")
         logger.debug("Final Oracle payload: %s", json.dumps(payload, indent=2))
 
-        res = requests.post(url, json=payload, auth=(username, password), headers=headers)
+        res = await oracle.post(f"{HCM_REST_PATH}/dataLoadDataSets/action/uploadFile", json=payload, headers=headers)
         res.raise_for_status()
         response = {
             "status_code": res.status_code,
@@ -4331,20 +6841,167 @@ async def upload_zip_to_oracle(req: OracleUploadRequest):
         }
         return response
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("HDL upload failed")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+#------------- Bundle submission ------------------#
+
+SUBMIT_BUNDLE_READ_BYTES = 1024 * 1024
+
+
+class ZipChunkSink:
+    """
+    Write-only target for zipfile that keeps what was written until it is drained. zipfile
+    treats it as unseekable, so entries are written with trailing data descriptors and the
+    archive can be forwarded while it is being compressed.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.bytes_written = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.bytes_written += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_hdl_upload_body(dat_path: Path, arcname: str, file_name: str, content_id: Optional[str],
+                           file_encryption: str, stats: Dict[str, int]) -> Iterator[bytes]:
+    """
+    Yields the dataLoadDataSets/action/uploadFile JSON body for dat_path zipped as arcname.
+    The zip is deflated and base64-encoded a chunk at a time straight into the body, so
+    neither the archive nor its encoding is held in memory. stats receives the zip and
+    body sizes once the body is exhausted.
+    """
+    head = json.dumps({"fileName": file_name, "contentId": content_id})[:-1] + ', "content": "'
+    tail = '", "fileEncryption": ' + json.dumps(file_encryption) + "}"
+    sink = ZipChunkSink()
+    carry = b""
+
+    def encode(data: bytes, final: bool = False) -> bytes:
+        # base64 is emitted in multiples of 3 input bytes so the chunks concatenate to one encoding
+        nonlocal carry
+        data = carry + data
+        cut = len(data) if final else len(data) - len(data) % 3
+        carry = data[cut:]
+        return base64.b64encode(data[:cut])
+
+    head_bytes = head.encode("utf-8")
+    body_bytes = len(head_bytes)
+    yield head_bytes
+    zinfo = zipfile.ZipInfo.from_file(dat_path, arcname=arcname)
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zipf:
+        with open(dat_path, "rb") as src, zipf.open(zinfo, "w") as entry:
+            while True:
+                chunk = src.read(SUBMIT_BUNDLE_READ_BYTES)
+                if not chunk:
+                    break
+                entry.write(chunk)
+                encoded = encode(sink.drain())
+                if encoded:
+                    body_bytes += len(encoded)
+                    yield encoded
+    # Closing the archive wrote the data descriptor and the central directory
+    for part in (encode(sink.drain(), final=True), tail.encode("utf-8")):
+        body_bytes += len(part)
+        yield part
+    stats.update({"zip_bytes": sink.bytes_written, "body_bytes": body_bytes})
+
+
+class BundleSubmitRequest(BaseModel):
+    fileName: str
+    componentName: str
+    customerName: str
+    instanceName: str
+    # Name Oracle stores the zip under; defaults to fileName with .zip, as /api/hdl/zip-dat names it
+    uploadFileName: Optional[str] = None
+    contentId: Optional[str] = None
+    fileEncryption: Optional[str] = None
+
+
+def resolve_bundle_path(file_name: str) -> Optional[Path]:
+    """Path of a generated bundle in BUNDLE_DEPOT_ZONE, looked up directly before searching subfolders."""
+    if Path(file_name).name != file_name:
+        return None
+    direct = BUNDLE_DEPOT_ZONE / file_name
+    if direct.is_file():
+        return direct
+    matches = [path for path in BUNDLE_DEPOT_ZONE.rglob(file_name) if DAT_BUNDLE_STAGING_DIR not in path.parents]
+    return matches[0] if matches else None
+
+
+@app.post("/api/hdl/submit-bundle")
+async def submit_bundle_to_oracle(req: BundleSubmitRequest):
+    """
+    Zips a generated bundle as <componentName>.dat and uploads it to Oracle's
+    dataLoadDataSets/action/uploadFile in one step, replacing the zip-dat ->
+    zip-to-base64-by-name -> upload-to-oracle round trip through the browser.
+    The request body is produced while the bundle is compressed and encoded.
+    """
+    if not req.fileName.endswith(".dat"):
+        raise HTTPException(status_code=400, detail="File must be a .dat file")
+    bundle_path = resolve_bundle_path(req.fileName)
+    if bundle_path is None:
+        raise HTTPException(status_code=404, detail="Original .dat file not found.")
+
+    try:
+        oracle = ORACLE_REST_CLIENTS.for_instance(req.customerName, req.instanceName)
+        upload_file_name = req.uploadFileName or req.fileName.replace(".dat", ".zip")
+        headers = {"Content-Type": "application/vnd.oracle.adf.action+json"}
+        stats: Dict[str, int] = {}
+
+        def body():
+            # A fresh stream per attempt, so a retried upload resends the whole zip
+            return iterate_in_thread(stream_hdl_upload_body(
+                bundle_path, f"{req.componentName}.dat", upload_file_name, req.contentId,
+                req.fileEncryption or "NONE", stats
+            ))
+
+        logger.info(f"Submitting bundle {bundle_path.name} to Oracle as {upload_file_name}")
+        started = time.perf_counter()
+        res = await oracle.post(
+            f"{HCM_REST_PATH}/dataLoadDataSets/action/uploadFile", content_factory=body, headers=headers
+        )
+        res.raise_for_status()
+        logger.info(
+            f"Submitted {bundle_path.name}: {bundle_path.stat().st_size} bytes -> {stats.get('zip_bytes')} zipped, "
+            f"{stats.get('body_bytes')} sent in {time.perf_counter() - started:.2f}s"
+        )
+        return {
+            "status_code": res.status_code,
+            "response_text": res.json(),
+            "fileName": upload_file_name,
+            "zip_bytes": stats.get("zip_bytes"),
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("HDL bundle submission failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/hdl/trigger-oracle-job")
 async def trigger_hdl_job(req: HDLTriggerRequest):
     try:
         # ✅ Extract values properly from req, not the class
         customerName = req.customerName
         instanceName = req.instanceName
-        oracle_env, username, password = load_oracle_credentials(customerName, instanceName)
-
-        url = f"{oracle_env}/hcmRestApi/resources/11.13.18.05/dataLoadDataSets/action/createFileDataSet"
+        oracle = ORACLE_REST_CLIENTS.for_instance(customerName, instanceName)
 
         # ✅ Build payload strictly according to schema
         payload = {
@@ -4372,9 +7029,9 @@ async def trigger_hdl_job(req: HDLTriggerRequest):
                     payload.get("dataSetName"), payload.get("contentId"))
         logger.debug("Final Oracle payload: %s", json.dumps(payload, indent=2))
 
-        res = requests.post(url, auth=(username, password), headers=headers, json=payload)
+        res = await oracle.post(f"{HCM_REST_PATH}/dataLoadDataSets/action/createFileDataSet", headers=headers, json=payload)
 
-        if not res.ok:
+        if not res.is_success:
             logger.warning("Oracle HDL job trigger failed | Status=%s | Response=%s",
                            res.status_code, res.text)
             raise HTTPException(status_code=res.status_code,
@@ -4398,8 +7055,89 @@ async def trigger_hdl_job(req: HDLTriggerRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+#------------- HDL status ------------------#
+# A status fetched from Oracle this recently is served again instead of asking Oracle
+HDL_STATUS_FRESH_SECONDS = float(os.getenv("HDL_STATUS_FRESH_SECONDS", "3"))
+HDL_STATUS_LATEST_KEEP = 1024
+# Same final states the job screen stops polling on
+HDL_FINAL_STATUSES = {"COMPLETED", "ORA_SUCCESS", "SUCCESS", "ERROR", "ORA_IN_ERROR", "FAILED", "WARNING", "CANCELLED"}
+
+
+def hdl_status_code(data: dict) -> str:
+    """Status of a dataLoadDataSets record, read the way the job screen reads it."""
+    return str(data.get("DataSetStatusCode") or data.get("Status") or "UNKNOWN")
+
+
+class HdlStatusFetcher:
+    """
+    Single-flight reads of dataLoadDataSets/{RequestId}.
+
+    Concurrent reads of the same customer/instance/RequestId share one Oracle call and a
+    status younger than HDL_STATUS_FRESH_SECONDS is reused, so browsers watching the same
+    load and the background poller do not multiply Oracle traffic. Every status fetched
+    from Oracle is passed to the listeners.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Tuple[str, str, str], asyncio.Future] = {}
+        self._latest: Dict[Tuple[str, str, str], Tuple[float, dict]] = {}
+        self.listeners: List = []
+        self.metrics = {"requests": 0, "oracle_calls": 0, "coalesced": 0, "cached": 0}
+
+    async def _fetch(self, key: Tuple[str, str, str]) -> dict:
+        customer_name, instance_name, request_id = key
+        oracle = ORACLE_REST_CLIENTS.for_instance(customer_name, instance_name)
+        res = await oracle.get(f"{HCM_REST_PATH}/dataLoadDataSets/{request_id}", headers={"Accept": "application/json"})
+        if not res.is_success:
+            logging.error(f"❌ Oracle HDL Status Failed: HTTP {res.status_code} - {res.text}")
+            raise HTTPException(status_code=res.status_code, detail=res.text)
+        data = res.json()
+        now = time.monotonic()
+        if len(self._latest) >= HDL_STATUS_LATEST_KEEP:
+            self._latest = {k: v for k, v in self._latest.items() if now - v[0] <= HDL_STATUS_FRESH_SECONDS}
+        self._latest[key] = (now, data)
+        for listener in self.listeners:
+            try:
+                listener(key, data)
+            except Exception:
+                logger.exception(f"HDL status listener failed for RequestId={request_id}")
+        return data
+
+    def _done(self, key: Tuple[str, str, str], task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Marks the error as retrieved when every caller has gone away
+            task.exception()
+
+    async def fetch(self, customer_name: str, instance_name: str, request_id: str,
+                    max_age: float = HDL_STATUS_FRESH_SECONDS) -> dict:
+        key = (customer_name, instance_name, request_id)
+        self.metrics["requests"] += 1
+        latest = self._latest.get(key)
+        if latest is not None and time.monotonic() - latest[0] <= max_age:
+            self.metrics["cached"] += 1
+            return latest[1]
+        task = self._inflight.get(key)
+        if task is None:
+            self.metrics["oracle_calls"] += 1
+            task = asyncio.ensure_future(self._fetch(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._done(key, done))
+        else:
+            self.metrics["coalesced"] += 1
+        # A caller that disconnects must not cancel the fetch the others are waiting on
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {**self.metrics, "in_flight": len(self._inflight)}
+
+
+HDL_STATUS_FETCHER = HdlStatusFetcher()
+
+
 @app.get("/api/hdl/status/{customerName}/{instanceName}/{request_id}")
-def get_status_by_request_id(customerName: str, instanceName: str, request_id: str):
+async def get_status_by_request_id(customerName: str, instanceName: str, request_id: str):
     """
     Retrieves the status of an Oracle HDL data load request by its request ID.
 
@@ -4429,21 +7167,11 @@ def get_status_by_request_id(customerName: str, instanceName: str, request_id: s
         oracle_env = oracle_env.rstrip('/')
 
         # Build Oracle status check URL
-        url = f"{oracle_env}/hcmRestApi/resources/11.13.18.05/dataLoadDataSets/{request_id}"
+        url = f"{oracle_env}{HCM_REST_PATH}/dataLoadDataSets/{request_id}"
         logging.info(f"🔍 Fetching HDL status from Oracle for RequestId={request_id}, URL={url}")
 
-        headers = {
-            "Accept": "application/json"
-        }
-
-        # Make the GET request to Oracle
-        res = requests.get(url, auth=(username, password), headers=headers)
-
-        if not res.ok:
-            logging.error(f"❌ Oracle HDL Status Failed: HTTP {res.status_code} - {res.text}")
-            raise HTTPException(status_code=res.status_code, detail=res.text)
-
-        data = res.json()
+        # Shares an in-flight or just-fetched status with other callers watching the same load
+        data = await HDL_STATUS_FETCHER.fetch(customerName, instanceName, request_id)
         logging.info(f"✅ Successfully retrieved HDL status for RequestId={request_id}")
 
         return {
@@ -4451,13 +7179,13 @@ def get_status_by_request_id(customerName: str, instanceName: str, request_id: s
             "oracle_response": data
         }
 
-    except requests.exceptions.ConnectionError as ce:
+    except (httpx.ConnectError, httpx.ConnectTimeout) as ce:
         logging.error(f"🌐 Connection Error to Oracle: {ce}")
         raise HTTPException(status_code=503, detail=f"Failed to connect to Oracle environment: {ce}")
-    except requests.exceptions.Timeout as te:
+    except httpx.TimeoutException as te:
         logging.error(f"⏳ Timeout while connecting to Oracle: {te}")
         raise HTTPException(status_code=504, detail=f"Request to Oracle timed out: {te}")
-    except requests.exceptions.RequestException as req_e:
+    except httpx.HTTPError as req_e:
         logging.error(f"⚠️ Unexpected request error: {req_e}")
         raise HTTPException(status_code=500, detail=f"Unexpected Oracle request error: {req_e}")
     except HTTPException:
@@ -4470,16 +7198,24 @@ def get_status_by_request_id(customerName: str, instanceName: str, request_id: s
 
 
 @app.get("/api/hdl/status/byContentId/{content_id}/{oracle_env}/{username}/{password}")
-def get_status_by_content_id(content_id: str):
-    try:
-        oracle_env = os.getenv("ORACLE_ENV")
-        username = os.getenv("ORACLE_USERNAME")
-        password = os.getenv("ORACLE_PASSWORD")
+async def get_status_by_content_id(content_id: str):
+    oracle_env = os.getenv("ORACLE_ENV")
+    username = os.getenv("ORACLE_USERNAME")
+    password = os.getenv("ORACLE_PASSWORD")
+
+    # Without a URL every attempt fails the same way, so there is nothing to retry
+    if not oracle_env or not username or not password:
+        logging.error("❌ Missing Oracle credentials: ORACLE_ENV, ORACLE_USERNAME and ORACLE_PASSWORD must be set")
+        raise HTTPException(
+            status_code=500,
+            detail="Server configuration error: Oracle credentials missing."
+        )
 
-        url = f"{oracle_env}/hcmRestApi/resources/11.13.18.05/dataLoadSubmissions?q=ContentId={content_id}"
+    try:
+        oracle = ORACLE_REST_CLIENTS.get("default", oracle_env, username, password)
         headers = { "Accept": "application/json" }
 
-        res = requests.get(url, auth=(username, password), headers=headers)
+        res = await oracle.get(f"{HCM_REST_PATH}/dataLoadSubmissions?q=ContentId={content_id}", headers=headers)
 
         # ✅ If Oracle says 404 – don't crash, return gracefully
         if res.status_code == 404:
@@ -4488,7 +7224,7 @@ def get_status_by_content_id(content_id: str):
                 "requestId": "UNKNOWN"
             }
 
-        if not res.ok:
+        if not res.is_success:
             logger.info("❌ Oracle HDL Status Failed:", res.status_code, res.text)
             raise HTTPException(status_code=500, detail="Failed to fetch Oracle job status.")
 
@@ -4511,8 +7247,207 @@ def get_status_by_content_id(content_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+#------------- HDL error messages ------------------#
+HDL_MESSAGES_FIELDS = (
+    "DatFileName,BusinessObjectDiscriminator,OriginatingProcessCode,FileLine,"
+    "ConcatenatedUserKey,SourceSystemOwner,SourceSystemId,SourceReference001,"
+    "MessageTypeCode,MessageText,MessageUserDetails"
+)
+# Rows asked for per page; Oracle serves at most 500
+HDL_MESSAGES_PAGE_SIZE = int(os.getenv("HDL_MESSAGES_PAGE_SIZE", "500"))
+# Pages of one load fetched at once after the first
+HDL_MESSAGES_PAGE_CONCURRENCY = int(os.getenv("HDL_MESSAGES_PAGE_CONCURRENCY", "4"))
+HDL_MESSAGES_CACHE_DIR = BASE_DIR / "hdl_messages_cache"
+HDL_MESSAGES_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+HDL_MESSAGES_CACHE_BATCH = 1000
+
+
+def hdl_messages_cache_path(customer_name: str, instance_name: str, request_id: str) -> Path:
+    """NDJSON file holding every message of a finished load, one message per line."""
+    def safe(value: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", str(value))
+
+    return HDL_MESSAGES_CACHE_DIR / safe(customer_name) / safe(instance_name) / f"{safe(request_id)}.ndjson"
+
+
+def read_hdl_messages_cache(cache_path: Path) -> Iterator[List[dict]]:
+    with open(cache_path, "r", encoding="utf-8") as f:
+        batch = []
+        for line in f:
+            batch.append(json.loads(line))
+            if len(batch) >= HDL_MESSAGES_CACHE_BATCH:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+async def fetch_hdl_messages_page(oracle: OracleRestClient, request_id: str, offset: int, limit: int,
+                                  total_results: bool = False) -> dict:
+    params = {
+        "orderBy": "DatFileName,FileLine",
+        "fields": HDL_MESSAGES_FIELDS,
+        "onlyData": "true",
+        "offset": offset,
+        "limit": limit,
+    }
+    if total_results:
+        params["totalResults"] = "true"
+    res = await oracle.get(
+        f"{HCM_REST_PATH}/dataLoadDataSets/{request_id}/child/messages", params=params, headers={"Accept": "application/json"}
+    )
+    if not res.is_success:
+        logging.error(f"❌ Oracle HDL Errors Fetch Failed: HTTP {res.status_code} - {res.text}")
+        raise HTTPException(status_code=res.status_code, detail=res.text)
+    return res.json()
+
+
+async def iterate_hdl_message_pages(oracle: OracleRestClient, request_id: str, stats: dict) -> AsyncIterator[List[dict]]:
+    """
+    Yields the messages of a load one page at a time, in DatFileName/FileLine order. The
+    first page reports totalResults; the following pages are requested up to
+    HDL_MESSAGES_PAGE_CONCURRENCY at a time by offset and still yielded in order.
+    """
+    first = await fetch_hdl_messages_page(oracle, request_id, 0, HDL_MESSAGES_PAGE_SIZE, total_results=True)
+    items = first.get("items") or []
+    total = first.get("totalResults")
+    stats["total_results"] = total
+    yield items
+    if not first.get("hasMore"):
+        return
+    if not items:
+        raise HTTPException(status_code=502, detail="Oracle reported more error messages but returned an empty page.")
+    # Oracle may serve fewer rows than asked for; later offsets step by what it actually served
+    page_size = len(items)
+    next_offset = page_size
+    pending = deque()
+
+    def schedule():
+        nonlocal next_offset
+        while len(pending) < HDL_MESSAGES_PAGE_CONCURRENCY and (total is None or next_offset < total):
+            pending.append(asyncio.ensure_future(fetch_hdl_messages_page(oracle, request_id, next_offset, page_size)))
+            next_offset += page_size
+
+    try:
+        schedule()
+        while pending:
+            page = await pending.popleft()
+            items = page.get("items") or []
+            if page.get("hasMore") and len(items) != page_size:
+                # Offsets would skip or repeat rows; fail instead of returning a silently incomplete set
+                raise HTTPException(
+                    status_code=502,
+                    detail=f"Oracle returned a short page of error messages ({len(items)} of {page_size} rows).",
+                )
+            yield items
+            if not page.get("hasMore"):
+                break
+            schedule()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def hdl_load_is_final(customer_name: str, instance_name: str, request_id: str) -> bool:
+    try:
+        data = await HDL_STATUS_FETCHER.fetch(customer_name, instance_name, request_id)
+    except Exception as e:
+        logger.warning(f"Could not read the status of RequestId={request_id}; its error messages are not cached: {e}")
+        return False
+    return hdl_status_code(data).upper() in HDL_FINAL_STATUSES
+
+
+async def iterate_hdl_messages(customer_name: str, instance_name: str, request_id: str, stats: dict) -> AsyncIterator[List[dict]]:
+    """
+    Yields every message of a load in batches: from the disk cache when the load's messages
+    were cached, otherwise page by page from Oracle. A complete walk of a load that has
+    reached a final status is cached, so later views and exports skip Oracle. stats gets
+    "source" and "count".
+    """
+    cache_path = hdl_messages_cache_path(customer_name, instance_name, request_id)
+    stats["count"] = 0
+    if cache_path.exists():
+        stats["source"] = "cache"
+        async for batch in iterate_in_thread(read_hdl_messages_cache(cache_path)):
+            stats["count"] += len(batch)
+            yield batch
+        return
+
+    stats["source"] = "oracle"
+    try:
+        oracle = ORACLE_REST_CLIENTS.for_instance(customer_name, instance_name)
+    except ValueError:
+        logging.error(f"❌ Missing Oracle credentials for {customer_name}/{instance_name}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Server configuration error: Oracle credentials missing for {customer_name}/{instance_name}."
+        )
+    is_final = asyncio.ensure_future(hdl_load_is_final(customer_name, instance_name, request_id))
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{uuid.uuid4().hex}.tmp")
+    complete = False
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as cache_file:
+            async for items in iterate_hdl_message_pages(oracle, request_id, stats):
+                cache_file.write("".join(json.dumps(item, default=str) + "\n" for item in items))
+                stats["count"] += len(items)
+                yield items
+        complete = stats.get("total_results") in (None, stats["count"])
+        if not complete:
+            logger.warning(
+                f"RequestId={request_id} reported {stats.get('total_results')} messages but {stats['count']} were read; not caching."
+            )
+    finally:
+        if complete and await is_final:
+            os.replace(tmp_path, cache_path)
+            logger.info(f"Cached {stats['count']} HDL messages for RequestId={request_id} ({customer_name}/{instance_name}).")
+        else:
+            is_final.cancel()
+            tmp_path.unlink(missing_ok=True)
+
+
+def hdl_message_filter(dat_file_names: Optional[List[str]], message_type_codes: Optional[List[str]]):
+    """Predicate for the DatFileName / MessageTypeCode query filters, or None when neither is given."""
+    files = {name.strip().lower() for name in dat_file_names or [] if name.strip()}
+    types = {code.strip().upper() for code in message_type_codes or [] if code.strip()}
+    if not files and not types:
+        return None
+
+    def keep(item: dict) -> bool:
+        return ((not files or str(item.get("DatFileName") or "").lower() in files)
+                and (not types or str(item.get("MessageTypeCode") or "").upper() in types))
+
+    return keep
+
+
+def oracle_request_http_exception(e: Exception) -> HTTPException:
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)):
+        logging.error(f"🌐 Connection Error to Oracle: {e}")
+        return HTTPException(status_code=503, detail=f"Failed to connect to Oracle environment: {e}")
+    if isinstance(e, httpx.TimeoutException):
+        logging.error(f"⏳ Timeout while fetching Oracle errors: {e}")
+        return HTTPException(status_code=504, detail=f"Request to Oracle timed out: {e}")
+    if isinstance(e, httpx.HTTPError):
+        logging.error(f"⚠️ Unexpected Oracle request error: {e}")
+        return HTTPException(status_code=500, detail=f"Unexpected Oracle request error: {e}")
+    logging.critical(f"🔥 Unhandled error fetching Oracle HDL errors: {e}", exc_info=True)
+    return HTTPException(status_code=500, detail=f"Internal server error: {e}")
+
+
+def hdl_messages_workbook(items: List[dict]) -> BytesIO:
+    output = BytesIO()
+    pd.DataFrame(items, columns=HDL_MESSAGES_FIELDS.split(",")).to_excel(output, index=False, sheet_name="Errors")
+    output.seek(0)
+    return output
+
+
 @app.get("/api/hdl/errors/{customerName}/{instanceName}/{request_id}")
-async def get_oracle_errors(customerName: str, instanceName: str, request_id: str):
+async def get_oracle_errors(customerName: str, instanceName: str, request_id: str,
+                            datFileName: Optional[List[str]] = Query(None),
+                            messageTypeCode: Optional[List[str]] = Query(None)):
     """
     Retrieves the error messages for a given Oracle HDL data load request.
 
@@ -4520,58 +7455,38 @@ async def get_oracle_errors(customerName: str, instanceName: str, request_id: st
         customerName (str): Customer name to resolve Oracle credentials.
         instanceName (str): Instance name (e.g., Prod, Test).
         request_id (str): The ID of the HDL data load request.
+        datFileName (List[str], optional): Only messages for these .dat files.
+        messageTypeCode (List[str], optional): Only messages of these types (e.g., ERROR, WARNING).
 
     Returns:
-        dict: Oracle error messages response.
+        dict: Oracle error messages response, with every page of messages in items.
     """
     try:
-        # Resolve environment + credentials
-        oracle_env, username, password = load_oracle_credentials(customerName, instanceName)
-
-        if not oracle_env or not username or not password:
-            logging.error(f"❌ Missing Oracle credentials for {customerName}/{instanceName}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Server configuration error: Oracle credentials missing for {customerName}/{instanceName}."
-            )
-
-        # Ensure no trailing slash in URL
-        oracle_env = oracle_env.rstrip('/')
-
-        # Oracle error messages API endpoint
-        url = (
-            f"{oracle_env}/hcmRestApi/resources/11.13.18.05/dataLoadDataSets/{request_id}/child/messages"
-            "?totalResults=true"
-            "&orderBy=DatFileName,FileLine"
-            "&fields=DatFileName,BusinessObjectDiscriminator,OriginatingProcessCode,FileLine,"
-            "ConcatenatedUserKey,SourceSystemOwner,SourceSystemId,SourceReference001,"
-            "MessageTypeCode,MessageText,MessageUserDetails"
-            "&onlyData=true"
+        keep = hdl_message_filter(datFileName, messageTypeCode)
+        logging.info(f"🔍 Fetching Oracle HDL error messages for RequestId={request_id}")
+
+        stats = {}
+        items = []
+        async for batch in iterate_hdl_messages(customerName, instanceName, request_id, stats):
+            items.extend(batch if keep is None else filter(keep, batch))
+        logging.info(
+            f"✅ Successfully retrieved HDL error messages for RequestId={request_id} "
+            f"({stats['count']} from {stats['source']}, {len(items)} after filters)"
         )
-        logging.info(f"🔍 Fetching Oracle HDL error messages for RequestId={request_id}, URL={url}")
-
-        headers = {"Accept": "application/json"}
-        res = requests.get(url, auth=(username, password), headers=headers)
-
-        if not res.ok:
-            logging.error(f"❌ Oracle HDL Errors Fetch Failed: HTTP {res.status_code} - {res.text}")
-            raise HTTPException(status_code=res.status_code, detail=res.text)
-
-        data = res.json()
-        logging.info(f"✅ Successfully retrieved HDL error messages for RequestId={request_id}")
 
         return {
             "requestId": request_id,
-            "oracle_response": data
+            "oracle_response": {"items": items, "count": len(items), "hasMore": False, "totalResults": stats["count"]},
+            "source": stats["source"],
         }
 
-    except requests.exceptions.ConnectionError as ce:
+    except (httpx.ConnectError, httpx.ConnectTimeout) as ce:
         logging.error(f"🌐 Connection Error to Oracle: {ce}")
         raise HTTPException(status_code=503, detail=f"Failed to connect to Oracle environment: {ce}")
-    except requests.exceptions.Timeout as te:
+    except httpx.TimeoutException as te:
         logging.error(f"⏳ Timeout while fetching Oracle errors: {te}")
         raise HTTPException(status_code=504, detail=f"Request to Oracle timed out: {te}")
-    except requests.exceptions.RequestException as req_e:
+    except httpx.HTTPError as req_e:
         logging.error(f"⚠️ Unexpected Oracle request error: {req_e}")
         raise HTTPException(status_code=500, detail=f"Unexpected Oracle request error: {req_e}")
     except HTTPException:
@@ -4581,6 +7496,66 @@ async def get_oracle_errors(customerName: str, instanceName: str, request_id: st
         raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
 
 
+@app.get("/api/hdl/errors/{customerName}/{instanceName}/{request_id}/stream")
+async def stream_oracle_errors(customerName: str, instanceName: str, request_id: str,
+                               datFileName: Optional[List[str]] = Query(None),
+                               messageTypeCode: Optional[List[str]] = Query(None)):
+    """
+    NDJSON form of /api/hdl/errors: one message per line, sent as the pages arrive, so large
+    failed loads are never built into a single response. A failure after the first page
+    ends the stream with an {"error": ...} line.
+    """
+    keep = hdl_message_filter(datFileName, messageTypeCode)
+    stats = {}
+    batches = iterate_hdl_messages(customerName, instanceName, request_id, stats)
+    try:
+        first = await batches.__anext__()
+    except StopAsyncIteration:
+        first = []
+    except Exception as e:
+        await batches.aclose()
+        raise oracle_request_http_exception(e)
+
+    def lines(items: List[dict]) -> str:
+        return "".join(json.dumps(item, default=str) + "\n" for item in (items if keep is None else filter(keep, items)))
+
+    async def body():
+        try:
+            yield lines(first)
+            async for batch in batches:
+                chunk = lines(batch)
+                if chunk:
+                    yield chunk
+        except Exception as e:
+            yield json.dumps({"error": oracle_request_http_exception(e).detail}) + "\n"
+        finally:
+            await batches.aclose()
+
+    return StreamingResponse(body(), media_type="application/x-ndjson", headers={"X-HDL-Messages-Source": stats["source"]})
+
+
+@app.get("/api/hdl/errors/{customerName}/{instanceName}/{request_id}/export")
+async def export_oracle_errors(customerName: str, instanceName: str, request_id: str,
+                               datFileName: Optional[List[str]] = Query(None),
+                               messageTypeCode: Optional[List[str]] = Query(None)):
+    """Excel workbook of a load's error messages, filtered like /api/hdl/errors."""
+    keep = hdl_message_filter(datFileName, messageTypeCode)
+    stats = {}
+    items = []
+    try:
+        async for batch in iterate_hdl_messages(customerName, instanceName, request_id, stats):
+            items.extend(batch if keep is None else filter(keep, batch))
+    except Exception as e:
+        raise oracle_request_http_exception(e)
+
+    output = await BLOCKING_WORK_POOL.run("hdl-errors-export", hdl_messages_workbook, items)
+    return StreamingResponse(
+        output,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={"Content-Disposition": f"attachment; filename=\"HDL_Errors_{request_id}.xlsx\""},
+    )
+
+
 class InstanceModel(BaseModel):
     instanceName: str
     oracleUrl: str
@@ -4726,6 +7701,13 @@ def sync_hierarchy_with_customers(customers: List[CustomerModel]):
         merge_env_files(customers=env_payload)
         load_dotenv(".env", override=True)
 
+        # Warm the menu-items cache: existing subtrees are extended with the appended rows,
+        # only the newly added customer/instance pairs are built from scratch
+        try:
+            get_menu_items_response()
+        except HTTPException as e:
+            logger.warning(f"Menu-items cache was not refreshed after customer sync: {e.detail}")
+
         # --- Return Response ---
         return {
             "message": "Customer hierarchy sync complete.",
@@ -5413,99 +8395,104 @@ async def convert_excel_endpoint(excel_file: UploadFile = File(..., description=
     try:
         # Read the incoming Excel file content into a BytesIO object
         file_content = await excel_file.read()
-        file_stream = io.BytesIO(file_content)
-
-        # Configuration for source Excel sheets (header rows are fixed based on template)
-        sheets_config = {
-            'Person': {'sheet_name': 'Person', 'header_row_index': 6}, 
-            'WorkRelationship': {'sheet_name': 'WorkRelationship', 'header_row_index': 7}, 
-            'Assignment': {'sheet_name': 'Assignment', 'header_row_index': 6}, 
-            'MultiDiversity': {'sheet_name': 'MultiDiversity', 'header_row_index': 0}, 
-            'Address': {'sheet_name': 'Address', 'header_row_index': 6}, 
-            'Nat. ID Multi': {'sheet_name': 'Nat. ID Multi', 'header_row_index': 5}, 
-            'Phone': {'sheet_name': 'Phone', 'header_row_index': 5}, 
-            'Email': {'sheet_name': 'Email', 'header_row_index': 5}, 
-            'Citizenship': {'sheet_name': 'Citizenship', 'header_row_index': 4}, 
-        }
 
-        source_dfs = {}
-        for name, sheet_config in sheets_config.items():
-            source_dfs[name] = read_excel_sheet_with_dynamic_header(
-                file_stream,
-                sheet_config['sheet_name'],
-                sheet_config['header_row_index']
-            )
+        def convert_workbook():
+            file_stream = io.BytesIO(file_content)
+
+            # Configuration for source Excel sheets (header rows are fixed based on template)
+            sheets_config = {
+                'Person': {'sheet_name': 'Person', 'header_row_index': 6}, 
+                'WorkRelationship': {'sheet_name': 'WorkRelationship', 'header_row_index': 7}, 
+                'Assignment': {'sheet_name': 'Assignment', 'header_row_index': 6}, 
+                'MultiDiversity': {'sheet_name': 'MultiDiversity', 'header_row_index': 0}, 
+                'Address': {'sheet_name': 'Address', 'header_row_index': 6}, 
+                'Nat. ID Multi': {'sheet_name': 'Nat. ID Multi', 'header_row_index': 5}, 
+                'Phone': {'sheet_name': 'Phone', 'header_row_index': 5}, 
+                'Email': {'sheet_name': 'Email', 'header_row_index': 5}, 
+                'Citizenship': {'sheet_name': 'Citizenship', 'header_row_index': 4}, 
+            }
 
-        output_dfs = {}
-        logging.info("Performing data transformations via API.")
+            source_dfs = {}
+            for name, sheet_config in sheets_config.items():
+                source_dfs[name] = read_excel_sheet_with_dynamic_header(
+                    file_stream,
+                    sheet_config['sheet_name'],
+                    sheet_config['header_row_index']
+                )
 
-        output_dfs['Worker'] = convert_worker_data(
-            source_dfs.get('Person', pd.DataFrame()),
-            source_dfs.get('WorkRelationship', pd.DataFrame())
-        )
+            output_dfs = {}
+            logging.info("Performing data transformations via API.")
 
-        output_dfs['PersonName'] = convert_person_name_data(
-            source_dfs.get('Person', pd.DataFrame())
-        )
+            output_dfs['Worker'] = convert_worker_data(
+                source_dfs.get('Person', pd.DataFrame()),
+                source_dfs.get('WorkRelationship', pd.DataFrame())
+            )
 
-        output_dfs['WorkRelationship'] = convert_work_relationship_data(
-            source_dfs.get('WorkRelationship', pd.DataFrame()),
-            source_dfs.get('Assignment', pd.DataFrame())
-        )
+            output_dfs['PersonName'] = convert_person_name_data(
+                source_dfs.get('Person', pd.DataFrame())
+            )
 
-        output_dfs['WorkTerms'] = convert_work_terms_data(
-            source_dfs.get('WorkRelationship', pd.DataFrame()),
-            source_dfs.get('Assignment', pd.DataFrame())
-        )
+            output_dfs['WorkRelationship'] = convert_work_relationship_data(
+                source_dfs.get('WorkRelationship', pd.DataFrame()),
+                source_dfs.get('Assignment', pd.DataFrame())
+            )
 
-        output_dfs['Assignment'] = convert_assignment_data(
-            source_dfs.get('Assignment', pd.DataFrame())
-        )
+            output_dfs['WorkTerms'] = convert_work_terms_data(
+                source_dfs.get('WorkRelationship', pd.DataFrame()),
+                source_dfs.get('Assignment', pd.DataFrame())
+            )
 
-        output_dfs['Contract'] = convert_contract_data(
-            source_dfs.get('Assignment', pd.DataFrame())
-        )
+            output_dfs['Assignment'] = convert_assignment_data(
+                source_dfs.get('Assignment', pd.DataFrame())
+            )
 
-        output_dfs['PersonNationalIdentifier'] = convert_national_id_data(
-            source_dfs.get('Person', pd.DataFrame()),
-            source_dfs.get('Nat. ID Multi', pd.DataFrame())
-        )
+            output_dfs['Contract'] = convert_contract_data(
+                source_dfs.get('Assignment', pd.DataFrame())
+            )
 
-        output_dfs['PersonReligion'] = convert_person_religion_data(
-            source_dfs.get('Person', pd.DataFrame())
-        )
+            output_dfs['PersonNationalIdentifier'] = convert_national_id_data(
+                source_dfs.get('Person', pd.DataFrame()),
+                source_dfs.get('Nat. ID Multi', pd.DataFrame())
+            )
 
-        output_dfs['PersonAddress'] = convert_person_address_data(
-            source_dfs.get('Address', pd.DataFrame())
-        )
+            output_dfs['PersonReligion'] = convert_person_religion_data(
+                source_dfs.get('Person', pd.DataFrame())
+            )
 
-        output_dfs['PersonCitizenship'] = convert_person_citizenship_data(
-            source_dfs.get('Citizenship', pd.DataFrame())
-        )
+            output_dfs['PersonAddress'] = convert_person_address_data(
+                source_dfs.get('Address', pd.DataFrame())
+            )
 
-        output_dfs['PersonEmail'] = convert_person_email_data(
-            source_dfs.get('Email', pd.DataFrame())
-        )
+            output_dfs['PersonCitizenship'] = convert_person_citizenship_data(
+                source_dfs.get('Citizenship', pd.DataFrame())
+            )
+
+            output_dfs['PersonEmail'] = convert_person_email_data(
+                source_dfs.get('Email', pd.DataFrame())
+            )
         
-        output_dfs['PersonPhone'] = convert_person_phone_data(
-            source_dfs.get('Phone', pd.DataFrame())
-        )
+            output_dfs['PersonPhone'] = convert_person_phone_data(
+                source_dfs.get('Phone', pd.DataFrame())
+            )
+
+            output_dfs['PersonEthnicity'] = convert_person_ethnicity_data(
+                source_dfs.get('Person', pd.DataFrame()),
+                source_dfs.get('MultiDiversity', pd.DataFrame())
+            )
 
-        output_dfs['PersonEthnicity'] = convert_person_ethnicity_data(
-            source_dfs.get('Person', pd.DataFrame()),
-            source_dfs.get('MultiDiversity', pd.DataFrame())
-        )
+            # Write converted dataframes to a BytesIO object
+            output_stream = io.BytesIO()
+            with pd.ExcelWriter(output_stream, engine='openpyxl') as writer:
+                for sheet_name, df in output_dfs.items():
+                    if not df.empty:
+                        df.to_excel(writer, sheet_name=sheet_name, index=False)
+                        logging.info(f"Prepared sheet '{sheet_name}' for output.")
+                    else:
+                        logging.warning(f"Sheet '{sheet_name}' is empty, skipping writing to output Excel.")
+            output_stream.seek(0) # Rewind to the beginning of the stream
+            return output_stream
 
-        # Write converted dataframes to a BytesIO object
-        output_stream = io.BytesIO()
-        with pd.ExcelWriter(output_stream, engine='openpyxl') as writer:
-            for sheet_name, df in output_dfs.items():
-                if not df.empty:
-                    df.to_excel(writer, sheet_name=sheet_name, index=False)
-                    logging.info(f"Prepared sheet '{sheet_name}' for output.")
-                else:
-                    logging.warning(f"Sheet '{sheet_name}' is empty, skipping writing to output Excel.")
-        output_stream.seek(0) # Rewind to the beginning of the stream
+        output_stream = await BLOCKING_WORK_POOL.run("convert-excel", convert_workbook)
 
         logging.info("Excel conversion successful. Sending file back.")
         return StreamingResponse(
@@ -5514,6 +8501,8 @@ async def convert_excel_endpoint(excel_file: UploadFile = File(..., description=
             headers={"Content-Disposition": "attachment; filename=Converted_Employee_Data.xlsx"}
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"An unexpected error occurred during Excel processing: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error during processing: {e}")
@@ -5640,68 +8629,655 @@ def get_hdl_attribute_mapping(customer_name: str, instance_name: str, component_
 
 
 
-class LookupDataAPIOracle(BaseModel):
-    customerName: str
-    instanceName: str
+#------------- SOAP reports ------------------#
+SOAP_REPORT_BYTES_TAG = "{http://xmlns.oracle.com/oxp/service/PublicReportService}reportBytes"
+SOAP_REPORT_CHUNK_BYTES = 1024 * 1024
+# b64decode ignores anything outside the alphabet; line breaks inside reportBytes are common
+SOAP_BASE64_NOISE = re.compile(rb"[^A-Za-z0-9+/=]")
 
-@app.post("/api/hdl/oracle_fetch/lookupdataload")
-async def LookupDataLoading(req: LookupDataAPIOracle):
-    customerName = req.customerName
-    instanceName = req.instanceName
 
-    oracle_env, username, password = [x.strip() for x in load_oracle_credentials(customerName, instanceName)]
-    logger.warning(f"oracle credentials are, {oracle_env}, {username}, {password}")
-    
-    # Define SOAP save zone path
-    soap_save_zone = Path(f"{customerName}/{instanceName}/soap_temp_storage")
-    soap_save_zone.mkdir(parents=True, exist_ok=True)  # create dirs if they don't exist
-    LookupData_Directory = Path(f"Required_files/{customerName}_{instanceName}_LookupData.xlsx")
-    LookupData_Directory.parent.mkdir(parents=True, exist_ok=True)
+class SoapReportWriter:
+    """
+    Incremental reader of an ExternalReportWSSService runReport response.
+
+    The envelope is fed to an ElementTree XMLParser a chunk at a time with this object as
+    its target, so no tree is built. The text of <reportBytes> is base64-decoded as the
+    parser hands it over and written to a temporary file that replaces output_path in
+    finish(). Memory stays around the chunk size whatever the size of the report.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = Path(output_path)
+        self._tmp_path = self.output_path.with_name(f".{self.output_path.name}.{uuid.uuid4().hex}.tmp")
+        self._out = open(self._tmp_path, "wb")
+        self._parser = ET.XMLParser(target=self)
+        self._in_report = False
+        self._carry = b""
+        self.found = False
+        self.bytes_written = 0
+
+    def start(self, tag, attrib):
+        if tag == SOAP_REPORT_BYTES_TAG:
+            self._in_report = self.found = True
+
+    def end(self, tag):
+        if self._in_report and tag == SOAP_REPORT_BYTES_TAG:
+            self._in_report = False
+            self._decode(b"", final=True)
+
+    def data(self, text):
+        if self._in_report:
+            self._decode(text.encode("ascii", "ignore"))
+
+    def close(self):
+        return self.bytes_written
+
+    def _decode(self, data: bytes, final: bool = False):
+        # Whole 4-character groups decode independently, so chunks concatenate to one decoding
+        data = self._carry + SOAP_BASE64_NOISE.sub(b"", data)
+        cut = len(data) if final else len(data) - len(data) % 4
+        self._carry = data[cut:]
+        if cut:
+            decoded = base64.b64decode(data[:cut])
+            self._out.write(decoded)
+            self.bytes_written += len(decoded)
+
+    def feed(self, chunk: bytes):
+        self._parser.feed(chunk)
+
+    def finish(self) -> str:
+        self._parser.close()
+        self._out.close()
+        if not self.found or not self.bytes_written:
+            raise ValueError("reportBytes not found or empty in the response.")
+        os.replace(self._tmp_path, self.output_path)
+        return str(self.output_path.resolve())
+
+    def abort(self):
+        """Drops the partial output; a no-op after finish()."""
+        self._out.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+async def stream_soap_report_to_excel(soap_url: str, soap_body: str, headers: dict, auth: Tuple[str, str],
+                                      raw_response_path: Path, output_excel_path: Path) -> str:
+    """
+    Posts a report request and writes the report carried in the streamed response to
+    output_excel_path (see SoapReportWriter). The raw response is kept at
+    raw_response_path for troubleshooting.
+    """
+    async with httpx.AsyncClient(timeout=90) as client:
+        logger.info(f"Making SOAP request to {soap_url} with user {auth[0]}")
+        async with client.stream("POST", soap_url, content=soap_body, headers=headers, auth=auth) as response:
+            if response.is_error:
+                await response.aread()
+            response.raise_for_status()
+            logger.info(f"SOAP request successful with status code {response.status_code}")
+
+            writer = SoapReportWriter(output_excel_path)
+            try:
+                with open(raw_response_path, "wb") as raw_file:
+                    def consume(chunk: bytes):
+                        raw_file.write(chunk)
+                        writer.feed(chunk)
+
+                    received = 0
+                    async for chunk in response.aiter_bytes(SOAP_REPORT_CHUNK_BYTES):
+                        if not received:
+                            logger.warning(f"Response content: {chunk[:500].decode('utf-8', 'replace')}...")
+                        received += len(chunk)
+                        # Parsing and decoding are CPU work; keep them off the event loop
+                        await asyncio.to_thread(consume, chunk)
+                logger.info(f"SOAP response ({received} bytes) saved at: {raw_response_path}")
+                excel_path = await asyncio.to_thread(writer.finish)
+            except httpx.HTTPError:
+                # A connection dropped mid-stream is a failed SOAP call, not a bad report
+                raise
+            except Exception as e:
+                raise RuntimeError(f"Failed to extract Excel from SOAP XML: {e}") from e
+            finally:
+                writer.abort()
+    logger.info(f"Report of {writer.bytes_written} bytes written to {excel_path}")
+    return excel_path
+
+
+#------------- Reference data versions ------------------#
+REFERENCE_VERSIONS_DIR = Path("Required_files") / "reference_versions"
+# Deltas kept per workbook; "changes since" an older version returns the full snapshot
+REFERENCE_DELTA_KEEP = int(os.getenv("REFERENCE_DELTA_KEEP", "50"))
+# Columns identifying a row, per workbook kind; rows repeating a key are told apart by occurrence
+REFERENCE_KEY_COLUMNS = {
+    "LookupData": ["BO_NAME", "COMP_NAME", "HDL_Attribute_Name", "CODE_Name", "Value"],
+    "MandatoryFields": ["BO HDL File Name", "Component Name", "HDL Attribute Name"],
+}
+REFERENCE_REFRESH_LOCKS: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+REFERENCE_REFRESH_LOCKS_GUARD = threading.Lock()
+
+
+class ReferenceVersionStore:
+    """
+    Version history of one {customer}_{instance}_{kind}.xlsx reference workbook.
+
+    The rows of the latest version are kept as a columnar snapshot (snapshot.npz: per
+    column, int32 codes into the column's distinct values, which are stored as one UTF-8
+    blob plus byte offsets so a single long value does not widen the others). A refresh is diffed against
+    it by key and only the added, removed and changed rows are written, as
+    delta_<version>.json; manifest.json records the current version and the history.
+    """
+
+    def __init__(self, kind: str, customer_name: str, instance_name: str):
+        self.kind = kind
+        self.directory = REFERENCE_VERSIONS_DIR / f"{customer_name}_{instance_name}_{kind}"
+        self.manifest_path = self.directory / "manifest.json"
+        self.snapshot_path = self.directory / "snapshot.npz"
+        with REFERENCE_REFRESH_LOCKS_GUARD:
+            self.lock = REFERENCE_REFRESH_LOCKS[str(self.directory)]
+
+    def delta_path(self, version: int) -> Path:
+        return self.directory / f"delta_{version}.json"
+
+    def manifest(self) -> Optional[dict]:
+        if not self.manifest_path.exists():
+            return None
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_json(self, path: Path, data: dict):
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, default=str)
+        os.replace(tmp_path, path)
+
+    def load_snapshot(self) -> List[tuple]:
+        with np.load(self.snapshot_path) as snapshot:
+            column_count = int(snapshot["column_count"])
+            columns = []
+            for i in range(column_count):
+                if f"values_{i}" in snapshot.files:
+                    # Snapshot written before the values were stored as a blob
+                    values = snapshot[f"values_{i}"].astype(object)
+                else:
+                    blob = snapshot[f"text_{i}"].tobytes()
+                    offsets = snapshot[f"offsets_{i}"].tolist()
+                    values = np.array([blob[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])] or [""], dtype=object)
+                columns.append(values[snapshot[f"codes_{i}"]].tolist())
+        return list(zip(*columns))
+
+    def _save_snapshot(self, columns: List[str], rows: List[tuple]):
+        arrays = {"column_count": np.array(len(columns))}
+        for i in range(len(columns)):
+            codes, values = pd.factorize(pd.Series([row[i] for row in rows], dtype=object))
+            encoded = [str(value).encode("utf-8") for value in values.tolist()]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(value) for value in encoded])
+            arrays[f"codes_{i}"] = codes.astype(np.int32)
+            arrays[f"text_{i}"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+            arrays[f"offsets_{i}"] = offsets
+        tmp_path = self.snapshot_path.with_name("snapshot.tmp.npz")
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _keyed(self, columns: List[str], rows: List[tuple]) -> Dict[tuple, tuple]:
+        key_positions = [columns.index(col) for col in REFERENCE_KEY_COLUMNS.get(self.kind, []) if col in columns]
+        key_positions = key_positions or list(range(len(columns)))
+        occurrences = defaultdict(int)
+        keyed = {}
+        for row in rows:
+            key = tuple(row[i] for i in key_positions)
+            keyed[key + (occurrences[key],)] = row
+            occurrences[key] += 1
+        return keyed
+
+    def apply(self, columns: List[str], rows: List[tuple]) -> dict:
+        """
+        Records rows as the next version unless they equal the current one. Returns the
+        version, whether it was updated and the added/removed/changed counts.
+        """
+        manifest = self.manifest()
+        version = (manifest["version"] if manifest else 0) + 1
+        delta = {"version": version, "created_at": datetime.now().isoformat(), "columns": columns}
+        if manifest is None or manifest["columns"] != columns:
+            # No previous version to diff against (or the report layout changed)
+            delta["reset"] = True
+            counts = {"added": len(rows), "removed": 0, "changed": 0}
+        else:
+            old = self._keyed(columns, self.load_snapshot())
+            new = self._keyed(columns, rows)
+            delta["added"] = [[key, row] for key, row in new.items() if key not in old]
+            delta["removed"] = [[key, row] for key, row in old.items() if key not in new]
+            delta["changed"] = [[key, old[key], row] for key, row in new.items() if key in old and old[key] != row]
+            counts = {name: len(delta[name]) for name in ("added", "removed", "changed")}
+            if not any(counts.values()):
+                return {"version": manifest["version"], "updated": False, **counts}
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._write_json(self.delta_path(version), delta)
+        self._save_snapshot(columns, rows)
+        history = (manifest or {}).get("history", []) + [
+            {"version": version, "created_at": delta["created_at"], "reset": delta.get("reset", False), **counts}
+        ]
+        for entry in history[:-REFERENCE_DELTA_KEEP]:
+            self.delta_path(entry["version"]).unlink(missing_ok=True)
+        self._write_json(self.manifest_path, {
+            "kind": self.kind, "version": version, "columns": columns, "rows": len(rows),
+            "history": history[-REFERENCE_DELTA_KEEP:],
+        })
+        return {"version": version, "updated": True, **counts}
+
+    def _deltas_since(self, since_version: int, current: int) -> Optional[List[dict]]:
+        """Deltas since_version+1..current, or None when one was pruned or starts a new baseline."""
+        if since_version == current:
+            return []
+        if since_version <= 0:
+            return None
+        deltas = []
+        for version in range(since_version + 1, current + 1):
+            delta_path = self.delta_path(version)
+            if not delta_path.exists():
+                return None
+            with open(delta_path, "r", encoding="utf-8") as f:
+                delta = json.load(f)
+            if delta.get("reset"):
+                return None
+            deltas.append(delta)
+        return deltas
+
+    def changes_since(self, since_version: int) -> dict:
+        """
+        Net changes from since_version to the current version, composed from the stored
+        deltas. When those do not reach back far enough the full snapshot is returned
+        with "full": true.
+        """
+        manifest = self.manifest()
+        if manifest is None:
+            raise HTTPException(status_code=404, detail=f"No versions recorded for {self.directory.name}.")
+        current = manifest["version"]
+        if since_version > current:
+            raise HTTPException(status_code=400, detail=f"Version {since_version} is newer than the current version {current}.")
+        columns = manifest["columns"]
+
+        def as_record(row) -> dict:
+            return dict(zip(columns, row))
+
+        response = {"version": current, "sinceVersion": since_version, "columns": columns, "full": False}
+        deltas = self._deltas_since(since_version, current)
+        if deltas is not None:
+            before, after = {}, {}
+            for delta in deltas:
+                for key, row in delta["added"]:
+                    before.setdefault(tuple(key), None)
+                    after[tuple(key)] = row
+                for key, row in delta["removed"]:
+                    before.setdefault(tuple(key), row)
+                    after[tuple(key)] = None
+                for key, old_row, new_row in delta["changed"]:
+                    before.setdefault(tuple(key), old_row)
+                    after[tuple(key)] = new_row
+            response["added"] = [as_record(row) for key, row in after.items() if before[key] is None and row is not None]
+            response["removed"] = [as_record(before[key]) for key, row in after.items() if before[key] is not None and row is None]
+            response["changed"] = [
+                {"before": as_record(before[key]), "after": as_record(row)}
+                for key, row in after.items() if before[key] is not None and row is not None and before[key] != row
+            ]
+            return response
+
+        response["full"] = True
+        response["rows"] = [as_record(row) for row in self.load_snapshot()]
+        return response
+
+
+def refresh_reference_workbook(kind: str, customer_name: str, instance_name: str, staged_path: Path, target_path: Path) -> dict:
+    """
+    Applies a freshly downloaded reference workbook as the next version. When its rows equal
+    the current version the existing workbook is kept, so cached frames and lookup versions
+    stay valid, and the download is discarded.
+    """
+    store = ReferenceVersionStore(kind, customer_name, instance_name)
+    with store.lock:
+        started = time.perf_counter()
+        frame = pd.read_excel(staged_path, dtype=str).fillna("")
+        columns = [str(col).strip() for col in frame.columns]
+        result = store.apply(columns, list(frame.itertuples(index=False, name=None)))
+        if result["updated"] or not target_path.exists():
+            os.replace(staged_path, target_path)
+            REFERENCE_DATA_CACHE.invalidate(target_path)
+        else:
+            staged_path.unlink(missing_ok=True)
+        logger.info(
+            f"{target_path.name} refreshed to version {result['version']} in {time.perf_counter() - started:.2f}s: "
+            f"{result['added']} added, {result['removed']} removed, {result['changed']} changed"
+        )
+        return result
+
+
+@app.get("/api/hdl/reference/changes")
+def get_reference_changes(customerName: str = Query(...), instanceName: str = Query(...),
+                          kind: str = Query("LookupData"), sinceVersion: int = Query(0)):
+    """
+    What changed in a customer/instance's LookupData or MandatoryFields workbook since
+    sinceVersion: the added, removed and changed rows, or every row ("full": true) when
+    sinceVersion is 0 or older than the kept history.
+    """
+    if kind not in REFERENCE_KEY_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(REFERENCE_KEY_COLUMNS)}.")
+    return ReferenceVersionStore(kind, customerName, instanceName).changes_since(sinceVersion)
+
+
+#------------- Reference refresh ------------------#
+# SOAP request body sent for each reference workbook kind
+REFERENCE_REPORT_REQUESTS = {
+    "LookupData": "soap_request_Lookup_Data.xml",
+    "MandatoryFields": "soap_request_Mandatory_Fields.xml",
+}
+
+
+async def refresh_reference_report(kind: str, customer_name: str, instance_name: str) -> dict:
+    """
+    Runs the BI Publisher report behind Required_files/{customer}_{instance}_{kind}.xlsx
+    and applies it as the workbook's next version (see refresh_reference_workbook).
+    """
+    oracle_env, username, password = [x.strip() for x in load_oracle_credentials(customer_name, instance_name)]
 
-    # SOAP service URL
-    SOAP_URL = f"{oracle_env}/xmlpserver/services/ExternalReportWSSService?wsdl"
+    # Define SOAP save zone path
+    soap_save_zone = Path(f"{customer_name}/{instance_name}/soap_temp_storage")
+    soap_save_zone.mkdir(parents=True, exist_ok=True)
+    target_path = Path(f"Required_files/{customer_name}_{instance_name}_{kind}.xlsx")
+    target_path.parent.mkdir(parents=True, exist_ok=True)
 
+    soap_url = f"{oracle_env}/xmlpserver/services/ExternalReportWSSService?wsdl"
     headers = {
         "Content-Type": "application/soap+xml; charset=utf-8",
         "SOAPAction": "",
     }
 
-    # Read from soap_request.xml
-    with open("soap_request_Lookup_Data.xml", "r", encoding="utf-8") as file:
+    request_file = REFERENCE_REPORT_REQUESTS[kind]
+    with open(request_file, "r", encoding="utf-8") as file:
         soap_body = file.read().strip()
 
     # Save a copy of the SOAP request XML to the soap_save_zone
     try:
-        saved_file_path = soap_save_zone / "soap_request_Lookup_Data_saved.xml"
+        saved_file_path = soap_save_zone / request_file.replace(".xml", "_saved.xml")
         with open(saved_file_path, "w", encoding="utf-8") as f:
             f.write(soap_body)
         logger.info(f"SOAP request saved at: {saved_file_path}")
     except Exception as save_err:
         logger.error(f"Failed to save SOAP XML: {save_err}")
 
-    # Now make the actual SOAP call
+    # One response file per kind, so both reports of an instance can be fetched at once
+    saved_file_path = soap_save_zone / f"soap_response_{kind}_saved.xml"
+    staged_path = target_path.with_name(f".{target_path.stem}.{uuid.uuid4().hex}.xlsx")
     try:
-        async with httpx.AsyncClient(timeout=90) as client:
-            #log everything
-            logger.info(f"Making SOAP request to {SOAP_URL} with user {username}")
-            response = await client.post(SOAP_URL, data=soap_body, headers=headers, auth=(username, password))
-            response.raise_for_status()
-            logger.info(f"SOAP request successful with status code {response.status_code}")
-            # log all the response code as well as content
-            logger.warning(f"Response content: {response.text[:500]}...")  # Log first 500 chars for brevity
-            saved_file_path = soap_save_zone / "soap_response_saved.xml"
-            with open(saved_file_path, "w", encoding="utf-8") as f:
-                f.write(response.text)
-            logger.info(f"SOAP request saved at: {saved_file_path}")
-
-            excel_path = parse_soap_response_to_excel(saved_file_path, LookupData_Directory)
-            return {
-                "status": "success",
-                "results": "Lookup data loaded successfully"
-            }
+        # The report is decoded while the response streams in
+        await stream_soap_report_to_excel(soap_url, soap_body, headers, (username, password), saved_file_path, staged_path)
+        # Diffs the report against the previous version; an unchanged report leaves the workbook alone
+        return await BLOCKING_WORK_POOL.run(
+            "reference-refresh", refresh_reference_workbook, kind, customer_name, instance_name, staged_path, target_path
+        )
+    finally:
+        staged_path.unlink(missing_ok=True)
+
+
+# Reports fetched at once across all instances, and per Oracle host
+REFERENCE_REFRESH_CONCURRENCY = int(os.getenv("REFERENCE_REFRESH_CONCURRENCY", "4"))
+REFERENCE_REFRESH_PER_HOST = int(os.getenv("REFERENCE_REFRESH_PER_HOST", "2"))
+# Scheduled runs start at every multiple of this many minutes since midnight; 0 turns the schedule off
+REFERENCE_REFRESH_INTERVAL_MINUTES = float(os.getenv("REFERENCE_REFRESH_INTERVAL_MINUTES", "0"))
+REFERENCE_REFRESH_RUNS_KEPT = 20
+
+
+def configured_oracle_instances() -> List[Dict[str, str]]:
+    """The .env customer/instance pairs whose Oracle credentials resolve, with their Oracle host."""
+    combos = REFERENCE_DATA_CACHE.get(ENV_PATH, extract_customer_instance_names_from_env) if ENV_PATH.exists() else []
+    instances = []
+    for customer_name, instance_name in combos:
+        try:
+            oracle_env, _, _ = load_oracle_credentials(customer_name, instance_name)
+        except ValueError:
+            continue
+        oracle_env = oracle_env.strip()
+        instances.append({
+            "customerName": customer_name,
+            "instanceName": instance_name,
+            "host": urlparse(oracle_env).netloc or oracle_env,
+        })
+    return instances
+
+
+class ReferenceRefreshScheduler:
+    """
+    Refreshes the reference workbooks of many customer/instances in one run.
+
+    A run fetches every (instance, kind) report concurrently, at most
+    REFERENCE_REFRESH_CONCURRENCY at once and REFERENCE_REFRESH_PER_HOST per Oracle host,
+    and records each one's status, duration and version. Runs start on demand or on the
+    interval schedule; only one run is active at a time.
+    """
+
+    def __init__(self, interval_minutes: float):
+        self.interval_minutes = interval_minutes
+        self.next_run_at: Optional[datetime] = None
+        self.runs: deque = deque(maxlen=REFERENCE_REFRESH_RUNS_KEPT)
+        self._active: Optional[asyncio.Task] = None
+        self._schedule_task: Optional[asyncio.Task] = None
+        self._schedule_changed: Optional[asyncio.Event] = None
+
+    def running(self) -> bool:
+        return self._active is not None and not self._active.done()
+
+    def trigger(self, trigger: str, instances: Optional[List[Dict[str, str]]] = None, kinds: Optional[List[str]] = None) -> dict:
+        if self.running():
+            raise HTTPException(status_code=409, detail="A reference refresh run is already in progress.")
+        kinds = kinds or list(REFERENCE_REPORT_REQUESTS)
+        unknown = [kind for kind in kinds if kind not in REFERENCE_REPORT_REQUESTS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown reference kind(s): {', '.join(unknown)}")
+        configured = configured_oracle_instances()
+        if instances is not None:
+            wanted = {(i["customerName"].upper(), i["instanceName"].upper()) for i in instances}
+            configured = [i for i in configured if (i["customerName"].upper(), i["instanceName"].upper()) in wanted]
+        if not configured:
+            raise HTTPException(status_code=404, detail="No configured Oracle instances to refresh.")
+
+        run = {
+            "id": uuid.uuid4().hex[:12],
+            "trigger": trigger,
+            "status": "running",
+            "started_at": datetime.now().isoformat(),
+            "finished_at": None,
+            "duration_seconds": None,
+            "results": [
+                {**instance, "kind": kind, "status": "queued", "duration_seconds": None}
+                for instance in configured for kind in kinds
+            ],
+        }
+        self.runs.appendleft(run)
+        self._active = asyncio.get_running_loop().create_task(self._execute(run))
+        logger.info(f"Reference refresh run {run['id']} ({trigger}) started for {len(run['results'])} report(s).")
+        return run
+
+    async def _execute(self, run: dict):
+        started = time.perf_counter()
+        all_slots = asyncio.Semaphore(REFERENCE_REFRESH_CONCURRENCY)
+        host_slots = defaultdict(lambda: asyncio.Semaphore(REFERENCE_REFRESH_PER_HOST))
+
+        async def refresh(result: dict):
+            # Host slot first, so a busy host does not hold global slots other hosts could use
+            async with host_slots[result["host"]], all_slots:
+                result["status"] = "running"
+                result_started = time.perf_counter()
+                try:
+                    refreshed = await refresh_reference_report(result["kind"], result["customerName"], result["instanceName"])
+                    result.update(
+                        status="succeeded", version=refreshed["version"],
+                        changes={name: refreshed[name] for name in ("added", "removed", "changed")},
+                    )
+                except Exception as e:
+                    detail = getattr(e, "detail", None) or str(e) or type(e).__name__
+                    result.update(status="failed", error=detail)
+                    logger.warning(
+                        f"Reference refresh of {result['kind']} for {result['customerName']}/{result['instanceName']} failed: {detail}"
+                    )
+                finally:
+                    result["duration_seconds"] = round(time.perf_counter() - result_started, 2)
+
+        try:
+            await asyncio.gather(*(refresh(result) for result in run["results"]))
+        finally:
+            failed = sum(1 for result in run["results"] if result["status"] != "succeeded")
+            run["status"] = "completed" if not failed else "completed_with_errors"
+            run["finished_at"] = datetime.now().isoformat()
+            run["duration_seconds"] = round(time.perf_counter() - started, 2)
+            logger.info(
+                f"Reference refresh run {run['id']} finished in {run['duration_seconds']}s: "
+                f"{len(run['results']) - failed} succeeded, {failed} failed."
+            )
+
+    def _next_run_time(self, after: Optional[datetime] = None) -> Optional[datetime]:
+        if self.interval_minutes <= 0:
+            return None
+        # A timer that fires a little early must not schedule the same boundary twice
+        now = max(datetime.now(), after) if after else datetime.now()
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        step = timedelta(minutes=self.interval_minutes)
+        return midnight + step * ((now - midnight) // step + 1)
+
+    async def _schedule_loop(self):
+        while True:
+            self.next_run_at = self._next_run_time(after=self.next_run_at)
+            timeout = max(0.0, (self.next_run_at - datetime.now()).total_seconds()) if self.next_run_at else None
+            try:
+                await asyncio.wait_for(self._schedule_changed.wait(), timeout)
+                self._schedule_changed.clear()
+                self.next_run_at = None
+                continue
+            except asyncio.TimeoutError:
+                pass
+            if self.running():
+                logger.info("Scheduled reference refresh skipped; the previous run is still in progress.")
+                continue
+            try:
+                self.trigger("schedule")
+            except HTTPException as e:
+                logger.warning(f"Scheduled reference refresh not started: {e.detail}")
+
+    def start(self):
+        self._schedule_changed = asyncio.Event()
+        self._schedule_task = asyncio.get_running_loop().create_task(self._schedule_loop())
+
+    async def stop(self):
+        for task in (self._schedule_task, self._active):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+    def set_interval(self, interval_minutes: float):
+        self.interval_minutes = interval_minutes
+        self.next_run_at = self._next_run_time()
+        if self._schedule_changed is not None:
+            self._schedule_changed.set()
+
+    def stats(self) -> dict:
+        return {
+            "interval_minutes": self.interval_minutes,
+            "next_run_at": self.next_run_at.isoformat() if self.next_run_at else None,
+            "running": self.running(),
+            "last_run": {key: value for key, value in self.runs[0].items() if key != "results"} if self.runs else None,
+        }
+
+
+REFERENCE_REFRESH_SCHEDULER = ReferenceRefreshScheduler(REFERENCE_REFRESH_INTERVAL_MINUTES)
+
+
+@app.on_event("startup")
+async def start_reference_refresh_scheduler():
+    REFERENCE_REFRESH_SCHEDULER.start()
+
+
+@app.on_event("shutdown")
+async def stop_reference_refresh_scheduler():
+    await REFERENCE_REFRESH_SCHEDULER.stop()
+
+
+class ReferenceRefreshTarget(BaseModel):
+    customerName: str
+    instanceName: str
+
+
+class ReferenceRefreshRunRequest(BaseModel):
+    # Defaults to every configured instance and both workbooks
+    instances: Optional[List[ReferenceRefreshTarget]] = None
+    kinds: Optional[List[str]] = None
+
+
+class ReferenceRefreshSchedule(BaseModel):
+    intervalMinutes: float
+
+
+@app.post("/api/hdl/reference/refresh-runs")
+async def start_reference_refresh_run(req: ReferenceRefreshRunRequest = Body(default=None)):
+    """
+    Starts refreshing LookupData and MandatoryFields for every configured customer/instance
+    (or the given ones) and returns the run; poll /api/hdl/reference/refresh-runs/{run_id}.
+    """
+    req = req or ReferenceRefreshRunRequest()
+    instances = [target.dict() for target in req.instances] if req.instances is not None else None
+    run = REFERENCE_REFRESH_SCHEDULER.trigger("manual", instances=instances, kinds=req.kinds)
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=run)
+
+
+@app.get("/api/hdl/reference/refresh-runs")
+async def list_reference_refresh_runs():
+    """Schedule state and the most recent refresh runs, newest first."""
+    return {**REFERENCE_REFRESH_SCHEDULER.stats(), "runs": list(REFERENCE_REFRESH_SCHEDULER.runs)}
+
+
+@app.get("/api/hdl/reference/refresh-runs/{run_id}")
+async def get_reference_refresh_run(run_id: str):
+    for run in REFERENCE_REFRESH_SCHEDULER.runs:
+        if run["id"] == run_id:
+            return run
+    raise HTTPException(status_code=404, detail=f"Refresh run '{run_id}' not found.")
+
+
+@app.put("/api/admin/reference-refresh/schedule")
+async def set_reference_refresh_schedule(schedule: ReferenceRefreshSchedule, admin_token: str = Query(...)):
+    """Changes the refresh interval in minutes until the next restart; 0 turns the schedule off."""
+    expected_token = os.getenv("ADMIN_RESET_TOKEN", "reset123")
+    if admin_token != expected_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token"
+        )
+    if schedule.intervalMinutes < 0:
+        raise HTTPException(status_code=400, detail="intervalMinutes must be 0 or more.")
+    REFERENCE_REFRESH_SCHEDULER.set_interval(schedule.intervalMinutes)
+    return REFERENCE_REFRESH_SCHEDULER.stats()
+
+
+class LookupDataAPIOracle(BaseModel):
+    customerName: str
+    instanceName: str
+
+@app.post("/api/hdl/oracle_fetch/lookupdataload")
+async def LookupDataLoading(req: LookupDataAPIOracle):
+    customerName = req.customerName
+    instanceName = req.instanceName
+
+    try:
+        refresh = await refresh_reference_report("LookupData", customerName, instanceName)
+        return {
+            "status": "success",
+            "results": "Lookup data loaded successfully",
+            "version": refresh["version"],
+            "changes": {name: refresh[name] for name in ("added", "removed", "changed")},
+        }
     except httpx.HTTPError as e:
         logger.error(f"SOAP call failed: {str(e)}")
-        if e.response:
+        # Transport errors (refused or dropped connections) carry no response
+        if isinstance(e, httpx.HTTPStatusError):
             logger.error(f"Response content: {e.response.text}")
         raise HTTPException(status_code=500, detail=f"SOAP call failed: {str(e)}")
 
@@ -5714,65 +9290,23 @@ async def MandatoryfieldsLoading(req: mandatoryFieldsReqOracle):
     customerName = req.customerName
     instanceName = req.instanceName
 
-    oracle_env, username, password = [x.strip() for x in load_oracle_credentials(customerName, instanceName)]
-    logger.warning(f"oracle credentials are, {oracle_env}, {username}, {password}")
-    
-    # Define SOAP save zone path
-    soap_save_zone = Path(f"{customerName}/{instanceName}/soap_temp_storage")
-    soap_save_zone.mkdir(parents=True, exist_ok=True)  # create dirs if they don't exist
-    LookupData_Directory = Path(f"Required_files/{customerName}_{instanceName}_MandatoryFields.xlsx")
-    LookupData_Directory.parent.mkdir(parents=True, exist_ok=True)
-
-    # SOAP service URL
-    SOAP_URL = f"{oracle_env}/xmlpserver/services/ExternalReportWSSService?wsdl"
-
-    headers = {
-        "Content-Type": "application/soap+xml; charset=utf-8",
-        "SOAPAction": "",
-    }
-
-    # Read from soap_request.xml
-    with open("soap_request_Mandatory_Fields.xml", "r", encoding="utf-8") as file:
-        soap_body = file.read().strip()
-
-    # Save a copy of the SOAP request XML to the soap_save_zone
-    try:
-        saved_file_path = soap_save_zone / "soap_request_Mandatory_Fields_saved.xml"
-        with open(saved_file_path, "w", encoding="utf-8") as f:
-            f.write(soap_body)
-        logger.info(f"SOAP request saved at: {saved_file_path}")
-    except Exception as save_err:
-        logger.error(f"Failed to save SOAP XML: {save_err}")
-
-    # Now make the actual SOAP call
     try:
-        async with httpx.AsyncClient(timeout=90) as client:
-            #log everything
-            logger.info(f"Making SOAP request to {SOAP_URL} with user {username}")
-            response = await client.post(SOAP_URL, data=soap_body, headers=headers, auth=(username, password))
-            response.raise_for_status()
-            logger.info(f"SOAP request successful with status code {response.status_code}")
-            # log all the response code as well as content
-            logger.warning(f"Response content: {response.text[:500]}...")  # Log first 500 chars for brevity
-            saved_file_path = soap_save_zone / "soap_response_saved.xml"
-            with open(saved_file_path, "w", encoding="utf-8") as f:
-                f.write(response.text)
-            logger.info(f"SOAP request saved at: {saved_file_path}")
-
-            excel_path = parse_soap_response_to_excel(saved_file_path, LookupData_Directory)
-            return {
-                "status": "success",
-                "results": "Mandatory Fields loaded successfully"
-            }
+        refresh = await refresh_reference_report("MandatoryFields", customerName, instanceName)
+        return {
+            "status": "success",
+            "results": "Mandatory Fields loaded successfully",
+            "version": refresh["version"],
+            "changes": {name: refresh[name] for name in ("added", "removed", "changed")},
+        }
     except httpx.HTTPError as e:
         logger.error(f"SOAP call failed: {str(e)}")
-        if e.response:
+        # Transport errors (refused or dropped connections) carry no response
+        if isinstance(e, httpx.HTTPStatusError):
             logger.error(f"Response content: {e.response.text}")
         raise HTTPException(status_code=500, detail=f"SOAP call failed: {str(e)}")
 
 
 
-
 def parse_soap_response_to_excel(xml_path: str, output_excel_path: str = "output.xlsx", customerName: str = "", instanceName: str = "") -> str:
     """
     Parses SOAP response XML and saves embedded base64 Excel data as a file.
@@ -5784,28 +9318,19 @@ def parse_soap_response_to_excel(xml_path: str, output_excel_path: str = "output
     Returns:
         str: Path of the saved Excel file.
     """
-    ns = {
-        'env': 'http://www.w3.org/2003/05/soap-envelope',
-        'ns2': 'http://xmlns.oracle.com/oxp/service/PublicReportService'
-    }
-
     try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-
-        # Navigate to the reportBytes element
-        report_bytes_elem = root.find('.//ns2:reportBytes', ns)
-        if report_bytes_elem is None or not report_bytes_elem.text:
-            raise ValueError("reportBytes not found or empty in the response.")
-
-        # Decode base64 content
-        decoded_excel = base64.b64decode(report_bytes_elem.text)
-
-        # Save as Excel file
-        output_path = Path(output_excel_path)
-        output_path.write_bytes(decoded_excel)
-
-        return str(output_path.resolve())
+        # reportBytes is decoded a chunk at a time instead of parsing the whole envelope
+        writer = SoapReportWriter(output_excel_path)
+        try:
+            with open(xml_path, "rb") as f:
+                while True:
+                    chunk = f.read(SOAP_REPORT_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    writer.feed(chunk)
+            return writer.finish()
+        finally:
+            writer.abort()
 
     except Exception as e:
         raise RuntimeError(f"Failed to extract Excel from SOAP XML: {e}")
@@ -6065,6 +9590,9 @@ async def reset_system(
             pass_df = pd.DataFrame()
             fail_df = pd.DataFrame()
             USER_DB = load_user_data(USER_EXCEL_FILE_PATH)  # Reload user data
+            REFERENCE_DATA_CACHE.invalidate()
+            MENU_ITEMS_CACHE.invalidate()
+            VALIDATION_MODULE_CACHE.invalidate()
             
             reset_log.append("✅ Cleared in-memory data structures")
 
@@ -6146,6 +9674,9 @@ async def reset_system(
             # Reload essential configuration files if they exist
             if USER_EXCEL_FILE_PATH.exists():
                 USER_DB = load_user_data(USER_EXCEL_FILE_PATH)
+            REFERENCE_DATA_CACHE.invalidate()
+            MENU_ITEMS_CACHE.invalidate()
+            VALIDATION_MODULE_CACHE.invalidate()
             
             reset_log.append("✅ Cleared all in-memory data structures")
 
@@ -6249,6 +9780,13 @@ async def get_system_status(admin_token: str = Query(...)):
         process = psutil.Process()
         memory_info = process.memory_info()
         status_info["memory_usage_mb"] = memory_info.rss / (1024 * 1024)
+        status_info["reference_cache"] = REFERENCE_DATA_CACHE.stats()
+        status_info["custom_validation_modules"] = VALIDATION_MODULE_CACHE.stats()
+        status_info["blocking_work_pool"] = BLOCKING_WORK_POOL.stats()
+        status_info["validation_jobs"] = VALIDATION_JOB_STORE.stats()
+        status_info["oracle_clients"] = ORACLE_REST_CLIENTS.stats()
+        status_info["hdl_status_poller"] = HDL_STATUS_POLLER.stats()
+        status_info["reference_refresh"] = REFERENCE_REFRESH_SCHEDULER.stats()
         
         # Add system info
         status_info["python_version"] = sys.version
@@ -6262,6 +9800,34 @@ async def get_system_status(admin_token: str = Query(...)):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get system status: {str(e)}"
         )
+
+
+@app.get("/api/admin/worker-pool")
+async def get_worker_pool_metrics(admin_token: str = Query(...)):
+    """
+    Utilization, queue wait and per-endpoint admission counters for the blocking work pool.
+    """
+    expected_token = os.getenv("ADMIN_RESET_TOKEN", "reset123")
+    if admin_token != expected_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token"
+        )
+    return BLOCKING_WORK_POOL.stats()
+
+
+@app.get("/api/admin/oracle-clients")
+async def get_oracle_client_metrics(admin_token: str = Query(...)):
+    """
+    Latency, retry and pool saturation counters for each Oracle REST client.
+    """
+    expected_token = os.getenv("ADMIN_RESET_TOKEN", "reset123")
+    if admin_token != expected_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token"
+        )
+    return ORACLE_REST_CLIENTS.stats()
     
 #------------- HDL Job Management ------------------#
 DATA_FILE = Path("hdl_jobs.json")
@@ -6332,6 +9898,7 @@ async def add_data(customer: str, instance: str, job: HDLJob):
 
     jobs.append(job.dict())
     save_data(data)
+    HDL_STATUS_POLLER.wake()
     return {"message": "Job added", "job": job}
 
 
@@ -6351,11 +9918,254 @@ async def update_data(customer: str, instance: str, job_id: int, job_update: HDL
                 job_update.id = job_id
             jobs[i] = job_update.dict()
             save_data(data)
+            HDL_STATUS_POLLER.wake()
             return {"message": "Job updated", "job": job_update}
 
     raise HTTPException(status_code=404, detail="Job not found")
 
 
+# -----------------------------
+# Status Poller
+# -----------------------------
+HDL_POLL_ENABLED = os.getenv("HDL_POLL_ENABLED", "true").lower() == "true"
+# A RequestId is polled every HDL_POLL_MIN_SECONDS at first; the interval grows by
+# HDL_POLL_BACKOFF each time Oracle reports the same status, up to HDL_POLL_MAX_SECONDS
+HDL_POLL_MIN_SECONDS = float(os.getenv("HDL_POLL_MIN_SECONDS", "5"))
+HDL_POLL_MAX_SECONDS = float(os.getenv("HDL_POLL_MAX_SECONDS", "60"))
+HDL_POLL_BACKOFF = float(os.getenv("HDL_POLL_BACKOFF", "1.5"))
+# How often hdl_jobs.json is checked for new RequestIds between polls
+HDL_POLL_RESCAN_SECONDS = 10
+HDL_EVENTS_HEARTBEAT_SECONDS = 15
+HDL_EVENTS_QUEUE_SIZE = 100
+HDL_NO_REQUEST_IDS = {"", "-", "N/A", "NONE", "UNKNOWN"}
+
+
+class HdlStatusPoller:
+    """
+    Polls Oracle for every job in hdl_jobs.json that has a RequestId and is not final.
+
+    Each RequestId is fetched through HDL_STATUS_FETCHER at most once per its interval,
+    which backs off while the status stays the same and resets when it changes. Status
+    changes, whether found by the poller or by a browser's own status request, are
+    written back into the job record and pushed to /api/hdl/status-events subscribers.
+    """
+
+    def __init__(self):
+        self._tracked: Dict[Tuple[str, str, str], dict] = {}
+        # RequestIds Oracle does not know; skipped until their job record changes
+        self._unknown: Dict[Tuple[str, str, str], Any] = {}
+        self._subscribers: Dict[Tuple[str, str], Set[asyncio.Queue]] = defaultdict(set)
+        self._store_mtime = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.metrics = {"polls": 0, "poll_failures": 0, "status_changes": 0, "events_dropped": 0}
+
+    def start(self):
+        self._wake = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self):
+        """Rescans the job store now instead of at the next rescan interval."""
+        self._store_mtime = None
+        if self._wake is not None:
+            self._wake.set()
+
+    def _scan_jobs(self):
+        try:
+            mtime = DATA_FILE.stat().st_mtime_ns if DATA_FILE.exists() else 0
+        except OSError:
+            mtime = None
+        if mtime is not None and mtime == self._store_mtime:
+            return
+        self._store_mtime = mtime
+        active = set()
+        for customer, instances in load_data().items():
+            for instance, jobs in instances.items():
+                for job in jobs:
+                    request_id = str(job.get("requestId") or "").strip()
+                    job_status = str(job.get("status") or "")
+                    if request_id.upper() in HDL_NO_REQUEST_IDS or job_status.upper() in HDL_FINAL_STATUSES:
+                        continue
+                    key = (customer, instance, request_id)
+                    if key in self._unknown and self._unknown[key] == job:
+                        continue
+                    self._unknown.pop(key, None)
+                    active.add(key)
+                    if key not in self._tracked:
+                        self._tracked[key] = {
+                            "status": job_status, "interval": HDL_POLL_MIN_SECONDS, "next_poll": 0.0, "failures": 0,
+                        }
+        for key in list(self._tracked):
+            if key not in active:
+                del self._tracked[key]
+
+    async def _run(self):
+        logger.info("HDL status poller started.")
+        while True:
+            try:
+                self._scan_jobs()
+                now = time.monotonic()
+                due = [key for key, state in self._tracked.items() if state["next_poll"] <= now]
+                if due:
+                    await asyncio.gather(*(self._poll(key) for key in due))
+                wake_at = min([state["next_poll"] for state in self._tracked.values()] + [now + HDL_POLL_RESCAN_SECONDS])
+                try:
+                    await asyncio.wait_for(self._wake.wait(), max(0.05, wake_at - time.monotonic()))
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("HDL status poller iteration failed.")
+                await asyncio.sleep(HDL_POLL_MIN_SECONDS)
+
+    async def _poll(self, key: Tuple[str, str, str]):
+        self.metrics["polls"] += 1
+        try:
+            # Polls only fall due when nobody fetched the status during the interval
+            await HDL_STATUS_FETCHER.fetch(*key, max_age=0)
+        except Exception as e:
+            self.metrics["poll_failures"] += 1
+            state = self._tracked.get(key)
+            if state is None:
+                return
+            if isinstance(e, HTTPException) and e.status_code == 404:
+                logger.warning(f"Oracle does not know RequestId={key[2]} ({key[0]}/{key[1]}); no longer polling it.")
+                self._unknown[key] = self._job_record(key)
+                del self._tracked[key]
+                return
+            state["failures"] += 1
+            state["interval"] = min(HDL_POLL_MAX_SECONDS, state["interval"] * HDL_POLL_BACKOFF)
+            state["next_poll"] = time.monotonic() + state["interval"]
+            logger.warning(
+                f"HDL status poll failed for RequestId={key[2]} ({key[0]}/{key[1]}): {getattr(e, 'detail', e)}; "
+                f"next poll in {state['interval']:.0f}s"
+            )
+
+    @staticmethod
+    def _job_record(key: Tuple[str, str, str]) -> Optional[dict]:
+        customer, instance, request_id = key
+        for job in load_data().get(customer, {}).get(instance, []):
+            if str(job.get("requestId") or "").strip() == request_id:
+                return job
+        return None
+
+    def record(self, key: Tuple[str, str, str], data: dict):
+        """HDL_STATUS_FETCHER listener: reschedules the RequestId and stores/pushes a changed status."""
+        status_code = hdl_status_code(data)
+        state = self._tracked.get(key)
+        if state is not None:
+            if status_code.upper() in HDL_FINAL_STATUSES:
+                del self._tracked[key]
+            else:
+                unchanged = status_code == state["status"]
+                state["interval"] = min(HDL_POLL_MAX_SECONDS, state["interval"] * HDL_POLL_BACKOFF) if unchanged else HDL_POLL_MIN_SECONDS
+                state["next_poll"] = time.monotonic() + state["interval"]
+                state["status"] = status_code
+                state["failures"] = 0
+
+        customer, instance, request_id = key
+        store = load_data()
+        summary = json.dumps(data, default=str)
+        changed = []
+        for job in store.get(customer, {}).get(instance, []):
+            if str(job.get("requestId") or "").strip() != request_id:
+                continue
+            if job.get("status") != status_code or job.get("oracleJobSummary") != summary:
+                if job.get("status") != status_code:
+                    self.metrics["status_changes"] += 1
+                job["status"] = status_code
+                job["oracleJobSummary"] = summary
+                changed.append(job)
+        if not changed:
+            return
+        save_data(store)
+        for job in changed:
+            self._publish(customer, instance, {"customer": customer, "instance": instance, "requestId": request_id, "job": job})
+
+    def subscribe(self, customer: str, instance: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=HDL_EVENTS_QUEUE_SIZE)
+        self._subscribers[(customer, instance)].add(queue)
+        return queue
+
+    def unsubscribe(self, customer: str, instance: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get((customer, instance))
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[(customer, instance)]
+
+    def _publish(self, customer: str, instance: str, event: dict):
+        for queue in self._subscribers.get((customer, instance), ()):
+            if queue.full():
+                # A slow client loses its oldest update rather than holding the others up
+                queue.get_nowait()
+                self.metrics["events_dropped"] += 1
+            queue.put_nowait(event)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "tracked_request_ids": len(self._tracked),
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+            **self.metrics,
+            "fetches": HDL_STATUS_FETCHER.stats(),
+        }
+
+
+HDL_STATUS_POLLER = HdlStatusPoller()
+HDL_STATUS_FETCHER.listeners.append(HDL_STATUS_POLLER.record)
+
+
+@app.on_event("startup")
+async def start_hdl_status_poller():
+    if HDL_POLL_ENABLED:
+        HDL_STATUS_POLLER.start()
+
+
+@app.on_event("shutdown")
+async def stop_hdl_status_poller():
+    await HDL_STATUS_POLLER.stop()
+
+
+@app.get("/api/hdl/status-events/{customer}/{instance}")
+async def stream_hdl_status_events(customer: str, instance: str):
+    """
+    Server-Sent Events for the jobs of a customer + instance. Sends a 'snapshot' event with
+    the current job records, then a 'status' event whenever a job's Oracle status changes.
+    """
+    queue = HDL_STATUS_POLLER.subscribe(customer, instance)
+    HDL_STATUS_POLLER.wake()
+
+    async def events():
+        try:
+            jobs = load_data().get(customer, {}).get(instance, [])
+            yield f"event: snapshot\ndata: {json.dumps(jobs, default=str)}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), HDL_EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: status\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            HDL_STATUS_POLLER.unsubscribe(customer, instance, queue)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # ✅ Path to your JSON file
 JSON_FILE_PATH = os.path.join(os.getcwd(), "Required_files", "oracle_value_checks.json")
 